@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+レポート済み記事のSQLiteストア
+
+01.Trends/Headlines/YYYY-MM/YYYY-MM-DD.json に散らばったレポート履歴と、
+01.Trends/DeepDives/ の詳細分析済み記事を1つのSQLiteデータベースにまとめ、
+記事ID（gen_id）・正規化URL・日付・ランク・ソース・カテゴリのインデックスで引けるようにする。
+generate_report.py はこのストアから、過去にレポート済み・詳細分析済みのURLを
+1回のクエリで取り出して候補から除外する。
+
+データベースは Headlines JSON から何度でも作り直せる派生データのため、
+リポジトリには含めない。
+
+使い方:
+    # 既存の Headlines JSON と DeepDives を取り込む（前回から変わったファイルのみ）
+    python3 article_store.py import [--headlines ディレクトリ] [--deepdives ディレクトリ] [--force]
+
+    # URLまたは記事IDで検索
+    python3 article_store.py lookup <URL または 記事ID>
+
+    # 件数の集計
+    python3 article_store.py stats
+
+環境変数:
+    KNOWLEDGE_HUB_ARTICLE_DB   データベースのパス（デフォルト: 01.Trends/articles.sqlite3）
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import profiling
+from url_canonical import canonicalize
+
+# リポジトリのルートディレクトリ
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# データベースのパス
+DB_PATH = Path(os.environ.get("KNOWLEDGE_HUB_ARTICLE_DB") or REPO_ROOT / "01.Trends" / "articles.sqlite3")
+
+# Headlines JSON / DeepDives のデフォルトの場所
+HEADLINES_DIR = REPO_ROOT / "01.Trends" / "Headlines"
+DEEPDIVES_DIR = REPO_ROOT / "01.Trends" / "DeepDives"
+
+# DeepDivesファイル名のパターン: YYYY-MM-DD_タイトル.md
+DEEPDIVE_FILENAME = re.compile(r"^(\d{4}-\d{2}-\d{2})_(.+)\.md$")
+
+# DeepDives本文から元記事のURLを探す範囲（先頭からの行数）
+DEEPDIVE_HEADER_LINES = 30
+
+# Markdown本文中のURL
+URL_PATTERN = re.compile(r"https?://[^\s)>\]\"']+")
+
+# 正規化URLの規則の版（url_canonical.py の規則を変えたら上げる。
+# user_version がこれより古いデータベースは、接続時に正規化URLを計算し直す）
+CANONICAL_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    canonical_url TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    title_ja TEXT,
+    source TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    rank TEXT NOT NULL DEFAULT '',
+    score INTEGER NOT NULL DEFAULT 0,
+    score_label TEXT NOT NULL DEFAULT '',
+    subreddit TEXT,
+    summary TEXT NOT NULL DEFAULT '',
+    checked INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, id)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_id ON articles (id);
+CREATE INDEX IF NOT EXISTS idx_articles_canonical_url ON articles (canonical_url, date);
+CREATE INDEX IF NOT EXISTS idx_articles_date ON articles (date);
+CREATE INDEX IF NOT EXISTS idx_articles_rank ON articles (rank, date);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, date);
+CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (category, date);
+
+CREATE TABLE IF NOT EXISTS deep_dives (
+    canonical_url TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    path TEXT NOT NULL,
+    date TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_deep_dives_path ON deep_dives (path);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+# 記事辞書（Headlines JSONの形式）とテーブルの列の対応
+ARTICLE_COLUMNS = {
+    "id": "id",
+    "url": "url",
+    "title": "title",
+    "titleJa": "title_ja",
+    "source": "source",
+    "category": "category",
+    "rank": "rank",
+    "score": "score",
+    "scoreLabel": "score_label",
+    "subreddit": "subreddit",
+    "summary": "summary",
+    "checked": "checked",
+}
+
+
+def db_exists(db_path: Path | None = None) -> bool:
+    """データベースファイルが作成済みかどうかを返す。"""
+    return (db_path or DB_PATH).exists()
+
+
+def connect(db_path: Path | None = None) -> sqlite3.Connection:
+    """
+    データベースに接続し、未作成のテーブル・インデックスを作成する。
+
+    Args:
+        db_path: データベースのパス（省略時は DB_PATH）
+
+    Returns:
+        sqlite3.Connection（行は sqlite3.Row）
+    """
+    path = db_path or DB_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    _recanonicalize(conn)
+    return conn
+
+
+def _recanonicalize(conn: sqlite3.Connection):
+    """正規化URLの規則が古い版のデータベースなら、保存済みの正規化URLを計算し直す。"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= CANONICAL_VERSION:
+        return
+    with conn:
+        conn.create_function("canonicalize", 1, canonicalize, deterministic=True)
+        conn.execute("UPDATE articles SET canonical_url = canonicalize(url)")
+        # 正規化し直すと主キーが重なる場合があるため、日付の新しい行を残して入れ直す
+        rows = conn.execute("SELECT url, path, date, title FROM deep_dives ORDER BY date").fetchall()
+        conn.execute("DELETE FROM deep_dives")
+        conn.executemany(
+            "INSERT INTO deep_dives (canonical_url, url, path, date, title) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (canonical_url) DO UPDATE SET url = excluded.url, path = excluded.path, "
+            "date = excluded.date, title = excluded.title",
+            [(canonicalize(r["url"]), r["url"], r["path"], r["date"], r["title"]) for r in rows],
+        )
+        conn.execute(f"PRAGMA user_version = {CANONICAL_VERSION}")
+
+
+def _article_row(date: str, article: dict) -> dict:
+    """記事辞書をテーブルの1行分のパラメータに変換する。"""
+    row = {column: article.get(key) for key, column in ARTICLE_COLUMNS.items()}
+    row["date"] = date
+    row["canonical_url"] = canonicalize(article["url"])
+    row["title"] = row["title"] or ""
+    row["source"] = row["source"] or ""
+    row["category"] = row["category"] or ""
+    row["rank"] = row["rank"] or ""
+    row["score"] = row["score"] or 0
+    row["score_label"] = row["score_label"] or ""
+    row["summary"] = row["summary"] or ""
+    row["checked"] = 1 if row["checked"] else 0
+    return row
+
+
+def upsert_articles(conn: sqlite3.Connection, date: str, articles: list[dict]) -> int:
+    """
+    1日分のレポートの記事をまとめて追加・更新する。
+
+    同じ日付・同じ記事IDの行があれば内容を上書きする。
+
+    Args:
+        conn: データベース接続
+        date: レポートの日付（YYYY-MM-DD）
+        articles: Headlines JSON の articles と同じ形式の記事辞書リスト
+
+    Returns:
+        追加・更新した記事数
+    """
+    rows = [_article_row(date, a) for a in articles if a.get("url")]
+    columns = ["date", "canonical_url", *ARTICLE_COLUMNS.values()]
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in ("date", "id"))
+    with conn:
+        conn.executemany(
+            f"INSERT INTO articles ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+            f"ON CONFLICT (date, id) DO UPDATE SET {updates}",
+            rows,
+        )
+    return len(rows)
+
+
+def upsert_report(report: dict, conn: sqlite3.Connection | None = None) -> int:
+    """
+    レポート（Headlines JSON の形式）の記事を追加・更新する。
+
+    レポートから消えた記事は、その日付の行から削除する。
+
+    Args:
+        report: date と articles を持つレポート辞書
+        conn: データベース接続（省略時は DB_PATH に接続して閉じる）
+
+    Returns:
+        追加・更新した記事数
+    """
+    own_conn = conn is None
+    conn = conn or connect()
+    try:
+        date = report["date"]
+        count = upsert_articles(conn, date, report.get("articles", []))
+        ids = [a["id"] for a in report.get("articles", []) if a.get("url")]
+        with conn:
+            conn.execute(
+                f"DELETE FROM articles WHERE date = ? AND id NOT IN ({', '.join('?' * len(ids))})",
+                [date, *ids],
+            )
+        return count
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def mark_deep_dived(conn: sqlite3.Connection, url: str, path: str, date: str = "", title: str = ""):
+    """
+    記事を詳細分析済みとして記録する。
+
+    Args:
+        conn: データベース接続
+        url: 元記事のURL
+        path: DeepDivesファイルのパス（DeepDivesディレクトリからの相対パス）
+        date: 詳細分析の日付
+        title: 詳細分析のタイトル
+    """
+    with conn:
+        conn.execute(
+            "INSERT INTO deep_dives (canonical_url, url, path, date, title) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (canonical_url) DO UPDATE SET url = excluded.url, path = excluded.path, "
+            "date = excluded.date, title = excluded.title",
+            (canonicalize(url), url, path, date, title),
+        )
+
+
+def _file_changed(conn: sqlite3.Connection, path: Path) -> bool:
+    """ファイルが前回の取り込み以降に変更されたかどうかを返す。"""
+    row = conn.execute("SELECT mtime FROM imported_files WHERE path = ?", (str(path),)).fetchone()
+    return row is None or row["mtime"] != path.stat().st_mtime
+
+
+def _mark_imported(conn: sqlite3.Connection, path: Path):
+    """ファイルを取り込み済みとして記録する。"""
+    with conn:
+        conn.execute(
+            "INSERT INTO imported_files (path, mtime) VALUES (?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET mtime = excluded.mtime",
+            (str(path), path.stat().st_mtime),
+        )
+
+
+def import_headlines(conn: sqlite3.Connection, headlines_dir: Path = HEADLINES_DIR, force: bool = False) -> dict:
+    """
+    Headlines JSON をまとめて取り込む。
+
+    前回の取り込みから更新日時が変わっていないファイルは読み飛ばす。
+
+    Args:
+        conn: データベース接続
+        headlines_dir: Headlines ディレクトリ（YYYY-MM/YYYY-MM-DD.json を含む）
+        force: True なら更新日時によらず全ファイルを取り込む
+
+    Returns:
+        files（取り込んだファイル数）/ skipped / articles / errors を持つ辞書
+    """
+    result = {"files": 0, "skipped": 0, "articles": 0, "errors": []}
+    for path in sorted(headlines_dir.glob("*/*.json")):
+        if not force and not _file_changed(conn, path):
+            result["skipped"] += 1
+            continue
+        try:
+            with profiling.stage("parse"):
+                report = json.loads(path.read_text(encoding="utf-8"))
+            result["articles"] += upsert_report(report, conn)
+        except (OSError, ValueError, KeyError) as e:
+            result["errors"].append({"path": str(path), "error": str(e)})
+            continue
+        _mark_imported(conn, path)
+        result["files"] += 1
+    return result
+
+
+def _deep_dive_urls(conn: sqlite3.Connection, path: Path, title: str) -> list[str]:
+    """
+    DeepDivesファイルの元記事URLを推定する。
+
+    本文の先頭付近にあるURLのうちレポート済みの記事に一致するものを優先し、
+    なければファイル名のタイトルが一致する記事、それもなければ先頭のURLを使う。
+    """
+    with open(path, encoding="utf-8") as f:
+        header = "".join(line for _, line in zip(range(DEEPDIVE_HEADER_LINES), f))
+    urls = URL_PATTERN.findall(header)
+
+    if urls:
+        canonical = {canonicalize(u): u for u in urls}
+        placeholders = ", ".join("?" * len(canonical))
+        rows = conn.execute(
+            f"SELECT DISTINCT canonical_url FROM articles WHERE canonical_url IN ({placeholders})",
+            list(canonical),
+        ).fetchall()
+        if rows:
+            return [canonical[row["canonical_url"]] for row in rows]
+
+    row = conn.execute(
+        "SELECT url FROM articles WHERE title = ? OR title_ja = ? ORDER BY date DESC LIMIT 1", (title, title)
+    ).fetchone()
+    if row:
+        return [row["url"]]
+    return urls[:1]
+
+
+def import_deep_dives(conn: sqlite3.Connection, deep_dives_dir: Path = DEEPDIVES_DIR, force: bool = False) -> dict:
+    """
+    DeepDivesのMarkdownを走査し、元記事を詳細分析済みとして記録する。
+
+    Args:
+        conn: データベース接続
+        deep_dives_dir: DeepDives ディレクトリ（YYYY-MM/YYYY-MM-DD_タイトル.md を含む）
+        force: True なら更新日時によらず全ファイルを取り込む
+
+    Returns:
+        files / skipped / deep_dives / unmatched（元記事URLが見つからなかったファイル）を持つ辞書
+    """
+    result = {"files": 0, "skipped": 0, "deep_dives": 0, "unmatched": []}
+    for path in sorted(deep_dives_dir.glob("*/*.md")):
+        match = DEEPDIVE_FILENAME.match(path.name)
+        if not match:
+            continue
+        if not force and not _file_changed(conn, path):
+            result["skipped"] += 1
+            continue
+
+        date, title = match.group(1), match.group(2)
+        relative_path = f"{path.parent.name}/{path.name}"
+        urls = _deep_dive_urls(conn, path, title)
+        if not urls:
+            result["unmatched"].append(relative_path)
+        for url in urls:
+            mark_deep_dived(conn, url, relative_path, date, title)
+            result["deep_dives"] += 1
+        _mark_imported(conn, path)
+        result["files"] += 1
+    return result
+
+
+def find_excluded(conn: sqlite3.Connection, urls, before_date: str | None = None) -> set[str]:
+    """
+    URLのうち、レポート済みまたは詳細分析済みのものを1回のクエリで取り出す。
+
+    Args:
+        conn: データベース接続
+        urls: 判定するURLのイテラブル
+        before_date: 指定時はこの日付より前のレポートのみをレポート済みとみなす（YYYY-MM-DD）
+
+    Returns:
+        除外すべきURL（引数で渡した表記のまま）の集合
+    """
+    by_canonical: dict[str, list[str]] = {}
+    for url in urls:
+        if url:
+            by_canonical.setdefault(canonicalize(url), []).append(url)
+    if not by_canonical:
+        return set()
+
+    # 候補URLを一時テーブルに入れ、インデックス付きの結合で一度に判定する
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidate_urls (canonical_url TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM candidate_urls")
+    conn.executemany("INSERT INTO candidate_urls VALUES (?)", ((u,) for u in by_canonical))
+    rows = conn.execute(
+        """
+        SELECT c.canonical_url FROM candidate_urls c
+        WHERE EXISTS (
+            SELECT 1 FROM articles a WHERE a.canonical_url = c.canonical_url AND (? IS NULL OR a.date < ?)
+        ) OR EXISTS (
+            SELECT 1 FROM deep_dives d WHERE d.canonical_url = c.canonical_url
+        )
+        """,
+        (before_date, before_date),
+    ).fetchall()
+
+    excluded = set()
+    for row in rows:
+        excluded.update(by_canonical[row["canonical_url"]])
+    return excluded
+
+
+def lookup(conn: sqlite3.Connection, key: str) -> list[dict]:
+    """
+    URLまたは記事IDで、その記事が登場したレポートを新しい順に返す。
+
+    Args:
+        conn: データベース接続
+        key: 記事URL または 記事ID（gen_id）
+
+    Returns:
+        レポートごとの記事辞書（deepDive: 詳細分析ファイルのパス または None）のリスト
+    """
+    column = "canonical_url" if "://" in key else "id"
+    value = canonicalize(key) if column == "canonical_url" else key
+    rows = conn.execute(
+        f"""
+        SELECT a.*, d.path AS deep_dive FROM articles a
+        LEFT JOIN deep_dives d ON d.canonical_url = a.canonical_url
+        WHERE a.{column} = ? ORDER BY a.date DESC
+        """,
+        (value,),
+    ).fetchall()
+    return [
+        {
+            "date": row["date"],
+            **{field: row[name] for field, name in ARTICLE_COLUMNS.items()},
+            "checked": bool(row["checked"]),
+            "deepDive": row["deep_dive"],
+        }
+        for row in rows
+    ]
+
+
+def stats(conn: sqlite3.Connection) -> dict:
+    """記事数・レポート日数・詳細分析数と、ランク・ソース別の件数を返す。"""
+    result = {
+        "db_path": str(DB_PATH),
+        "articles": conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0],
+        "unique_urls": conn.execute("SELECT COUNT(DISTINCT canonical_url) FROM articles").fetchone()[0],
+        "reports": conn.execute("SELECT COUNT(DISTINCT date) FROM articles").fetchone()[0],
+        "deep_dives": conn.execute("SELECT COUNT(*) FROM deep_dives").fetchone()[0],
+    }
+    for column in ("rank", "source"):
+        rows = conn.execute(f"SELECT {column}, COUNT(*) FROM articles GROUP BY {column} ORDER BY {column}")
+        result[f"by_{column}"] = {row[0]: row[1] for row in rows}
+    return result
+
+
+def _option(name: str, default: Path) -> Path:
+    """--name の値をパスとして返す（未指定なら default）。"""
+    if name in sys.argv[1:]:
+        value_index = sys.argv.index(name) + 1
+        if value_index < len(sys.argv):
+            return Path(sys.argv[value_index])
+    return default
+
+
+def main():
+    """メイン処理: サブコマンドに応じて取り込み・検索・集計を行い、JSONで出力する。"""
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    command = args[0] if args else ""
+
+    if command not in ("import", "lookup", "stats") or (command == "lookup" and len(args) < 2):
+        print(
+            json.dumps(
+                {
+                    "error": "サブコマンドを指定してください。",
+                    "usage": "python3 article_store.py import [--headlines DIR] [--deepdives DIR] [--force] | lookup <URL|ID> | stats",
+                },
+                ensure_ascii=False,
+            ),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    conn = connect()
+    try:
+        if command == "import":
+            force = "--force" in sys.argv[1:]
+            result = {
+                "headlines": import_headlines(conn, _option("--headlines", HEADLINES_DIR), force),
+                "deep_dives": import_deep_dives(conn, _option("--deepdives", DEEPDIVES_DIR), force),
+            }
+        elif command == "lookup":
+            result = {"key": args[1], "reports": lookup(conn, args[1])}
+        else:
+            result = stats(conn)
+    finally:
+        conn.close()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
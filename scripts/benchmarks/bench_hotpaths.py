@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+CPU処理のマイクロベンチマーク
+
+RSSパース・重複除去・コメントのフラット化・整形・Markdownパース・
+3ソース統合・同一ニュースのクラスタリング・事前スコアリング・レポート組み立て・
+トレンドのトピック候補の抽出を、synthetic.py の合成データ
+（現在の規模の10倍/100倍/1000倍）で計測する。
+
+計測結果はコミットハッシュ付きで history.json に追記し、直前の記録と比較して
+しきい値以上遅くなった項目を回帰として報告する（項目ごとに、
+その項目を計測した直近の記録と比較する）。所要時間の上限（TARGETS）がある項目は
+上限に収まったかどうかも報告する（--fail-on-regression 指定時は、上限を超えた項目も失敗にする）。
+結果はJSONで標準出力に出力する。
+
+使い方:
+    python3 bench_hotpaths.py [--scales 10,100,1000] [--repeat N] [--only 名前,...]
+                              [--threshold R] [--no-save] [--fail-on-regression]
+
+例:
+    # 全項目を計測して履歴に追記し、前回との比較を出力
+    python3 bench_hotpaths.py
+
+    # 特定の項目だけを10倍の規模で手早く確認（履歴には残さない）
+    python3 bench_hotpaths.py --only flatten_deep,flatten_wide --scales 10 --no-save
+
+    # トレンドのトピック候補の抽出が実測の上限（1日2000件・4000件・8000件）に収まるか確認
+    python3 bench_hotpaths.py --only trend_clusters --scales 25,50,100 --no-save
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import synthetic
+
+# 取得スクリプトのディレクトリ
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import build_report  # noqa: E402
+import convert_md_to_json  # noqa: E402
+import fetch_hatena_rss  # noqa: E402
+import fetch_reddit_comments  # noqa: E402
+import fetch_yahoo_comments  # noqa: E402
+import fetch_yahoo_rss  # noqa: E402
+import generate_report  # noqa: E402
+import near_duplicates  # noqa: E402
+import prescore  # noqa: E402
+import trend_clusters  # noqa: E402
+
+# 計測結果の履歴ファイル（リポジトリには含めない）
+HISTORY_PATH = Path(__file__).resolve().parent / "history.json"
+
+# デフォルトの倍率
+DEFAULT_SCALES = [10, 100, 1000]
+
+# デフォルトの繰り返し回数
+DEFAULT_REPEAT = 3
+
+# 回帰とみなす速度低下の割合（0.2 = 20% 以上遅くなったら回帰）
+DEFAULT_THRESHOLD = 0.2
+
+# 所要時間の上限: 項目名 -> {倍率: 秒}（最小値で判定する）
+TARGETS = {
+    # synthetic.report_articles の25倍 = 2000件、50倍 = 4000件、100倍 = 8000件。
+    # 「1日数千件を1秒を十分下回る時間で」という目標ではなく、実測した処理時間（trend_clusters.py の
+    # 「処理時間の目安」）に揺れの分の余裕を加えた値で、これを超えたら回帰とみなす
+    "trend_clusters": {25: 0.6, 50: 1.5, 100: 3.0},
+}
+
+
+def _bench_hatena_parse(scale: int):
+    xml_text = synthetic.hatena_rss_xml(scale)
+    return lambda: fetch_hatena_rss.parse_rss(xml_text, "it")
+
+
+def _bench_yahoo_parse(scale: int):
+    xml_text = synthetic.yahoo_rss_xml(scale)
+    feeds = synthetic.yahoo_feeds()
+    return lambda: fetch_yahoo_rss.parse_rss(xml_text, "it", feeds)
+
+
+def _bench_yahoo_dedup(scale: int):
+    articles = synthetic.yahoo_articles(scale)
+    return lambda: fetch_yahoo_rss.deduplicate_articles(articles)
+
+
+def _bench_flatten_deep(scale: int):
+    children = synthetic.reddit_deep_tree(scale)
+    return lambda: fetch_reddit_comments.flatten_comments(children)
+
+
+def _bench_flatten_wide(scale: int):
+    children = synthetic.reddit_wide_tree(scale)
+    return lambda: fetch_reddit_comments.flatten_comments(children)
+
+
+def _bench_yahoo_format(scale: int):
+    comments = synthetic.yahoo_raw_comments(scale)
+    return lambda: [fetch_yahoo_comments.format_comment(c) for c in comments]
+
+
+def _bench_headline_parse(scale: int):
+    content = synthetic.headline_md(scale)
+    return lambda: convert_md_to_json.parse_headline_md(content)["articles"]
+
+
+def _bench_merge(scale: int):
+    hatena, yahoo, reddit = synthetic.feed_results(scale)
+    return lambda: generate_report.merge_articles(hatena, yahoo, reddit)
+
+
+def _bench_near_duplicates(scale: int):
+    hatena, yahoo, reddit = synthetic.feed_results(scale)
+    articles = generate_report.merge_articles(hatena, yahoo, reddit)
+    return lambda: near_duplicates.cluster_articles(articles)
+
+
+def _bench_prescore(scale: int):
+    hatena, yahoo, reddit = synthetic.feed_results(scale)
+    articles = generate_report.merge_articles(hatena, yahoo, reddit)
+    matcher = prescore.load_matcher()
+    return lambda: prescore.prescore_articles(articles, matcher)
+
+
+def _bench_build_report(scale: int):
+    hatena, yahoo, reddit = synthetic.feed_results(scale)
+    candidates = generate_report.merge_articles(hatena, yahoo, reddit)
+    ranks = build_report.RANK_ORDER
+    evaluations = [
+        {"url": a["url"], "rank": ranks[i % len(ranks)], "category": "AI/LLM", "summary": a["title"]}
+        for i, a in enumerate(candidates)
+    ]
+
+    def run():
+        by_id, by_index = build_report.build_index(candidates)
+        evaluated = build_report.evaluate_articles(evaluations, by_id, by_index, [])
+        articles, _ = build_report.sort_and_summarize(evaluated)
+        return articles
+
+    return run
+
+
+def _bench_trend_clusters(scale: int):
+    articles = synthetic.report_articles(scale)
+    return lambda: trend_clusters.propose_topics(articles)
+
+
+# 計測項目: 名前 -> 倍率を受け取り、計測対象の関数を返す準備関数
+BENCHMARKS = {
+    "hatena_parse_rss": _bench_hatena_parse,
+    "yahoo_parse_rss": _bench_yahoo_parse,
+    "yahoo_deduplicate": _bench_yahoo_dedup,
+    "flatten_deep": _bench_flatten_deep,
+    "flatten_wide": _bench_flatten_wide,
+    "yahoo_format_comment": _bench_yahoo_format,
+    "parse_headline_md": _bench_headline_parse,
+    "merge_articles": _bench_merge,
+    "near_duplicates": _bench_near_duplicates,
+    "prescore": _bench_prescore,
+    "build_report": _bench_build_report,
+    "trend_clusters": _bench_trend_clusters,
+}
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    関数を repeat 回実行し、所要時間の最小値と中央値を返す。
+
+    Args:
+        func: 引数なしで呼び出す計測対象
+        repeat: 繰り返し回数
+
+    Returns:
+        min_seconds / median_seconds / items を持つ辞書（items は戻り値の件数）
+    """
+    timings = []
+    items = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        items = len(result) if hasattr(result, "__len__") else None
+        del result
+    return {
+        "min_seconds": round(min(timings), 6),
+        "median_seconds": round(statistics.median(timings), 6),
+        "items": items,
+    }
+
+
+def current_commit() -> str:
+    """
+    作業ツリーのコミットハッシュを返す。
+
+    Returns:
+        短縮コミットハッシュ（未コミットの変更があれば末尾に "-dirty"、取得できなければ "unknown"）
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=SCRIPTS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def load_history() -> list[dict]:
+    """履歴ファイルを読み込む（未作成・破損時は空リスト）。"""
+    try:
+        return json.loads(HISTORY_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+
+def compare(results: dict[str, dict], history: list[dict], threshold: float) -> dict:
+    """
+    今回の結果を、項目ごとに直近でその項目を計測した記録と比較する。
+
+    Args:
+        results: 今回の計測結果（"名前@倍率" -> 結果）
+        history: これまでの履歴エントリのリスト（古い順）
+        threshold: 回帰とみなす速度低下の割合
+
+    Returns:
+        ratios（前回比）/ regressions（回帰した項目）を持つ辞書
+    """
+    ratios = {}
+    regressions = []
+    for key, result in results.items():
+        previous = next((e for e in reversed(history) if key in e.get("results", {})), None)
+        if previous is None or not previous["results"][key].get("min_seconds"):
+            continue
+        before = previous["results"][key]["min_seconds"]
+        ratio = round(result["min_seconds"] / before, 3)
+        ratios[key] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "benchmark": key,
+                    "ratio": ratio,
+                    "previous_commit": previous.get("commit"),
+                    "previous_seconds": before,
+                    "current_seconds": result["min_seconds"],
+                }
+            )
+    return {"ratios": ratios, "regressions": regressions}
+
+
+def check_targets(results: dict[str, dict]) -> list[dict]:
+    """
+    所要時間の上限がある項目について、今回の結果が上限に収まったかを返す。
+
+    Args:
+        results: 今回の計測結果（"名前@倍率" -> 結果）
+
+    Returns:
+        benchmark / target_seconds / min_seconds / met を持つ辞書のリスト
+    """
+    checked = []
+    for name, targets in TARGETS.items():
+        for scale, seconds in targets.items():
+            result = results.get(f"{name}@{scale}x")
+            if result is None:
+                continue
+            checked.append(
+                {
+                    "benchmark": f"{name}@{scale}x",
+                    "target_seconds": seconds,
+                    "min_seconds": result["min_seconds"],
+                    "met": result["min_seconds"] <= seconds,
+                }
+            )
+    return checked
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="CPU処理のマイクロベンチマーク")
+    parser.add_argument("--scales", help="倍率（カンマ区切り。デフォルト: 10,100,1000）")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="項目ごとの繰り返し回数")
+    parser.add_argument("--only", help="計測する項目名（カンマ区切り）")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回帰とみなす速度低下の割合")
+    parser.add_argument("--no-save", action="store_true", help="履歴ファイルに追記しない")
+    parser.add_argument("--fail-on-regression", action="store_true", help="回帰か上限を超えた項目があれば終了コード1で終了する")
+    return parser.parse_args()
+
+
+def main():
+    """メイン処理: 各項目を計測し、履歴と比較した結果をJSONで出力する。"""
+    args = parse_args()
+    scales = [int(s) for s in args.scales.split(",")] if args.scales else DEFAULT_SCALES
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(
+            json.dumps({"error": f"不明な計測項目: {', '.join(unknown)}", "benchmarks": list(BENCHMARKS)}, ensure_ascii=False),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    results = {}
+    for name in names:
+        for scale in scales:
+            func = BENCHMARKS[name](scale)
+            results[f"{name}@{scale}x"] = measure(func, args.repeat)
+            del func
+
+    history = load_history()
+    entry = {
+        "commit": current_commit(),
+        "recorded_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    comparison = compare(results, history, args.threshold)
+    comparison["targets"] = check_targets(results)
+
+    if not args.no_save:
+        history.append(entry)
+        HISTORY_PATH.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(json.dumps({**entry, "comparison": comparison}, ensure_ascii=False, indent=2))
+    missed = [target for target in comparison["targets"] if not target["met"]]
+    if args.fail_on_regression and (comparison["regressions"] or missed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+取得からレポート生成までのエンドツーエンド・ベンチマーク
+
+mock_upstream.py のモックサーバーをプロセス内で起動し、取得スクリプトを
+KNOWLEDGE_HUB_UPSTREAM_OVERRIDE でそのサーバーに向けて実際に実行する。
+ステージごとの所要時間（ウォールクロック）・リクエスト数・ピークRSSを計測し、
+JSONで標準出力に出力する。ネットワークには一切アクセスしない。
+
+計測するステージ:
+    hatena_rss / yahoo_rss / reddit_hot   各ソースの一覧取得
+    generate_report                       3ソースの統合と候補一覧の出力
+    collect_candidates                    一覧取得から統合までを1プロセスで実行
+    hatena_comments / yahoo_comments / reddit_comments   コメント取得
+
+使い方:
+    python3 bench_pipeline.py [--runs N] [--latency-ms N] [--jitter-ms N] [--error-rate R]
+                              [--items N] [--comments N] [--text-bytes N] [--cache]
+
+例:
+    # 応答遅延 30ms で3回計測し、ステージごとの中央値を出力
+    python3 bench_pipeline.py --runs 3 --latency-ms 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mock_upstream import MockConfig, MockUpstream
+
+# 取得スクリプトのディレクトリ
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+# コメント取得ステージで対象にするはてな記事数
+HATENA_COMMENT_ARTICLES = 5
+
+
+def run_stage(upstream: MockUpstream, args: list[str], env: dict, stdout_path: Path) -> dict:
+    """
+    スクリプトを子プロセスとして実行し、所要時間・リクエスト数・ピークRSSを計測する。
+
+    Args:
+        upstream: 起動済みのモックサーバー
+        args: スクリプト名と引数
+        env: 子プロセスの環境変数
+        stdout_path: 標準出力の保存先
+
+    Returns:
+        wall_seconds / requests / peak_rss_kb / exit_code を持つ辞書
+    """
+    requests_before = upstream.total_requests()
+    started = time.perf_counter()
+    with open(stdout_path, "wb") as stdout, open(os.devnull, "wb") as devnull:
+        proc = subprocess.Popen(
+            [sys.executable, str(SCRIPTS_DIR / args[0]), *args[1:]],
+            cwd=SCRIPTS_DIR,
+            env=env,
+            stdout=stdout,
+            stderr=devnull,
+        )
+        # 子プロセス単位のリソース使用量を得るため wait4 で回収する
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "wall_seconds": round(time.perf_counter() - started, 4),
+        "requests": upstream.total_requests() - requests_before,
+        # Linux の ru_maxrss はキロバイト単位
+        "peak_rss_kb": usage.ru_maxrss,
+        "exit_code": proc.returncode,
+    }
+
+
+def _load_json(path: Path) -> dict:
+    """ステージの出力JSONを読み込む（失敗時は空の辞書）。"""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def run_pipeline(upstream: MockUpstream, work_dir: Path, use_cache: bool) -> dict[str, dict]:
+    """
+    全ステージを順に1回実行する。
+
+    Args:
+        upstream: 起動済みのモックサーバー
+        work_dir: 出力ファイル・状態ファイルの作業ディレクトリ
+        use_cache: True なら作業ディレクトリ内のHTTPキャッシュを使う
+
+    Returns:
+        {ステージ名: 計測結果} の辞書
+    """
+    env = {
+        **os.environ,
+        "KNOWLEDGE_HUB_UPSTREAM_OVERRIDE": upstream.base_url,
+        "KNOWLEDGE_HUB_STATE_DIR": str(work_dir / "state"),
+        "KNOWLEDGE_HUB_HTTP_CACHE_DIR": str(work_dir / "http"),
+        "KNOWLEDGE_HUB_HTTP_CACHE": "1" if use_cache else "0",
+    }
+    hatena_path = work_dir / "hatena.json"
+    yahoo_path = work_dir / "yahoo.json"
+    reddit_path = work_dir / "reddit.json"
+
+    results = {}
+    results["hatena_rss"] = run_stage(upstream, ["fetch_hatena_rss.py", "--full"], env, hatena_path)
+    results["yahoo_rss"] = run_stage(upstream, ["fetch_yahoo_rss.py", "--full"], env, yahoo_path)
+    results["reddit_hot"] = run_stage(upstream, ["fetch_reddit_hot.py", "--full"], env, reddit_path)
+    results["generate_report"] = run_stage(
+        upstream,
+        ["generate_report.py", str(hatena_path), str(yahoo_path), str(reddit_path)],
+        env,
+        work_dir / "report.txt",
+    )
+    results["collect_candidates"] = run_stage(
+        upstream, ["collect_candidates.py", "--full", "--json"], env, work_dir / "candidates.json"
+    )
+
+    # コメント取得は一覧取得の結果から対象を選ぶ
+    hatena_urls = [a["url"] for a in _load_json(hatena_path).get("articles", [])][:HATENA_COMMENT_ARTICLES]
+    yahoo_urls = [a["url"] for a in _load_json(yahoo_path).get("articles", [])][:1]
+    reddit_urls = [p["permalink"] for p in _load_json(reddit_path).get("articles", []) if p.get("permalink")][:1]
+    if hatena_urls:
+        results["hatena_comments"] = run_stage(
+            upstream, ["fetch_hatena_comments.py", *hatena_urls], env, work_dir / "hatena_comments.json"
+        )
+    if yahoo_urls:
+        results["yahoo_comments"] = run_stage(
+            upstream, ["fetch_yahoo_comments.py", yahoo_urls[0], "--parallel"], env, work_dir / "yahoo_comments.json"
+        )
+    if reddit_urls:
+        results["reddit_comments"] = run_stage(
+            upstream,
+            ["fetch_reddit_comments.py", reddit_urls[0], "--expand-more"],
+            env,
+            work_dir / "reddit_comments.json",
+        )
+    return results
+
+
+def summarize(runs: list[dict[str, dict]]) -> dict:
+    """
+    複数回の計測結果をステージごとにまとめる。
+
+    Args:
+        runs: run_pipeline の結果のリスト
+
+    Returns:
+        ステージごとの中央値・最大値と、取得からレポート生成までの合計を持つ辞書
+    """
+    stages = {}
+    for name in runs[0]:
+        samples = [run[name] for run in runs if name in run]
+        stages[name] = {
+            "wall_seconds": round(statistics.median(s["wall_seconds"] for s in samples), 4),
+            "requests": max(s["requests"] for s in samples),
+            "peak_rss_kb": max(s["peak_rss_kb"] for s in samples),
+            "failed_runs": sum(1 for s in samples if s["exit_code"] != 0),
+        }
+
+    # 取得からレポート生成まで: 3ソースの一覧取得 + 統合
+    fetch_to_report = ["hatena_rss", "yahoo_rss", "reddit_hot", "generate_report"]
+    return {
+        "stages": stages,
+        "fetch_to_report": {
+            "wall_seconds": round(sum(stages[name]["wall_seconds"] for name in fetch_to_report), 4),
+            "requests": sum(stages[name]["requests"] for name in fetch_to_report),
+            "peak_rss_kb": max(stages[name]["peak_rss_kb"] for name in fetch_to_report),
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="取得からレポート生成までのベンチマーク")
+    parser.add_argument("--runs", type=int, default=1, help="計測回数（ステージごとに中央値を出力）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="モックサーバーの応答遅延（ミリ秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="応答遅延に加えるランダム幅（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="モックサーバーが 503 を返す確率")
+    parser.add_argument("--items", type=int, default=30, help="RSS・ホット投稿1件あたりの記事数")
+    parser.add_argument("--comments", type=int, default=200, help="記事・投稿1件あたりのコメント数")
+    parser.add_argument("--text-bytes", type=int, default=200, help="説明文・コメント本文のおおよそのバイト数")
+    parser.add_argument("--cache", action="store_true", help="HTTPキャッシュを有効にする（2回目以降は 304 応答）")
+    return parser.parse_args()
+
+
+def main():
+    """メイン処理: モックサーバーを起動してパイプラインを計測し、結果をJSONで出力する。"""
+    args = parse_args()
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        items=args.items,
+        comments=args.comments,
+        text_bytes=args.text_bytes,
+    )
+
+    with MockUpstream(config) as upstream, tempfile.TemporaryDirectory() as tmp:
+        runs = []
+        for i in range(max(1, args.runs)):
+            work_dir = Path(tmp)
+            # キャッシュを使わない場合は実行ごとに状態をまっさらにする
+            if not args.cache:
+                work_dir = Path(tmp) / f"run{i}"
+            work_dir.mkdir(parents=True, exist_ok=True)
+            runs.append(run_pipeline(upstream, work_dir, args.cache))
+
+    result = {
+        "config": {
+            "runs": len(runs),
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "items": args.items,
+            "comments": args.comments,
+            "text_bytes": args.text_bytes,
+            "cache": args.cache,
+        },
+        **summarize(runs),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
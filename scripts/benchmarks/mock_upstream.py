@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+取得スクリプト用のローカルモックサーバー
+
+はてなブックマーク・Yahoo ニュース・Reddit の代わりに、オフラインで
+それらしいレスポンスを返すHTTPサーバー。取得スクリプトは環境変数
+KNOWLEDGE_HUB_UPSTREAM_OVERRIDE にこのサーバーのURLを設定すると、
+URLはそのままで接続先だけがこのサーバーに差し替わる（http_client.py 参照）。
+
+応答はリクエストパスで振り分ける:
+    /hotentry/{category}.rss                       はてなブックマーク RSS 1.0
+    /entry/jsonlite/?url=...                       はてなブックマーク コメントAPI
+    /rss/...xml                                    Yahoo ニュース RSS 2.0
+    /api/public/comment-list/.../articles/{id}     Yahoo ニュース コメントリストAPI
+    /r/{subreddit}/hot.json                        Reddit ホット投稿
+    /r/{subreddit}/comments/{post_id}.json         Reddit 投稿とコメントツリー
+    /api/morechildren.json                         Reddit morechildren API
+    /__stats                                       受信リクエスト数（パス種別ごと）
+
+応答内容はパスとシード値から決まるため、同じ設定なら毎回同じ本文を返す。
+ETag を付けて返し、If-None-Match が一致すれば 304 を返す。
+
+使い方:
+    python3 mock_upstream.py [--port N] [--latency-ms N] [--jitter-ms N] [--error-rate R]
+                             [--items N] [--comments N] [--text-bytes N] [--seed N]
+
+例:
+    # 応答遅延 50ms、5% の確率で 503 を返すサーバーを起動
+    python3 mock_upstream.py --port 8765 --latency-ms 50 --error-rate 0.05
+
+    # 別の端末から取得スクリプトを向ける
+    KNOWLEDGE_HUB_UPSTREAM_OVERRIDE=http://127.0.0.1:8765 python3 ../fetch_hatena_rss.py --full
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+# Yahoo ニュースのメディア名（タイトル末尾の括弧に入る）
+YAHOO_MEDIA = ["ITmedia NEWS", "窓の杜", "ITmedia エンタープライズ", "Impress Watch", "ZDNET Japan"]
+
+# 本文生成用の語彙
+WORDS = [
+    "生成AI", "LLM", "エージェント", "クラウド", "セキュリティ", "脆弱性", "Rust", "TypeScript",
+    "Kubernetes", "データベース", "検索", "ブラウザ", "開発者", "オープンソース", "API", "性能改善",
+    "model", "inference", "release", "benchmark", "framework", "runtime", "compiler", "agent",
+]
+
+
+class MockConfig:
+    """モックサーバーの応答設定。"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        items: int = 30,
+        comments: int = 200,
+        text_bytes: int = 200,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.items = items
+        self.comments = comments
+        self.text_bytes = text_bytes
+        self.seed = seed
+
+
+def _rng(config: MockConfig, *parts: str) -> random.Random:
+    """シード値とパスから決まる乱数生成器を返す。"""
+    key = "|".join([str(config.seed), *parts])
+    return random.Random(hashlib.sha256(key.encode()).digest())
+
+
+def _hex_id(*parts: str, length: int = 40) -> str:
+    """入力から決まる16進IDを返す。"""
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:length]
+
+
+def _base36_id(*parts: str, length: int = 7) -> str:
+    """Reddit 風の英小文字・数字のIDを返す。"""
+    value = int(hashlib.sha1("|".join(parts).encode()).hexdigest(), 16)
+    chars = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    for _ in range(length):
+        value, index = divmod(value, 36)
+        result += chars[index]
+    return result
+
+
+def _text(rng: random.Random, size: int) -> str:
+    """おおよそ size バイトの文章を生成する。"""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word.encode()) + 1
+    return " ".join(words)
+
+
+def hatena_rss(config: MockConfig, category: str) -> bytes:
+    """
+    はてなブックマークのホットエントリー RSS 1.0 を生成する。
+
+    Args:
+        config: 応答設定
+        category: カテゴリ名
+
+    Returns:
+        RSSのXML本文
+    """
+    rng = _rng(config, "hatena_rss", category)
+    items = []
+    lis = []
+    for i in range(config.items):
+        url = f"https://example.com/{category}/entry/{i}"
+        tags = "".join(f"<dc:subject>{escape(rng.choice(WORDS))}</dc:subject>" for _ in range(rng.randint(0, 3)))
+        lis.append(f'<rdf:li rdf:resource="{url}"/>')
+        items.append(
+            f'<item rdf:about="{url}">'
+            f"<title>{escape(_text(rng, 40))} {i}</title>"
+            f"<link>{url}</link>"
+            f"<description>{escape(_text(rng, config.text_bytes))}</description>"
+            f"<dc:date>2026-02-{10 + i % 18:02d}T{i % 24:02d}:00:00+09:00</dc:date>"
+            f"{tags}"
+            f"<hatena:bookmarkcount>{rng.randint(1, 1500)}</hatena:bookmarkcount>"
+            "</item>"
+        )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rdf:RDF xmlns="http://purl.org/rss/1.0/"'
+        ' xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"'
+        ' xmlns:content="http://purl.org/rss/1.0/modules/content/"'
+        ' xmlns:taxo="http://purl.org/rss/1.0/modules/taxonomy/"'
+        ' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+        ' xmlns:hatena="http://www.hatena.ne.jp/info/xmlns#">'
+        f'<channel rdf:about="https://b.hatena.ne.jp/hotentry/{category}">'
+        f"<title>はてなブックマーク - 人気エントリー - {category}</title>"
+        f"<items><rdf:Seq>{''.join(lis)}</rdf:Seq></items>"
+        "</channel>"
+        f"{''.join(items)}"
+        "</rdf:RDF>"
+    )
+    return xml.encode("utf-8")
+
+
+def hatena_entry(config: MockConfig, article_url: str) -> bytes:
+    """
+    はてなブックマークのコメントAPI（jsonlite）の応答を生成する。
+
+    Args:
+        config: 応答設定
+        article_url: 対象の記事URL
+
+    Returns:
+        JSON本文
+    """
+    rng = _rng(config, "hatena_entry", article_url)
+    bookmarks = []
+    for i in range(config.comments):
+        bookmarks.append(
+            {
+                "user": f"user{rng.randint(1, 99999)}",
+                # 実際のAPIと同様、コメントなしのブックマークも混ぜる
+                "comment": _text(rng, config.text_bytes // 2) if rng.random() < 0.6 else "",
+                "timestamp": f"2026/02/10 {i % 24:02d}:{i % 60:02d}",
+                "tags": [rng.choice(WORDS)] if rng.random() < 0.3 else [],
+            }
+        )
+    data = {
+        "title": _text(rng, 40),
+        "count": str(config.comments),
+        "url": article_url,
+        "eid": _hex_id(article_url, length=10),
+        "bookmarks": bookmarks,
+    }
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def yahoo_rss(config: MockConfig, path: str) -> bytes:
+    """
+    Yahoo ニュースの RSS 2.0 を生成する。
+
+    Args:
+        config: 応答設定
+        path: フィードのパス
+
+    Returns:
+        RSSのXML本文
+    """
+    rng = _rng(config, "yahoo_rss", path)
+    items = []
+    for i in range(config.items):
+        # 複数フィードで同じ記事が配信される状況を再現するため、IDの元は記事番号のみ
+        article_id = _hex_id("yahoo_article", str(rng.randint(0, config.items * 3)))
+        media = rng.choice(YAHOO_MEDIA)
+        items.append(
+            "<item>"
+            f"<title>{escape(_text(rng, 40))} ({escape(media)})</title>"
+            f"<link>https://news.yahoo.co.jp/articles/{article_id}?source=rss</link>"
+            f"<description>{escape(_text(rng, config.text_bytes))}</description>"
+            f"<pubDate>{formatdate(1770000000 + i * 600, localtime=False)}</pubDate>"
+            "</item>"
+        )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel>'
+        f"<title>Yahoo!ニュース {escape(path)}</title>"
+        "<link>https://news.yahoo.co.jp/</link>"
+        f"{''.join(items)}"
+        "</channel></rss>"
+    )
+    return xml.encode("utf-8")
+
+
+def yahoo_comment_list(config: MockConfig, article_id: str, start: int, results: int) -> bytes:
+    """
+    Yahoo ニュースのコメントリストAPIの1ページ分を生成する。
+
+    Args:
+        config: 応答設定
+        article_id: 記事ID
+        start: 開始位置（1始まり）
+        results: 1ページあたりの件数
+
+    Returns:
+        JSON本文
+    """
+    total = config.comments
+    comments = []
+    for index in range(start, min(total, start + results - 1) + 1):
+        rng = _rng(config, "yahoo_comment", article_id, str(index))
+        comment_id = _hex_id(article_id, str(index), length=24)
+        comments.append(
+            {
+                "name": f"user{rng.randint(1, 99999)}",
+                "text": _text(rng, config.text_bytes),
+                "postDate": formatdate(1770000000 + index * 60, localtime=False),
+                "commentId": comment_id,
+                "empathyCount": rng.randint(0, 3000),
+                "insightCount": rng.randint(0, 500),
+                "negativeCount": rng.randint(0, 800),
+                "reply": {"totalResults": rng.randint(0, 20)},
+                "permalink": f"https://news.yahoo.co.jp/profile/comments/{comment_id}",
+            }
+        )
+    data = {
+        "totalResults": total,
+        "comments": comments,
+        "article": {"id": article_id, "title": _text(_rng(config, "yahoo_title", article_id), 40)},
+    }
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _reddit_comment(config: MockConfig, post_id: str, comment_id: str, parent: str, depth: int) -> dict:
+    """Reddit のコメント要素（kind='t1'）を生成する。"""
+    rng = _rng(config, "reddit_comment", post_id, comment_id)
+    return {
+        "kind": "t1",
+        "data": {
+            "id": comment_id,
+            "name": f"t1_{comment_id}",
+            "parent_id": parent,
+            "author": f"redditor{rng.randint(1, 99999)}",
+            "body": _text(rng, config.text_bytes),
+            "score": rng.randint(-20, 2000),
+            "depth": depth,
+            "permalink": f"/r/mock/comments/{post_id}/_/{comment_id}/",
+            "created_utc": 1770000000 + rng.randint(0, 86400),
+            "replies": "",
+        },
+    }
+
+
+def reddit_hot(config: MockConfig, subreddit: str) -> bytes:
+    """
+    Reddit のホット投稿一覧（Listing）を生成する。
+
+    Args:
+        config: 応答設定
+        subreddit: subreddit名
+
+    Returns:
+        JSON本文
+    """
+    rng = _rng(config, "reddit_hot", subreddit)
+    children = []
+    for i in range(config.items):
+        post_id = _base36_id(subreddit, str(i))
+        is_self = rng.random() < 0.4
+        permalink = f"/r/{subreddit}/comments/{post_id}/mock_post_{i}/"
+        children.append(
+            {
+                "kind": "t3",
+                "data": {
+                    "id": post_id,
+                    "title": _text(rng, 60),
+                    "url": f"https://www.reddit.com{permalink}" if is_self else f"https://example.org/{subreddit}/{i}",
+                    "permalink": permalink,
+                    "score": rng.randint(0, 5000),
+                    "num_comments": rng.randint(0, config.comments),
+                    "author": f"redditor{rng.randint(1, 99999)}",
+                    "is_self": is_self,
+                    "stickied": i == 0,
+                    "created_utc": 1770000000 + i * 600,
+                    "subreddit": subreddit,
+                },
+            }
+        )
+    data = {"kind": "Listing", "data": {"after": None, "children": children}}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def reddit_comments(config: MockConfig, subreddit: str, post_id: str) -> bytes:
+    """
+    Reddit の投稿とコメントツリーを生成する。
+
+    コメント数の半分はツリーとして返し、残りは最上位の「more」スタブに
+    IDだけを載せる（morechildren API で展開できる）。
+
+    Args:
+        config: 応答設定
+        subreddit: subreddit名
+        post_id: 投稿ID
+
+    Returns:
+        JSON本文（[投稿Listing, コメントListing]）
+    """
+    rng = _rng(config, "reddit_post", post_id)
+    link = f"t3_{post_id}"
+    inline = config.comments // 2
+
+    # 幅と深さが混在するツリーを作る: 各コメントは直前までのコメントのどれかにぶら下がる
+    top_level: list = []
+    nodes: list[tuple[dict, int]] = []
+    for i in range(inline):
+        comment_id = _base36_id(post_id, "c", str(i))
+        if not nodes or rng.random() < 0.3:
+            comment = _reddit_comment(config, post_id, comment_id, link, 0)
+            top_level.append(comment)
+        else:
+            parent, depth = nodes[rng.randrange(len(nodes))]
+            comment = _reddit_comment(config, post_id, comment_id, parent["data"]["name"], depth + 1)
+            replies = parent["data"]["replies"]
+            if not replies:
+                replies = parent["data"]["replies"] = {"kind": "Listing", "data": {"children": []}}
+            replies["data"]["children"].append(comment)
+        nodes.append((comment, comment["data"]["depth"]))
+
+    more_ids = [_base36_id(post_id, "m", str(i)) for i in range(config.comments - inline)]
+    if more_ids:
+        top_level.append(
+            {
+                "kind": "more",
+                "data": {"count": len(more_ids), "name": f"t1_{more_ids[0]}", "parent_id": link, "children": more_ids},
+            }
+        )
+
+    post = {
+        "kind": "t3",
+        "data": {
+            "id": post_id,
+            "title": _text(rng, 60),
+            "author": f"redditor{rng.randint(1, 99999)}",
+            "subreddit": subreddit,
+            "score": rng.randint(0, 5000),
+            "upvote_ratio": round(rng.uniform(0.5, 1.0), 2),
+            "num_comments": config.comments,
+            "url": f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/mock/",
+            "is_self": True,
+            "selftext": _text(rng, config.text_bytes),
+            "permalink": f"/r/{subreddit}/comments/{post_id}/mock/",
+            "created_utc": 1770000000,
+        },
+    }
+    data = [
+        {"kind": "Listing", "data": {"children": [post]}},
+        {"kind": "Listing", "data": {"children": top_level}},
+    ]
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def reddit_morechildren(config: MockConfig, link_id: str, children: list[str]) -> bytes:
+    """
+    Reddit の morechildren API の応答を生成する。
+
+    Args:
+        config: 応答設定
+        link_id: 投稿のフルネーム（t3_xxx）
+        children: 展開するコメントIDのリスト
+
+    Returns:
+        JSON本文
+    """
+    post_id = link_id.removeprefix("t3_")
+    things = [_reddit_comment(config, post_id, comment_id, link_id, 0) for comment_id in children]
+    data = {"json": {"errors": [], "data": {"things": things}}}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class MockUpstream:
+    """モックサーバーをバックグラウンドスレッドで起動・停止する。"""
+
+    def __init__(self, config: MockConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.counts: dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        """KNOWLEDGE_HUB_UPSTREAM_OVERRIDE に設定するURL。"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, kind: str):
+        """受信リクエスト数を種別ごとに加算する。"""
+        with self._counts_lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def total_requests(self) -> int:
+        """これまでの受信リクエスト数の合計を返す。"""
+        with self._counts_lock:
+            return sum(self.counts.values())
+
+    def start(self) -> "MockUpstream":
+        """バックグラウンドで待ち受けを開始する。"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """待ち受けを停止する。"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def route(config: MockConfig, path: str, query: dict[str, list[str]]) -> tuple[str, bytes, str] | None:
+    """
+    リクエストパスから応答の種別・本文・Content-Type を決める。
+
+    Args:
+        config: 応答設定
+        path: リクエストパス
+        query: クエリパラメータ
+
+    Returns:
+        (種別, 本文, Content-Type) のタプル。該当しないパスは None
+    """
+    parts = [p for p in path.split("/") if p]
+
+    if len(parts) == 2 and parts[0] == "hotentry" and parts[1].endswith(".rss"):
+        return "hatena_rss", hatena_rss(config, parts[1][: -len(".rss")]), "application/rss+xml; charset=utf-8"
+
+    if parts[:2] == ["entry", "jsonlite"]:
+        article_url = query.get("url", [""])[0]
+        return "hatena_entry", hatena_entry(config, article_url), "application/json; charset=utf-8"
+
+    if parts and parts[0] == "rss" and path.endswith(".xml"):
+        return "yahoo_rss", yahoo_rss(config, path), "application/rss+xml; charset=utf-8"
+
+    if parts[:3] == ["api", "public", "comment-list"] and "articles" in parts:
+        article_id = parts[parts.index("articles") + 1] if parts.index("articles") + 1 < len(parts) else ""
+        start = int(query.get("start", ["1"])[0])
+        results = int(query.get("results", ["50"])[0])
+        body = yahoo_comment_list(config, article_id, start, results)
+        return "yahoo_comments", body, "application/json; charset=utf-8"
+
+    if parts == ["api", "morechildren.json"]:
+        link_id = query.get("link_id", [""])[0]
+        children = [c for c in query.get("children", [""])[0].split(",") if c]
+        return "reddit_morechildren", reddit_morechildren(config, link_id, children), "application/json; charset=utf-8"
+
+    if len(parts) == 3 and parts[0] == "r" and parts[2] == "hot.json":
+        return "reddit_hot", reddit_hot(config, parts[1]), "application/json; charset=utf-8"
+
+    if len(parts) >= 4 and parts[0] == "r" and parts[2] == "comments":
+        post_id = parts[3].removesuffix(".json")
+        return "reddit_comments", reddit_comments(config, parts[1], post_id), "application/json; charset=utf-8"
+
+    return None
+
+
+def _make_handler(upstream: MockUpstream):
+    """MockUpstream に紐づいたリクエストハンドラのクラスを生成する。"""
+    config = upstream.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urllib.parse.urlsplit(self.path)
+            if parts.path == "/__stats":
+                with upstream._counts_lock:
+                    body = json.dumps(upstream.counts).encode("utf-8")
+                self._send(200, body, {"Content-Type": "application/json"})
+                return
+
+            routed = route(config, parts.path, urllib.parse.parse_qs(parts.query))
+            kind = routed[0] if routed else "not_found"
+            upstream.count(kind)
+
+            # 応答遅延
+            delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000)
+
+            if routed is None:
+                self._send(404, b"not found", {"Content-Type": "text/plain"})
+                return
+            if config.error_rate > 0 and random.random() < config.error_rate:
+                self._send(503, b"service unavailable", {"Content-Type": "text/plain"})
+                return
+
+            _, body, content_type = routed
+            headers = {"Content-Type": content_type, "ETag": f'"{hashlib.sha1(body).hexdigest()}"'}
+            if kind.startswith("reddit"):
+                # Reddit と同様にレート制限の残り枠を通知する
+                headers["X-Ratelimit-Remaining"] = "99.0"
+                headers["X-Ratelimit-Reset"] = "600"
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                self._send(304, b"", {"ETag": headers["ETag"]})
+                return
+            self._send(200, body, headers)
+
+    return Handler
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="取得スクリプト用のローカルモックサーバー")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="待ち受けポート")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="応答ごとの固定遅延（ミリ秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="応答遅延に加えるランダム幅（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 を返す確率（0〜1）")
+    parser.add_argument("--items", type=int, default=30, help="RSS・ホット投稿1件あたりの記事数")
+    parser.add_argument("--comments", type=int, default=200, help="記事・投稿1件あたりのコメント数")
+    parser.add_argument("--text-bytes", type=int, default=200, help="説明文・コメント本文のおおよそのバイト数")
+    parser.add_argument("--seed", type=int, default=0, help="応答内容のシード値")
+    return parser.parse_args()
+
+
+def main():
+    """メイン処理: モックサーバーを起動し、終了されるまで待ち受ける。"""
+    args = parse_args()
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        items=args.items,
+        comments=args.comments,
+        text_bytes=args.text_bytes,
+        seed=args.seed,
+    )
+    upstream = MockUpstream(config, host=args.host, port=args.port)
+    print(
+        json.dumps({"listening": upstream.base_url, "env": f"KNOWLEDGE_HUB_UPSTREAM_OVERRIDE={upstream.base_url}"}),
+        file=sys.stderr,
+    )
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
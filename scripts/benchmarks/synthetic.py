@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク用の合成入力データ
+
+CPUで処理する関数（RSSパース・重複除去・コメントのフラット化・整形・
+Markdownパース・3ソース統合・トピック抽出）に渡す入力を、現在の実データの規模を
+基準に任意の倍率で生成する。同じ引数なら毎回同じデータを返す。
+
+RSS は mock_upstream.py と同じ生成処理を使うため、モックサーバー経由の
+計測と同じ形のデータになる。
+"""
+
+import random
+
+from mock_upstream import MockConfig, hatena_rss, yahoo_rss
+
+# 現在の実データ1回分の規模（倍率1のときの件数）
+BASE_HATENA_ITEMS = 30
+BASE_YAHOO_ITEMS = 50
+BASE_REDDIT_POSTS = 60
+BASE_REDDIT_COMMENTS = 200
+BASE_YAHOO_COMMENTS = 100
+BASE_HEADLINE_ARTICLES = 45
+BASE_REPORT_ARTICLES = 80
+
+
+def hatena_rss_xml(scale: int) -> str:
+    """
+    はてなブックマークの RSS 1.0 を生成する。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        RSSのXML文字列
+    """
+    return hatena_rss(MockConfig(items=BASE_HATENA_ITEMS * scale), "it").decode("utf-8")
+
+
+def yahoo_rss_xml(scale: int) -> str:
+    """
+    Yahoo ニュースの RSS 2.0 を生成する。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        RSSのXML文字列
+    """
+    return yahoo_rss(MockConfig(items=BASE_YAHOO_ITEMS * scale), "/rss/categories/it.xml").decode("utf-8")
+
+
+def yahoo_feeds() -> dict[str, dict]:
+    """yahoo_rss_xml の記事に対応するフィード定義を返す。"""
+    return {"it": {"url": "https://news.yahoo.co.jp/rss/categories/it.xml", "label": "IT・科学", "group": "categories"}}
+
+
+def yahoo_articles(scale: int) -> list[dict]:
+    """
+    重複を含む Yahoo ニュースの記事リストを生成する（deduplicate_articles の入力）。
+
+    複数フィードで同じ記事が配信される状況を再現し、約3割を重複させる。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        記事情報の辞書リスト
+    """
+    rng = random.Random(scale)
+    count = BASE_YAHOO_ITEMS * scale
+    articles = []
+    for i in range(count):
+        article_no = rng.randrange(int(count * 0.7) or 1)
+        articles.append(
+            {
+                "title": f"記事タイトル {article_no} (ITmedia NEWS)",
+                "url": f"https://news.yahoo.co.jp/articles/{article_no:040x}?source=rss",
+                "date": "Tue, 10 Feb 2026 09:00:00 GMT",
+                "source": "ITmedia NEWS",
+                "feed": "it",
+                "feed_label": "IT・科学",
+                "description": "概要" * 20,
+            }
+        )
+    return articles
+
+
+def _reddit_comment(comment_id: int, depth: int) -> dict:
+    """Reddit のコメント要素（kind='t1'）を生成する。"""
+    return {
+        "kind": "t1",
+        "data": {
+            "id": f"c{comment_id}",
+            "name": f"t1_c{comment_id}",
+            "author": f"redditor{comment_id % 997}",
+            "body": "comment body " * 8,
+            "score": comment_id % 500,
+            "depth": depth,
+            "permalink": f"/r/mock/comments/p/_/c{comment_id}/",
+            "created_utc": 1770000000 + comment_id,
+            "replies": "",
+        },
+    }
+
+
+def _attach(parent: dict, child: dict):
+    """parent の返信リストに child を追加する。"""
+    replies = parent["data"]["replies"]
+    if not replies:
+        replies = parent["data"]["replies"] = {"kind": "Listing", "data": {"children": []}}
+    replies["data"]["children"].append(child)
+
+
+def reddit_deep_tree(scale: int) -> list:
+    """
+    1本の返信が延々と続く深いコメントツリーを生成する。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        最上位のコメント子要素リスト
+    """
+    count = BASE_REDDIT_COMMENTS * scale
+    root = _reddit_comment(0, 0)
+    parent = root
+    for i in range(1, count):
+        child = _reddit_comment(i, i)
+        _attach(parent, child)
+        parent = child
+    return [root]
+
+
+def reddit_wide_tree(scale: int) -> list:
+    """
+    最上位コメントが多数並び、それぞれに数件の返信が付く幅の広いツリーを生成する。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        最上位のコメント子要素リスト
+    """
+    count = BASE_REDDIT_COMMENTS * scale
+    children = []
+    comment_id = 0
+    while comment_id < count:
+        top = _reddit_comment(comment_id, 0)
+        comment_id += 1
+        for _ in range(3):
+            if comment_id >= count:
+                break
+            _attach(top, _reddit_comment(comment_id, 1))
+            comment_id += 1
+        children.append(top)
+    return children
+
+
+def yahoo_raw_comments(scale: int) -> list[dict]:
+    """
+    Yahoo ニュースのコメントリストAPIのコメントを生成する（format_comment の入力）。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        生のコメントデータのリスト
+    """
+    comments = []
+    for i in range(BASE_YAHOO_COMMENTS * scale):
+        comments.append(
+            {
+                "name": f"user{i % 997}",
+                "text": "コメント本文" * 10,
+                "postDate": "Tue, 10 Feb 2026 09:00:00 GMT",
+                "commentId": f"{i:024x}",
+                "empathyCount": i % 3000,
+                "insightCount": i % 500,
+                "negativeCount": i % 800,
+                "reply": {"totalResults": i % 20} if i % 3 else None,
+                "permalink": f"https://news.yahoo.co.jp/profile/comments/{i:024x}",
+            }
+        )
+    return comments
+
+
+def headline_md(scale: int) -> str:
+    """
+    Headlines Markdownレポートを生成する（parse_headline_md の入力）。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        Markdown文字列
+    """
+    count = BASE_HEADLINE_ARTICLES * scale
+    ranks = ["S", "A", "B", "C"]
+    per_rank = -(-count // len(ranks))
+    lines = [
+        "# 2026年02月10日 トレンドヘッドライン",
+        "",
+        "> 生成日時: 2026-02-10 07:30",
+        f"> 記事総数: {count}件（S: {per_rank}件 / A: {per_rank}件 / B: {per_rank}件 / C: {per_rank}件）",
+        "",
+    ]
+    urls = []
+    index = 0
+    for rank in ranks:
+        lines.append(f"## {rank} ランク")
+        lines.append("")
+        for _ in range(per_rank):
+            if index >= count:
+                break
+            checked = "x" if index % 5 == 0 else " "
+            kind = index % 3
+            if kind == 0:
+                url = f"https://example.com/hatena/{index}"
+                lines.append(f"- [{checked}] **[はてブ記事タイトル {index}]({url})**")
+                lines.append(f"  - AI/LLM | はてブ | {index % 900} users | ⭐ {rank}")
+            elif kind == 1:
+                url = f"https://news.yahoo.co.jp/articles/{index:040x}?source=rss"
+                lines.append(f"- [{checked}] **[Yahoo記事タイトル {index}]({url})**")
+                lines.append(f"  - セキュリティ | Yahoo | ITmedia NEWS | ⭐ {rank}")
+            else:
+                url = f"https://old.reddit.com/r/LocalLLaMA/comments/{index:x}/post/"
+                lines.append(f"- [{checked}] **[Reddit post title {index}]({url})** - Reddit投稿の日本語訳 {index}")
+                lines.append(f"  - AI/LLM | Reddit | r/LocalLLaMA | {index % 700}pt {index % 90}comments | ⭐ {rank}")
+            lines.append(f"  - 記事 {index} の概要。" + "要点の説明文。" * 5)
+            urls.append(url)
+            index += 1
+        lines.append("")
+
+    lines.append("## 本日のピックアップ TOP3")
+    lines.append("")
+    for position, url in enumerate(urls[:3], start=1):
+        lines.append(f"### {position}. [ピックアップ記事 {position}]({url})")
+        lines.append("")
+        lines.append(f"**選出理由**: ピックアップ理由 {position}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def feed_results(scale: int) -> tuple[dict, dict, dict]:
+    """
+    3ソースの取得結果を生成する（merge_articles の入力）。
+
+    ソース間・ソース内でURLが一部重複するようにする。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        (はてな, Yahoo, Reddit) の取得結果辞書のタプル
+    """
+    hatena = []
+    for i in range(BASE_HATENA_ITEMS * 3 * scale):
+        hatena.append(
+            {
+                "title": f"はてブ記事 {i}",
+                "url": f"https://example.com/entry/{i % (BASE_HATENA_ITEMS * 2 * scale)}",
+                "bookmarks": i % 900,
+                "date": "2026-02-10T09:00:00+09:00",
+                "tags": ["AI", "LLM"],
+                "category": "it",
+                "description": "概要" * 20,
+            }
+        )
+    yahoo = yahoo_articles(scale)
+    reddit = []
+    for i in range(BASE_REDDIT_POSTS * scale):
+        reddit.append(
+            {
+                "title": f"Reddit post {i}",
+                # 一部はリンク先がはてブ記事と同じURL
+                "url": f"https://example.com/entry/{i}" if i % 10 == 0 else f"https://example.org/post/{i}",
+                "permalink": f"https://www.reddit.com/r/mock/comments/{i:x}/post/",
+                "score": i % 700,
+                "num_comments": i % 90,
+                "subreddit": "r/mock",
+                "author": "redditor",
+                "is_self": False,
+                "stickied": False,
+                "created_utc": 1770000000 + i,
+            }
+        )
+    return {"articles": hatena}, {"articles": yahoo}, {"articles": reddit}
+
+
+def report_articles(scale: int) -> list[dict]:
+    """
+    評価済みのレポート記事を生成する（propose_topics の入力）。
+
+    タイトル・要約は乱数で選んだ語（出現頻度に偏りを付ける）からなり、
+    10件に1件程度の割合で同じ話題の語を共有する記事の組ができる。
+
+    Args:
+        scale: 倍率
+
+    Returns:
+        id / url / title / titleJa / summary を持つ記事辞書のリスト
+    """
+    rng = random.Random(scale)
+    katakana = [chr(c) for c in range(0x30A2, 0x30F3)]
+    kanji = [chr(c) for c in range(0x4E00, 0x4E00 + 2000)]
+    words = []
+    for i in range(5000):
+        if i % 3 == 0:
+            words.append("".join(rng.choices(katakana, k=rng.randint(3, 6))))
+        elif i % 3 == 1:
+            words.append("".join(rng.choices(kanji, k=2)))
+        else:
+            words.append("".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9))))
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    topics = [rng.sample(words, 3) for _ in range(BASE_REPORT_ARTICLES * scale // 10)]
+
+    articles = []
+    for i in range(BASE_REPORT_ARTICLES * scale):
+        topic = rng.choice(topics) if rng.random() < 0.3 else []
+        articles.append(
+            {
+                "id": f"{i:08x}",
+                "url": f"https://example.com/report/{i}",
+                "title": " ".join(topic + rng.choices(words, weights, k=5)),
+                "titleJa": " ".join(rng.choices(words, weights, k=5) + topic),
+                "summary": " ".join(rng.choices(words, weights, k=10)),
+            }
+        )
+    return articles
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Headlines のアーカイブ全体の集計（月別・全体のサマリー）を作るスクリプト
+
+Headlines JSON（01.Trends/Headlines/YYYY-MM/YYYY-MM-DD.json）の summary は日ごとにしかないため、
+月の一覧やランク・カテゴリの合計を求めるには全ファイルを読む必要がある。
+このスクリプトは月別と全体の集計ファイルを書き出し、集計を1つの小さなファイルの読み込みで
+済むようにする。
+
+出力先（デフォルト: 01.Trends/HeadlinesIndex/）:
+    YYYY-MM.json   月別の集計。日付の一覧・ランク別/ソース別/カテゴリ別の件数・チェック済み件数・
+                   記事ID -> 日付の対応と、日ごとの集計（days）を持つ
+    index.json     全体の集計。月ごとの集計と、日付の一覧（date / path / summary。ビューアの
+                   /api/headlines と同じ形）を持つ
+    articles.json  全期間の記事ID -> 日付の対応
+
+ビューアは Headlines の月ディレクトリ内の *.json をすべてレポートとして読むため、
+集計ファイルは Headlines の外に置く。
+
+増分更新:
+    月別の集計に日ごとの集計と変換元の更新日時・サイズを記録しておき、変わった日のファイルだけを
+    読み直す。月・全体の合計は記録済みの日ごとの集計から作り直す（レポートは読まない）。
+    削除された日・月の集計は取り除く。
+
+使い方:
+    python3 build_archive_index.py [--headlines ディレクトリ] [--output ディレクトリ] [--rebuild]
+
+環境変数:
+    KNOWLEDGE_HUB_ARCHIVE_INDEX   出力先のディレクトリ（デフォルト: 01.Trends/HeadlinesIndex）
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from article_store import HEADLINES_DIR, REPO_ROOT
+import profiling
+
+# 出力先のディレクトリ
+OUTPUT_DIR = Path(os.environ.get("KNOWLEDGE_HUB_ARCHIVE_INDEX") or REPO_ROOT / "01.Trends" / "HeadlinesIndex")
+
+# 全体の集計・記事ID対応のファイル名
+INDEX_FILENAME = "index.json"
+ARTICLES_FILENAME = "articles.json"
+
+# ランクの並び順（summary のキー）
+RANK_ORDER = ("S", "A", "B", "C")
+
+
+def summarize_day(report: dict, path: Path, stat: os.stat_result) -> dict:
+    """
+    1日分のレポートを集計する。
+
+    Args:
+        report: Headlines JSON のレポート
+        path: レポートのパス
+        stat: レポートのファイル情報（増分更新の判定に使う）
+
+    Returns:
+        date / path / mtime / size / summary / checked / sources / categories / articleIds を持つ辞書
+    """
+    articles = report["articles"]
+    ranks = Counter(article.get("rank") for article in articles)
+    summary = {"total": len(articles)}
+    for rank in RANK_ORDER:
+        summary[rank] = ranks[rank]
+    return {
+        "date": report["date"],
+        "path": f"{path.parent.name}/{path.name}",
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "summary": summary,
+        "checked": sum(1 for article in articles if article.get("checked")),
+        "sources": dict(Counter(article["source"] for article in articles if article.get("source"))),
+        "categories": dict(Counter(article["category"] for article in articles if article.get("category"))),
+        "articleIds": [article["id"] for article in articles if article.get("id")],
+    }
+
+
+def merge_totals(entries: list[dict]) -> dict:
+    """
+    日ごと（または月ごと）の集計を合計する。
+
+    Args:
+        entries: summary / checked / sources / categories を持つ集計のリスト
+
+    Returns:
+        summary / checked / sources / categories を持つ辞書（ソース・カテゴリは件数の多い順）
+    """
+    summary = Counter({"total": 0, **dict.fromkeys(RANK_ORDER, 0)})
+    sources = Counter()
+    categories = Counter()
+    checked = 0
+    for entry in entries:
+        summary.update(entry["summary"])
+        sources.update(entry["sources"])
+        categories.update(entry["categories"])
+        checked += entry["checked"]
+    return {
+        "summary": dict(summary),
+        "checked": checked,
+        "sources": dict(sources.most_common()),
+        "categories": dict(categories.most_common()),
+    }
+
+
+def article_dates(days: list[dict]) -> dict[str, str]:
+    """記事ID -> 最初に載った日付の対応を作る（days は日付の昇順）。"""
+    dates = {}
+    for day in days:
+        for article_id in day["articleIds"]:
+            dates.setdefault(article_id, day["date"])
+    return dates
+
+
+def build_month(month: str, days: dict[str, dict]) -> dict:
+    """
+    日ごとの集計から月別の集計を作る。
+
+    Args:
+        month: 月（YYYY-MM）
+        days: ファイル名 -> 日ごとの集計
+
+    Returns:
+        月別の集計
+    """
+    ordered = sorted(days.values(), key=lambda day: day["date"])
+    return {
+        "month": month,
+        "dates": [day["date"] for day in ordered],
+        **merge_totals(ordered),
+        "articles": article_dates(ordered),
+        "days": dict(sorted(days.items())),
+    }
+
+
+def build_index(months: dict[str, dict]) -> dict:
+    """
+    月別の集計から全体の集計を作る。
+
+    Args:
+        months: 月 -> 月別の集計
+
+    Returns:
+        全体の集計（months / dates は新しい順）
+    """
+    ordered = [months[month] for month in sorted(months, reverse=True)]
+    month_totals = [
+        {"month": month["month"], "path": f"{month['month']}.json", "days": len(month["dates"]), **merge_totals([month])}
+        for month in ordered
+    ]
+    dates = [
+        {"date": day["date"], "path": day["path"], "summary": day["summary"]}
+        for month in ordered
+        for day in month["days"].values()
+    ]
+    dates.sort(key=lambda day: day["date"], reverse=True)
+    return {
+        "generatedAt": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        **merge_totals(month_totals),
+        "months": month_totals,
+        "dates": dates,
+    }
+
+
+def load_json(path: Path) -> dict:
+    """集計ファイルを読み込む（未作成・破損時は空）。"""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_json(path: Path, data: dict):
+    """集計ファイルを一時ファイル経由で保存する。"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def refresh_month(month_dir: Path, previous: dict[str, dict], result: dict) -> dict[str, dict]:
+    """
+    1か月分の日ごとの集計を更新する。
+
+    更新日時とサイズが記録と同じファイルは読まずに記録済みの集計を使う。
+
+    Args:
+        month_dir: 月ディレクトリ
+        previous: 前回のファイル名 -> 日ごとの集計
+        result: parsed / skipped / removed / errors を数える辞書（更新する）
+
+    Returns:
+        ファイル名 -> 日ごとの集計
+    """
+    paths = sorted(month_dir.glob("*.json"))
+    days = {}
+    for path in paths:
+        stat = path.stat()
+        entry = previous.get(path.name)
+        if entry and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+            days[path.name] = entry
+            result["skipped"] += 1
+            continue
+        try:
+            with profiling.stage("parse"):
+                report = json.loads(path.read_text(encoding="utf-8"))
+            days[path.name] = summarize_day(report, path, stat)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            result["errors"].append({"path": str(path), "error": str(e)})
+            continue
+        result["parsed"] += 1
+    result["removed"] += len(previous.keys() - {path.name for path in paths})
+    return days
+
+
+def refresh(headlines_dir: Path = HEADLINES_DIR, output_dir: Path = OUTPUT_DIR, rebuild: bool = False) -> dict:
+    """
+    変わった日のレポートだけを読み直して、月別・全体の集計ファイルを更新する。
+
+    Args:
+        headlines_dir: Headlines ディレクトリ
+        output_dir: 集計ファイルの出力先
+        rebuild: True なら記録済みの集計を使わずにすべて読み直す
+
+    Returns:
+        parsed / skipped / removed / monthsWritten / months / days / errors を持つ辞書
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    month_dirs = sorted(path for path in headlines_dir.glob("*") if path.is_dir()) if headlines_dir.is_dir() else []
+
+    result = {"parsed": 0, "skipped": 0, "removed": 0, "monthsWritten": 0, "errors": []}
+    months = {}
+    for month_dir in month_dirs:
+        month_path = output_dir / f"{month_dir.name}.json"
+        stored = {} if rebuild else load_json(month_path)
+        previous = stored.get("days") or {}
+        days = refresh_month(month_dir, previous, result)
+        if not days:
+            continue
+        if days == previous and stored.get("month") == month_dir.name:
+            months[month_dir.name] = stored
+            continue
+        with profiling.stage("format"):
+            months[month_dir.name] = build_month(month_dir.name, days)
+        with profiling.stage("serialize"):
+            save_json(month_path, months[month_dir.name])
+        result["monthsWritten"] += 1
+
+    # ディレクトリがなくなった月（または空になった月）の集計を削除する
+    for month_path in output_dir.glob("????-??.json"):
+        if month_path.stem not in months:
+            result["removed"] += len(load_json(month_path).get("days") or {})
+            month_path.unlink()
+            result["monthsWritten"] += 1
+
+    index_path = output_dir / INDEX_FILENAME
+    articles_path = output_dir / ARTICLES_FILENAME
+    if result["monthsWritten"] or rebuild or not index_path.exists() or not articles_path.exists():
+        with profiling.stage("format"):
+            index = build_index(months)
+            articles = {}
+            for month in sorted(months):
+                for article_id, date in months[month]["articles"].items():
+                    articles.setdefault(article_id, date)
+        with profiling.stage("serialize"):
+            save_json(index_path, index)
+            save_json(articles_path, articles)
+
+    result["months"] = len(months)
+    result["days"] = sum(len(month["dates"]) for month in months.values())
+    return result
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="Headlines の月別・全体の集計ファイルを作る")
+    parser.add_argument("--headlines", type=Path, default=HEADLINES_DIR, help="Headlines ディレクトリ")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR, help="集計ファイルの出力先")
+    parser.add_argument("--rebuild", action="store_true", help="記録済みの集計を使わずにすべて読み直す")
+    return parser.parse_args()
+
+
+def main():
+    """メイン処理: 集計ファイルを更新し、処理件数をJSONで出力する。"""
+    args = parse_args()
+    if args.output.resolve().is_relative_to(args.headlines.resolve()):
+        print(
+            json.dumps({"error": f"出力先は Headlines ディレクトリの外を指定してください: {args.output}"}, ensure_ascii=False),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    try:
+        result = refresh(args.headlines, args.output, args.rebuild)
+    except OSError as e:
+        print(json.dumps({"error": f"集計ファイルを更新できません: {e}"}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
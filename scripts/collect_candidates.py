@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+トレンド候補記事の一括収集スクリプト
+
+はてなブックマーク・Yahoo ニュース・Reddit の3ソースを1プロセス内で
+asyncio により並行取得し、generate_report.py と同じ統合処理
+（除外URLの除去・URL重複除去）を行った候補リストを出力する。
+
+fetch_hatena_rss.py / fetch_yahoo_rss.py / fetch_reddit_hot.py を個別に実行して
+JSONファイル経由で generate_report.py に渡す場合と同じ結果が得られる。
+
+使い方:
+    python3 collect_candidates.py [--json] [--full] [--cluster] [--prescore] [--hatena カテゴリ,...] [--yahoo フィードキー,...] [--reddit subreddit,...]
+
+例:
+    # デフォルト設定で収集し、評価用の一覧を出力
+    python3 collect_candidates.py
+
+    # 統合済み候補リストをJSONで出力
+    python3 collect_candidates.py --json
+
+    # 前回実行との差分ではなく全件を対象にする
+    python3 collect_candidates.py --full
+
+    # ソースをまたいだ同じニュースを代表記事1件にまとめる
+    python3 collect_candidates.py --cluster
+
+    # PROFILE.md に基づく推定ランクを付け、推定が不確かな記事に印を付ける
+    python3 collect_candidates.py --prescore
+
+    # ソースごとの取得対象を指定
+    python3 collect_candidates.py --hatena it,knowledge --yahoo it --reddit programming,webdev
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+import fetch_hatena_rss
+import fetch_reddit_hot
+from fetch_scheduler import FetchScheduler
+from fetch_state import commit_state
+import fetch_yahoo_rss
+from generate_report import load_excluded_urls, merge_articles, print_candidates
+from near_duplicates import cluster_articles
+import prescore
+import profiling
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="3ソースのトレンド候補記事を一括収集する")
+    parser.add_argument("--json", action="store_true", help="統合済み候補リストをJSONで出力する")
+    parser.add_argument("--full", action="store_true", help="前回実行との差分ではなく全件を対象にする")
+    parser.add_argument("--cluster", action="store_true", help="ソースをまたいだ同じニュースを代表記事1件にまとめる")
+    parser.add_argument("--prescore", action="store_true", help="PROFILE.md に基づく推定ランク・カテゴリを付ける")
+    parser.add_argument("--hatena", help="はてなブックマークのカテゴリ（カンマ区切り）")
+    parser.add_argument("--yahoo", help="Yahoo ニュースのフィードキー（カンマ区切り）")
+    parser.add_argument("--reddit", help="Redditのsubreddit（カンマ区切り）")
+    return parser.parse_args()
+
+
+def split_list(value: str | None, default: list[str]) -> list[str]:
+    """
+    カンマ区切りの引数をリストに変換する。
+
+    Args:
+        value: カンマ区切りの文字列（未指定なら None）
+        default: 未指定時に使うリスト
+
+    Returns:
+        要素のリスト
+    """
+    if not value:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+async def collect_sources(
+    categories: list[str],
+    feed_keys: list[str],
+    feeds: dict[str, dict],
+    subreddits: list[str],
+    since_last_run: bool = False,
+) -> tuple[dict, dict, dict]:
+    """
+    3ソースを並行して取得する。
+
+    各ソースの取得処理はブロッキングI/Oのためスレッドで実行し、
+    ホスト単位のレート制限は共有スケジューラでまとめて管理する。
+
+    Args:
+        categories: はてなブックマークのカテゴリ名リスト
+        feed_keys: Yahoo ニュースのフィードキーリスト
+        feeds: Yahoo ニュースのフィード定義
+        subreddits: subreddit名のリスト
+        since_last_run: True なら各ソースを前回実行以降の差分に絞り込む
+            （既読セットは保存しない。出力後に commit_state() で保存する）
+
+    Returns:
+        (はてな, Yahoo, Reddit) の取得結果辞書のタプル
+    """
+    scheduler = FetchScheduler()
+    hatena, yahoo, reddit = await asyncio.gather(
+        asyncio.to_thread(fetch_hatena_rss.collect_articles, categories, scheduler, since_last_run),
+        asyncio.to_thread(fetch_yahoo_rss.collect_articles, feed_keys, feeds, scheduler, since_last_run),
+        asyncio.to_thread(fetch_reddit_hot.collect_posts, subreddits, scheduler, since_last_run),
+    )
+    return hatena, yahoo, reddit
+
+
+def main():
+    """メイン処理: 3ソースを並行取得して統合済みの候補リストを出力する。"""
+    args = parse_args()
+    feeds = fetch_yahoo_rss.load_feeds()
+
+    categories = split_list(args.hatena, fetch_hatena_rss.DEFAULT_CATEGORIES)
+    feed_keys = split_list(args.yahoo, list(feeds.keys()))
+    subreddits = split_list(args.reddit, fetch_reddit_hot.DEFAULT_SUBREDDITS)
+
+    # 無効な指定のチェック
+    invalid_categories = [c for c in categories if c not in fetch_hatena_rss.VALID_CATEGORIES]
+    invalid_feeds = [k for k in feed_keys if k not in feeds]
+    if invalid_categories or invalid_feeds:
+        print(
+            json.dumps(
+                {
+                    "error": "無効なカテゴリまたはフィードキーが指定されました",
+                    "invalid_categories": invalid_categories,
+                    "invalid_feeds": invalid_feeds,
+                },
+                ensure_ascii=False,
+            ),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    hatena, yahoo, reddit = asyncio.run(
+        collect_sources(categories, feed_keys, feeds, subreddits, since_last_run=not args.full)
+    )
+    excluded_urls = load_excluded_urls(hatena, yahoo, reddit)
+    with profiling.stage("format"):
+        all_articles = merge_articles(hatena, yahoo, reddit, excluded_urls)
+    if args.cluster:
+        with profiling.stage("cluster"):
+            all_articles = cluster_articles(all_articles)
+    if args.prescore:
+        try:
+            matcher = prescore.load_matcher()
+        except OSError as e:
+            print(json.dumps({"error": f"PROFILE.md を読み込めません: {e}"}, ensure_ascii=False), file=sys.stderr)
+            sys.exit(1)
+        with profiling.stage("prescore"):
+            prescore.prescore_articles(all_articles, matcher)
+
+    # ソースごとの取得エラーをまとめる
+    errors = []
+    for source, data in (("hatena", hatena), ("yahoo", yahoo), ("reddit", reddit)):
+        for error in data.get("errors", []):
+            errors.append({"source": source, **error})
+
+    if args.json:
+        result = {
+            "fetched_at": datetime.now().isoformat(),
+            "total": len(all_articles),
+            "articles": all_articles,
+        }
+        if args.prescore:
+            result["prescore"] = prescore.summarize(all_articles)
+        if errors:
+            result["errors"] = errors
+        with profiling.stage("serialize"):
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        # 一覧出力は generate_report.py と同じ形式。エラーは標準エラー出力へ
+        if errors:
+            print(json.dumps({"errors": errors}, ensure_ascii=False), file=sys.stderr)
+        with profiling.stage("serialize"):
+            print_candidates(all_articles, args.cluster, args.prescore)
+
+    # 既読セットは候補リストを出力し終えてから保存する
+    if not args.full:
+        for source in ("hatena_rss", "yahoo_rss", "reddit_hot"):
+            commit_state(source)
+
+
+if __name__ == "__main__":
+    profiling.run(main)
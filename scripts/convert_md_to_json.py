@@ -3,188 +3,261 @@
 Headlines Markdownレポートを JSON 形式に変換するスクリプト
 
 使い方:
-  python3 scripts/convert_md_to_json.py 01.Trends/Headlines/2026-02/2026-02-09.md
+  python3 scripts/convert_md_to_json.py 01.Trends/Headlines/2026-02/2026-02-09.md [--no-store]
+  python3 scripts/convert_md_to_json.py 01.Trends/Headlines [--jobs N] [--force] [--no-store]
+
+変換したレポートの記事は記事ストア（article_store.py）と全文検索インデックス
+（search_index.py）に、日別の件数はトピックの時系列（trend_timeseries.py）にも登録する。
+--no-store を指定すると登録しない
+
+ディレクトリを指定すると、その下の日次レポート（YYYY-MM-DD.md）をすべて探してプロセスプールで
+並列に変換し、件数の集計とファイルごとのエラーをJSONで出力する。
+変換元の内容のハッシュ・更新日時・サイズを manifest（デフォルト: 01.Trends/convert_manifest.json。
+環境変数 KNOWLEDGE_HUB_CONVERT_MANIFEST で変更可）に記録し、前回から変わっていないファイルは読み飛ばす。
+Headlines の月ディレクトリ内の *.json はすべてレポートとして読まれるため、manifest は Headlines の外に置く。
+--jobs N（--jobs=N も可）で並列数（デフォルト: CPU数）、--force で全ファイルの再変換を指定する
 """
 import sys
 import re
+import io
 import json
 import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import article_store
+import profiling
+import search_index
+import trend_timeseries
+from url_canonical import url_id
+
+# ディレクトリ一括変換の manifest のパス（Headlines の外に置く）
+MANIFEST_PATH = Path(
+    os.environ.get('KNOWLEDGE_HUB_CONVERT_MANIFEST') or article_store.REPO_ROOT / '01.Trends' / 'convert_manifest.json'
+)
+
+# 以前の版が変換したディレクトリの直下に置いていた manifest のファイル名（見つけたら削除する）
+LEGACY_MANIFEST_FILENAME = '.convert_manifest.json'
+
+# 月ディレクトリの名前: YYYY-MM
+MONTH_DIR_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+# ディレクトリ一括変換の対象にする日次レポートのファイル名: YYYY-MM-DD.md
+REPORT_FILENAME = re.compile(r'^\d{4}-\d{2}-\d{2}\.md$')
+
+# 1行目の日付: "# 2026年02月09日 トレンドヘッドライン"
+DATE_PATTERN = re.compile(r'(\d{4})年(\d{2})月(\d{2})日')
+
+# 生成日時: "> 生成日時: 2026-02-09 07:30"
+GENERATED_AT_PATTERN = re.compile(r'生成日時:\s*(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})')
+
+# 件数サマリー: "> 記事総数: 45件（S: 12件 / A: 12件 / B: 12件 / C: 9件）"
+SUMMARY_PATTERN = re.compile(r'記事総数:\s*(\d+)件.*S:\s*(\d+)件.*A:\s*(\d+)件.*B:\s*(\d+)件.*C:\s*(\d+)件')
+
+# ランクセクションの見出し（ピックアップセクションでは記事パースを停止する）
+RANK_HEADINGS = [('## S ', 'S'), ('## A ', 'A'), ('## B ', 'B'), ('## C ', 'C'), ('## 本日のピックアップ', '')]
+
+# 記事行: "- [ ] **[タイトル](URL)**" / "- [x] **[タイトル](URL)** - 日本語訳"
+ARTICLE_LINE_PATTERN = re.compile(r'^- \[[ x]\] \*\*\[')
+TITLE_PATTERN = re.compile(r'\*\*\[([^\]]+)\]\(([^)]+)\)\*\*')
+TITLE_JA_PATTERN = re.compile(r'\*\*\s*-\s*(.+)$')
+
+# メタデータ行のスコア: "210 users" / "735pt 100comments"
+HATENA_SCORE_PATTERN = re.compile(r'(\d+)\s*users')
+REDDIT_SCORE_PATTERN = re.compile(r'(\d+)pt\s+(\d+)comments')
+
+# ピックアップ: "### 1. [タイトル](URL)" と "**選出理由**: ..."
+PICKUP_PATTERN = re.compile(r'###\s+(\d+)\.\s+\[([^\]]+)\]\(([^)]+)\)')
+REASON_PATTERN = re.compile(r'\*\*選出理由\*\*:\s*(.+)')
+
+# ピックアップの選出理由を探す範囲（見出しの次の行からの行数）
+PICKUP_REASON_LINES = 4
+
 
 def generate_id(url: str) -> str:
-    """URLからSHA-256ハッシュの先頭8文字をIDとして生成"""
-    return hashlib.sha256(url.encode()).hexdigest()[:8]
+    """正規化したURLからSHA-256ハッシュの先頭8文字をIDとして生成"""
+    return url_id(url)
 
 
-def parse_headline_md(content: str) -> dict:
-    """MarkdownのHeadlinesレポートをパースしてdict形式に変換"""
-    lines = content.split('\n')
+def _parse_meta(meta_line: str) -> tuple:
+    """
+    記事のメタデータ行からカテゴリ・ソース・スコアを取り出す。
 
-    # ヘッダー情報の抽出
-    date_match = re.search(r'(\d{4})年(\d{2})月(\d{2})日', lines[0])
-    date = f"{date_match.group(1)}-{date_match.group(2)}-{date_match.group(3)}" if date_match else ""
+    Args:
+        meta_line: "  - AI/LLM | はてブ | 210 users | ⭐ S" 形式の行
 
-    generated_at = ""
-    for line in lines:
-        m = re.search(r'生成日時:\s*(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})', line)
+    Returns:
+        (category, source, score, score_label, subreddit) のタプル
+    """
+    meta_line = meta_line.strip().lstrip('- ').strip()
+
+    # カテゴリ
+    parts = [p.strip() for p in meta_line.split('|')]
+    category = parts[0] if parts else ""
+
+    # ソースとスコアの判定
+    source = "hatena"
+    score = 0
+    score_label = ""
+    subreddit = None
+
+    if len(parts) >= 2:
+        source_str = parts[1]
+        if 'はてブ' in source_str:
+            source = "hatena"
+        elif 'Yahoo' in source_str:
+            source = "yahoo"
+        elif 'Reddit' in source_str:
+            source = "reddit"
+
+    # はてブ: "210 users"
+    for p in parts:
+        m = HATENA_SCORE_PATTERN.match(p)
         if m:
-            generated_at = m.group(1).replace(' ', 'T') + ':00'
+            score = int(m.group(1))
+            score_label = f"{score} users"
             break
 
-    # 件数サマリー
-    summary = {"total": 0, "S": 0, "A": 0, "B": 0, "C": 0}
-    for line in lines:
-        m = re.search(r'記事総数:\s*(\d+)件.*S:\s*(\d+)件.*A:\s*(\d+)件.*B:\s*(\d+)件.*C:\s*(\d+)件', line)
+    # Reddit: "r/ClaudeAI", "735pt 100comments"
+    for p in parts:
+        if p.startswith('r/'):
+            subreddit = p
+        m = REDDIT_SCORE_PATTERN.match(p)
         if m:
-            summary = {
-                "total": int(m.group(1)),
-                "S": int(m.group(2)),
-                "A": int(m.group(3)),
-                "B": int(m.group(4)),
-                "C": int(m.group(5)),
-            }
-            break
+            score = int(m.group(1))
+            score_label = f"{m.group(1)}pt {m.group(2)}comments"
+
+    # Yahoo: ソースメディア名
+    if source == "yahoo" and not score_label:
+        for p in parts[1:]:
+            if p and not p.startswith('⭐') and 'Yahoo' not in p:
+                score_label = p
+                break
+
+    return category, source, score, score_label, subreddit
+
 
-    # 記事のパース
+def parse_headline_md(source) -> dict:
+    """
+    MarkdownのHeadlinesレポートをパースしてdict形式に変換
+
+    行を先頭から1回だけ読み、ヘッダー・件数サマリー・記事・ピックアップを
+    同時に取り出す。記事は「記事行 → メタデータ行 → 概要行」の順に状態を進め、
+    ピックアップの選出理由は見出しの後 PICKUP_REASON_LINES 行以内から探す。
+
+    Args:
+        source: Markdown文字列、またはテキストモードで開いたファイルオブジェクト
+
+    Returns:
+        レポート辞書
+    """
+    if isinstance(source, str):
+        # 文字列は "\n" だけで行に分ける（"\r" 等では分けない）
+        source = io.StringIO(source, newline='\n')
+
+    date = ""
+    generated_at = ""
+    summary = {"total": 0, "S": 0, "A": 0, "B": 0, "C": 0}
+    summary_found = False
     articles = []
+    pickups = []
+
     current_rank = ""
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-
-        # ランクセクションの検出
-        if line.startswith('## S '):
-            current_rank = 'S'
-        elif line.startswith('## A '):
-            current_rank = 'A'
-        elif line.startswith('## B '):
-            current_rank = 'B'
-        elif line.startswith('## C '):
-            current_rank = 'C'
-        elif line.startswith('## 本日のピックアップ'):
-            current_rank = ''  # ピックアップセクションでは記事パースを停止
-
-        # 記事行の検出: - [ ] または - [x]
-        if current_rank and re.match(r'^- \[[ x]\] \*\*\[', line):
-            checked = '[x]' in line[:6]
-
-            # タイトルとURL
-            title_match = re.search(r'\*\*\[([^\]]+)\]\(([^)]+)\)\*\*', line)
-            if not title_match:
-                i += 1
-                continue
-
-            title = title_match.group(1)
-            url = title_match.group(2)
-
-            # Reddit英語記事の日本語訳
-            title_ja = None
-            ja_match = re.search(r'\*\*\s*-\s*(.+)$', line)
-            if ja_match:
-                title_ja = ja_match.group(1).strip()
-
-            # メタデータ行
-            i += 1
-            meta_line = lines[i].strip() if i < len(lines) else ""
-            # "  - AI/LLM | はてブ | 210 users | ⭐ S" のパターン
-            meta_line = meta_line.lstrip('- ').strip()
-
-            # カテゴリ
-            parts = [p.strip() for p in meta_line.split('|')]
-            category = parts[0] if parts else ""
-
-            # ソースとスコアの判定
-            source = "hatena"
-            score = 0
-            score_label = ""
-            subreddit = None
-
-            if len(parts) >= 2:
-                source_str = parts[1].strip()
-                if 'はてブ' in source_str:
-                    source = "hatena"
-                elif 'Yahoo' in source_str:
-                    source = "yahoo"
-                elif 'Reddit' in source_str:
-                    source = "reddit"
-
-            # はてブ: "210 users"
-            for p in parts:
-                p = p.strip()
-                m = re.match(r'(\d+)\s*users', p)
-                if m:
-                    score = int(m.group(1))
-                    score_label = f"{score} users"
-                    break
-
-            # Reddit: "r/ClaudeAI", "735pt 100comments"
-            for p in parts:
-                p = p.strip()
-                if p.startswith('r/'):
-                    subreddit = p
-                m = re.match(r'(\d+)pt\s+(\d+)comments', p)
-                if m:
-                    score = int(m.group(1))
-                    score_label = f"{m.group(1)}pt {m.group(2)}comments"
-
-            # Yahoo: ソースメディア名
-            if source == "yahoo" and not score_label:
-                for p in parts[1:]:
-                    p = p.strip()
-                    if p and not p.startswith('⭐') and 'Yahoo' not in p:
-                        score_label = p
+    # 記事の状態: None（記事行を待つ）/ "meta"（メタデータ行を待つ）/ "summary"（概要行を待つ）
+    state = None
+    pending = {}
+    in_pickup = False
+    # 選出理由を待っているピックアップ: [ピックアップ辞書, 理由を探す最後の行番号]
+    awaiting_reason = []
+
+    for index, line in enumerate(source):
+        if line.endswith('\n'):
+            line = line[:-1]
+
+        # ヘッダー情報（日付は1行目のみ、生成日時・件数サマリーは最初に現れた行）
+        if index == 0:
+            date_match = DATE_PATTERN.search(line)
+            if date_match:
+                date = f"{date_match.group(1)}-{date_match.group(2)}-{date_match.group(3)}"
+        if not generated_at and '生成日時' in line:
+            m = GENERATED_AT_PATTERN.search(line)
+            if m:
+                generated_at = m.group(1).replace(' ', 'T') + ':00'
+        if not summary_found and '記事総数' in line:
+            m = SUMMARY_PATTERN.search(line)
+            if m:
+                summary = {
+                    "total": int(m.group(1)),
+                    "S": int(m.group(2)),
+                    "A": int(m.group(3)),
+                    "B": int(m.group(4)),
+                    "C": int(m.group(5)),
+                }
+                summary_found = True
+
+        # 記事のパース
+        if state == "meta":
+            pending["meta"] = _parse_meta(line)
+            state = "summary"
+        elif state == "summary":
+            articles.append(_build_article(pending, line))
+            state = None
+        else:
+            # ランクセクションの検出
+            if line.startswith('## '):
+                for heading, rank in RANK_HEADINGS:
+                    if line.startswith(heading):
+                        current_rank = rank
                         break
 
-            # 概要行
-            i += 1
-            summary_line = lines[i].strip() if i < len(lines) else ""
-            summary_text = summary_line.lstrip('- ').strip()
-
-            article = {
-                "id": generate_id(url),
-                "title": title,
-                "titleJa": title_ja,
-                "url": url,
-                "category": category,
-                "source": source,
-                "score": score,
-                "scoreLabel": score_label,
-                "subreddit": subreddit,
-                "rank": current_rank,
-                "summary": summary_text,
-                "checked": checked,
-            }
-            articles.append(article)
-
-        i += 1
-
-    # ピックアップTOP3のパース
-    pickups = []
-    in_pickup = False
-    for i, line in enumerate(lines):
+            # 記事行の検出: - [ ] または - [x]
+            if current_rank and ARTICLE_LINE_PATTERN.match(line):
+                title_match = TITLE_PATTERN.search(line)
+                if title_match:
+                    ja_match = TITLE_JA_PATTERN.search(line)
+                    pending = {
+                        "checked": '[x]' in line[:6],
+                        "title": title_match.group(1),
+                        "url": title_match.group(2),
+                        # Reddit英語記事の日本語訳
+                        "titleJa": ja_match.group(1).strip() if ja_match else None,
+                        "rank": current_rank,
+                    }
+                    state = "meta"
+
+        # ピックアップTOP3のパース（選出理由は見出しの次の行から探す）
+        if awaiting_reason:
+            m = REASON_PATTERN.match(line) if line.startswith('**選出理由**') else None
+            if m:
+                for pickup, _ in awaiting_reason:
+                    pickup["reason"] = m.group(1)
+                awaiting_reason = []
+            else:
+                awaiting_reason = [entry for entry in awaiting_reason if entry[1] > index]
         if '本日のピックアップ' in line:
             in_pickup = True
             continue
-        if in_pickup:
-            m = re.match(r'###\s+(\d+)\.\s+\[([^\]]+)\]\(([^)]+)\)', line)
+        if in_pickup and line.startswith('###'):
+            m = PICKUP_PATTERN.match(line)
             if m:
-                pos = int(m.group(1))
-                pickup_url = m.group(3)
-                # 次の行から理由を取得
-                reason = ""
-                for j in range(i + 1, min(i + 5, len(lines))):
-                    rm = re.match(r'\*\*選出理由\*\*:\s*(.+)', lines[j])
-                    if rm:
-                        reason = rm.group(1)
-                        break
-                # URLからarticleIdを検索
-                article_id = generate_id(pickup_url)
-                pickups.append({
-                    "position": pos,
-                    "articleId": article_id,
-                    "reason": reason,
-                })
+                pickup = {
+                    "position": int(m.group(1)),
+                    # URLからarticleIdを検索
+                    "articleId": generate_id(m.group(3)),
+                    "reason": "",
+                }
+                pickups.append(pickup)
+                awaiting_reason.append([pickup, index + PICKUP_REASON_LINES])
+
+    # メタデータ行・概要行の途中でファイルが終わった記事
+    if state == "meta":
+        pending["meta"] = _parse_meta("")
+        state = "summary"
+    if state == "summary":
+        articles.append(_build_article(pending, ""))
 
     return {
         "date": date,
@@ -196,25 +269,286 @@ def parse_headline_md(content: str) -> dict:
     }
 
 
+def _build_article(pending: dict, summary_line: str) -> dict:
+    """記事行・メタデータ行で集めた値と概要行から記事辞書を作る。"""
+    category, source, score, score_label, subreddit = pending["meta"]
+    url = pending["url"]
+    return {
+        "id": generate_id(url),
+        "title": pending["title"],
+        "titleJa": pending["titleJa"],
+        "url": url,
+        "category": category,
+        "source": source,
+        "score": score,
+        "scoreLabel": score_label,
+        "subreddit": subreddit,
+        "rank": pending["rank"],
+        "summary": summary_line.strip().lstrip('- ').strip(),
+        "checked": pending["checked"],
+    }
+
+
+def convert_file(md_path: str) -> dict:
+    """
+    Markdownレポート1件をJSONに変換し、同じディレクトリに .json で書き出す。
+
+    ディレクトリ一括変換でプロセスプールの各ワーカーが実行する。
+
+    Args:
+        md_path: Markdownファイルのパス
+
+    Returns:
+        report（変換結果）/ sha256（変換元の内容のハッシュ）/ mtime / size を持つ辞書
+    """
+    path = Path(md_path)
+    stat = path.stat()
+    data = path.read_bytes()
+    # 1件ずつ変換する場合（ファイルをテキストモードで読む）と同じく改行コードを "\n" にそろえる
+    report = parse_headline_md(io.StringIO(data.decode('utf-8'), newline=None))
+    path.with_suffix('.json').write_text(
+        json.dumps(report, ensure_ascii=False, indent=2),
+        encoding='utf-8',
+    )
+    return {
+        "report": report,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+    }
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    """manifest を読み込む（未作成・破損時は空）。"""
+    try:
+        return json.loads(path.read_text(encoding='utf-8')).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def save_manifest(path: Path, files: dict[str, dict]):
+    """manifest を一時ファイル経由で保存する。"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"files": files}, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def manifest_key(path: Path) -> str:
+    """manifest のキー（リポジトリ内ならリポジトリからの相対パス、それ以外は絶対パス）を返す。"""
+    resolved = path.resolve()
+    if resolved.is_relative_to(article_store.REPO_ROOT):
+        return resolved.relative_to(article_store.REPO_ROOT).as_posix()
+    return resolved.as_posix()
+
+
+def check_manifest_path(path: Path):
+    """
+    manifest の保存先が Headlines・月ディレクトリの中でないことを確かめる。
+
+    Args:
+        path: manifest のパス
+
+    Raises:
+        ValueError: Headlines の中、または月ディレクトリ（YYYY-MM）の中を指している場合
+    """
+    resolved = path.resolve()
+    if resolved.is_relative_to(article_store.HEADLINES_DIR.resolve()) or MONTH_DIR_PATTERN.match(resolved.parent.name):
+        raise ValueError(f"manifest は Headlines・月ディレクトリの外に置いてください: {path}")
+
+
+def is_unchanged(path: Path, entry: dict | None) -> dict | None:
+    """
+    前回の変換から変換元が変わっていなければ、更新後の manifest エントリを返す。
+
+    更新日時とサイズが同じならファイルを読まずに変更なしとみなし、
+    更新日時だけが変わった場合（チェックアウト等）は内容のハッシュで判定する。
+
+    Args:
+        path: Markdownファイルのパス
+        entry: 前回の manifest エントリ（未記録なら None）
+
+    Returns:
+        変更がなければ manifest エントリ、変更があれば None
+    """
+    if not entry or not path.with_suffix('.json').exists():
+        return None
+    stat = path.stat()
+    if stat.st_size != entry.get("size"):
+        return None
+    if stat.st_mtime == entry.get("mtime"):
+        return entry
+    if hashlib.sha256(path.read_bytes()).hexdigest() == entry.get("sha256"):
+        return {**entry, "mtime": stat.st_mtime}
+    return None
+
+
+def convert_directory(
+    root: Path, jobs: int | None = None, force: bool = False, store: bool = True, manifest_path: Path = MANIFEST_PATH
+) -> dict:
+    """
+    ディレクトリ以下の .md レポートを並列に変換する。
+
+    Args:
+        root: Headlines ディレクトリ（月ディレクトリでもよい）
+        jobs: 並列数（省略時はCPU数）
+        force: True なら manifest によらず全ファイルを変換する
+        store: True なら変換したレポートを記事ストア・検索インデックス・時系列に登録する
+        manifest_path: manifest のパス（Headlines の外）
+
+    Returns:
+        件数の集計と、ファイルごとのエラー（errors）を持つ辞書
+
+    Raises:
+        ValueError: manifest_path が Headlines・月ディレクトリの中を指している場合
+    """
+    started = time.perf_counter()
+    check_manifest_path(manifest_path)
+    # 以前の版が root 直下に置いた manifest はレポートとして読まれてしまうため削除する
+    (root / LEGACY_MANIFEST_FILENAME).unlink(missing_ok=True)
+    stored = load_manifest(manifest_path)
+    # manifest は複数のディレクトリで共有するため、root の外のエントリはそのまま残す
+    root_key = manifest_key(root)
+    outside = {key: entry for key, entry in stored.items() if not key.startswith(f"{root_key}/")}
+    manifest = {} if force else {key: entry for key, entry in stored.items() if key not in outside}
+    md_files = sorted(p for p in root.rglob('*.md') if REPORT_FILENAME.match(p.name))
+
+    result = {
+        "files": len(md_files),
+        "converted": 0,
+        "skipped": 0,
+        "failed": 0,
+        "articles": 0,
+        "checked": 0,
+        "pickups": 0,
+        "errors": [],
+    }
+    entries = {}
+    reports: list[dict] = []
+    pending = []
+    for path in md_files:
+        key = manifest_key(path)
+        entry = is_unchanged(path, manifest.get(key))
+        if entry is not None:
+            entries[key] = entry
+            result["skipped"] += 1
+        else:
+            pending.append(path)
+
+    def collect(path: Path, converted: dict):
+        report = converted.pop("report")
+        entries[manifest_key(path)] = converted
+        result["converted"] += 1
+        result["articles"] += len(report['articles'])
+        result["checked"] += sum(1 for a in report['articles'] if a['checked'])
+        result["pickups"] += len(report['pickupTop3'])
+        reports.append(report)
+
+    def fail(path: Path, error: Exception):
+        result["failed"] += 1
+        result["errors"].append({"path": path.relative_to(root).as_posix(), "error": f"{type(error).__name__}: {error}"})
+
+    # 1件の失敗で全体を止めないよう、ファイルごとに例外を記録して続ける
+    if len(pending) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(convert_file, str(path)): path for path in pending}
+            for future in as_completed(futures):
+                try:
+                    collect(futures[future], future.result())
+                except Exception as e:
+                    fail(futures[future], e)
+    else:
+        for path in pending:
+            try:
+                collect(path, convert_file(str(path)))
+            except Exception as e:
+                fail(path, e)
+
+    if store and reports:
+        try:
+            store_conn = article_store.connect()
+            index_conn = search_index.connect()
+            trend_conn = trend_timeseries.connect()
+            try:
+                for report in sorted(reports, key=lambda r: r['date']):
+                    article_store.upsert_report(report, store_conn)
+                    search_index.index_report(report, index_conn)
+                    trend_timeseries.add_report(report, trend_conn)
+            finally:
+                store_conn.close()
+                index_conn.close()
+                trend_conn.close()
+        except sqlite3.Error as e:
+            result["errors"].append({"error": f"記事ストア・検索インデックス・時系列への登録に失敗しました: {e}"})
+
+    if entries != manifest:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        save_manifest(manifest_path, dict(sorted({**outside, **entries}.items())))
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 convert_md_to_json.py <path-to-md-file>")
+    argv = sys.argv[1:]
+    # --jobs N / --jobs=N の値（--jobs N の値は位置引数に含めない）
+    jobs_value = None
+    args = []
+    for index, a in enumerate(argv):
+        if a == '--jobs':
+            jobs_value = argv[index + 1] if index + 1 < len(argv) else ''
+        elif a.startswith('--jobs='):
+            jobs_value = a.split('=', 1)[1]
+        elif not a.startswith('--') and not (index and argv[index - 1] == '--jobs'):
+            args.append(a)
+    if not args:
+        print("Usage: python3 convert_md_to_json.py <path-to-md-file | directory> [--jobs N] [--force] [--no-store]")
         sys.exit(1)
 
-    md_path = Path(sys.argv[1])
+    md_path = Path(args[0])
     if not md_path.exists():
         print(f"ファイルが見つかりません: {md_path}")
         sys.exit(1)
 
-    content = md_path.read_text(encoding='utf-8')
-    report = parse_headline_md(content)
+    if md_path.is_dir():
+        jobs = None
+        if jobs_value is not None:
+            if not re.fullmatch(r'\d+', jobs_value) or int(jobs_value) < 1:
+                print(
+                    json.dumps({"error": f"--jobs には1以上の整数を指定してください: {jobs_value}"}, ensure_ascii=False),
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            jobs = int(jobs_value)
+        try:
+            result = convert_directory(
+                md_path, jobs=jobs, force='--force' in sys.argv[1:], store='--no-store' not in sys.argv[1:]
+            )
+        except ValueError as e:
+            print(json.dumps({"error": str(e)}, ensure_ascii=False), file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(1 if result["failed"] else 0)
+
+    with open(md_path, encoding='utf-8') as f, profiling.stage("parse"):
+        report = parse_headline_md(f)
 
     # 出力先: 同ディレクトリに .json で出力
     json_path = md_path.with_suffix('.json')
-    json_path.write_text(
-        json.dumps(report, ensure_ascii=False, indent=2),
-        encoding='utf-8',
-    )
+    with profiling.stage("serialize"):
+        json_path.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2),
+            encoding='utf-8',
+        )
+
+    if '--no-store' not in sys.argv[1:]:
+        try:
+            article_store.upsert_report(report)
+            search_index.index_report(report)
+            trend_timeseries.add_report(report)
+        except sqlite3.Error as e:
+            print(
+                json.dumps({"error": f"記事ストア・検索インデックス・時系列への登録に失敗しました: {e}"}, ensure_ascii=False),
+                file=sys.stderr,
+            )
 
     print(f"変換完了: {json_path}")
     print(f"  記事数: {len(report['articles'])}")
@@ -223,4 +557,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
@@ -7,18 +7,38 @@ JSON形式で標準出力に出力する。
 
 使い方:
     python3 fetch_hatena_comments.py <記事URL>
+    python3 fetch_hatena_comments.py <記事URL> <記事URL> ... [--ndjson]
+    python3 fetch_hatena_comments.py --headlines <Headlines JSONのパス> [--ndjson]
 
 例:
     python3 fetch_hatena_comments.py "https://example.com/article"
 
+    # 複数URLをまとめて取得（URLをキーとした1つのJSONを出力）
+    python3 fetch_hatena_comments.py "https://example.com/a" "https://example.com/b"
+
+    # Headlines レポートのチェック済み記事をまとめて取得し、1行1レコードで出力
+    python3 fetch_hatena_comments.py --headlines 01.Trends/Headlines/2026-02/2026-02-11.json --ndjson
+
+NDJSONモード:
+    --ndjson を指定すると、ヘッダ・記事ごとの "article" レコード・その記事の
+    "comment" レコード（url 付き）・件数とエラーを持つトレーラーを1行ずつ出力する
+    （形式は ndjson_writer.py を参照）。記事の取得が終わるたびに書き出す。
+
 注意:
     User-Agentヘッダがないと空レスポンスが返るため必須。
+    複数URL指定時はホスト単位のレート制限付きで並列取得し、
+    URLごとのエラーは他のURLの結果に影響しない。
 """
 
 import sys
 import json
-import urllib.request
 import urllib.parse
+from datetime import datetime
+
+from fetch_scheduler import FetchScheduler
+from http_cache import cached_get
+from ndjson_writer import NdjsonWriter
+import profiling
 
 # ブコメ取得APIのベースURL
 HATENA_ENTRY_API = "https://b.hatena.ne.jp/entry/jsonlite/?url={encoded_url}"
@@ -43,12 +63,11 @@ def fetch_comments(article_url: str) -> dict:
     encoded_url = urllib.parse.quote(article_url, safe="")
     api_url = HATENA_ENTRY_API.format(encoded_url=encoded_url)
 
-    req = urllib.request.Request(api_url, headers={"User-Agent": USER_AGENT})
-    with urllib.request.urlopen(req, timeout=15) as response:
-        body = response.read().decode("utf-8")
-        # 空レスポンスの場合はブコメ0件として扱う
-        if not body.strip():
-            return None
+    body = cached_get(api_url, headers={"User-Agent": USER_AGENT}, timeout=15).decode("utf-8")
+    # 空レスポンスの場合はブコメ0件として扱う
+    if not body.strip():
+        return None
+    with profiling.stage("parse"):
         return json.loads(body)
 
 
@@ -81,9 +100,163 @@ def filter_comments(data: dict) -> list[dict]:
     return comments
 
 
+def build_result(article_url: str, raw_data: dict | None) -> dict:
+    """
+    APIレスポンスから出力用の結果辞書を組み立てる。
+
+    Args:
+        article_url: 対象の記事URL
+        raw_data: はてなブックマークAPIのレスポンス（ブコメ0件の場合は None）
+
+    Returns:
+        url / title / total_bookmarks / comments_count / comments を持つ辞書
+    """
+    comments = filter_comments(raw_data)
+    return {
+        "url": article_url,
+        "title": raw_data.get("title", "") if raw_data else "",
+        # countフィールドは文字列で返る場合があるためintに変換
+        "total_bookmarks": int(raw_data.get("count", 0)) if raw_data else 0,
+        "comments_count": len(comments),
+        "comments": comments,
+    }
+
+
+def fetch_result(article_url: str) -> dict:
+    """
+    記事URLのブコメを取得し、出力用の結果辞書を返す。
+
+    Args:
+        article_url: コメントを取得する対象の記事URL
+
+    Returns:
+        build_result と同じ形式の辞書
+    """
+    raw_data = fetch_comments(article_url)
+    with profiling.stage("format"):
+        return build_result(article_url, raw_data)
+
+
+def load_checked_urls(headlines_path: str) -> list[str]:
+    """
+    Headlines JSONからチェック済み記事のURLを読み込む。
+
+    Args:
+        headlines_path: Headlines JSONファイルのパス
+
+    Returns:
+        チェック済み記事のURLリスト（レポート内の順序）
+    """
+    with open(headlines_path, encoding="utf-8") as f:
+        report = json.load(f)
+    return [a["url"] for a in report.get("articles", []) if a.get("checked") and a.get("url")]
+
+
+def iter_batch_results(article_urls: list[str]):
+    """
+    複数URLのブコメを並列取得し、URLの指定順に結果を返すジェネレータ。
+
+    Args:
+        article_urls: 対象の記事URLリスト
+
+    Yields:
+        (記事URL, 結果辞書, エラーメッセージ) のタプル。成功時はエラーが None
+    """
+    jobs = (
+        (HATENA_ENTRY_API.format(encoded_url=urllib.parse.quote(url, safe="")), fetch_result, (url,))
+        for url in article_urls
+    )
+    scheduler = FetchScheduler()
+    for url, (result, error) in zip(article_urls, scheduler.iter_ordered(jobs)):
+        if error is not None:
+            yield url, None, f"ブコメ取得に失敗しました: {str(error)}"
+        else:
+            yield url, result, None
+
+
+def write_ndjson(article_urls: list[str]):
+    """
+    複数URLのブコメを取得し、記事の取得が終わるたびに記事・コメントのレコードをNDJSONで出力する。
+
+    Args:
+        article_urls: 対象の記事URLリスト
+    """
+    writer = NdjsonWriter("hatena_comments")
+    writer.header(fetched_at=datetime.now().isoformat(), total=len(article_urls))
+
+    for url, result, error in iter_batch_results(article_urls):
+        if error is not None:
+            writer.error({"url": url, "error": error})
+            continue
+        comments = result.pop("comments")
+        writer.record("article", result)
+        for comment in comments:
+            writer.record("comment", comment, url=url)
+
+    writer.trailer()
+
+
+def run_batch(article_urls: list[str], ndjson: bool):
+    """
+    複数URLのブコメを取得して標準出力に出力する。
+
+    Args:
+        article_urls: 対象の記事URLリスト
+        ndjson: True ならNDJSON（記事・コメントごとのレコード）、False ならURLをキーとした1つのJSON
+    """
+    if ndjson:
+        write_ndjson(article_urls)
+        return
+
+    results = {}
+    errors = {}
+    for url, result, error in iter_batch_results(article_urls):
+        if error is None:
+            results[url] = result
+        else:
+            errors[url] = error
+
+    output = {
+        "fetched_at": datetime.now().isoformat(),
+        "total": len(article_urls),
+        "succeeded": len(results),
+        "results": results,
+    }
+    if errors:
+        output["errors"] = errors
+
+    with profiling.stage("serialize"):
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+
+
 def main():
     """メイン処理: 記事URLのブコメを取得してJSONとして出力する。"""
-    if len(sys.argv) < 2:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    ndjson = "--ndjson" in sys.argv[1:]
+
+    # --headlines: Headlines JSONのチェック済み記事を対象にする
+    if "--headlines" in sys.argv[1:]:
+        value_index = sys.argv.index("--headlines") + 1
+        if value_index >= len(sys.argv):
+            print(
+                json.dumps({"error": "--headlines にはHeadlines JSONのパスを指定してください。"}, ensure_ascii=False),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        headlines_path = sys.argv[value_index]
+        args.remove(headlines_path)
+        try:
+            args.extend(load_checked_urls(headlines_path))
+        except (OSError, ValueError) as e:
+            print(
+                json.dumps({"error": f"Headlines JSONの読み込みに失敗しました: {str(e)}", "path": headlines_path}, ensure_ascii=False),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        run_batch(args, ndjson)
+        return
+
+    if len(args) < 1:
         print(
             json.dumps(
                 {"error": "記事URLを引数に指定してください。", "usage": "python3 fetch_hatena_comments.py <URL>"},
@@ -93,7 +266,12 @@ def main():
         )
         sys.exit(1)
 
-    article_url = sys.argv[1]
+    # 複数URL指定またはNDJSON指定時はバッチモード
+    if len(args) > 1 or ndjson:
+        run_batch(args, ndjson)
+        return
+
+    article_url = args[0]
 
     try:
         raw_data = fetch_comments(article_url)
@@ -104,20 +282,12 @@ def main():
         )
         sys.exit(1)
 
-    comments = filter_comments(raw_data)
-
     # 結果をJSON出力
-    result = {
-        "url": article_url,
-        "title": raw_data.get("title", "") if raw_data else "",
-        # countフィールドは文字列で返る場合があるためintに変換
-        "total_bookmarks": int(raw_data.get("count", 0)) if raw_data else 0,
-        "comments_count": len(comments),
-        "comments": comments,
-    }
-
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    with profiling.stage("format"):
+        result = build_result(article_url, raw_data)
+    with profiling.stage("serialize"):
+        print(json.dumps(result, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -6,11 +6,26 @@
 JSON形式で標準出力に出力する。
 
 使い方:
-    python3 fetch_hatena_rss.py [カテゴリ...]
+    python3 fetch_hatena_rss.py [カテゴリ...] [--full] [--ndjson]
 
 例:
     python3 fetch_hatena_rss.py it knowledge economics
 
+    # 前回実行との差分ではなく全件を出力
+    python3 fetch_hatena_rss.py --full
+
+    # カテゴリごとに取得でき次第、1行1記事で出力
+    python3 fetch_hatena_rss.py --ndjson
+
+差分モード:
+    デフォルトでは前回実行以降に新しく現れた（または日付が変わった）記事のみを出力する。
+    既読セットは fetch_state.py が管理する。--full を指定すると全件を出力し、既読セットも更新しない。
+
+NDJSONモード:
+    --ndjson を指定すると、ヘッダ・記事ごとのレコード・件数とエラーを持つトレーラーを
+    1行ずつ出力する（形式は ndjson_writer.py を参照）。カテゴリの取得が終わるたびに
+    その記事を書き出すため、後段の処理は全カテゴリの取得完了を待たずに読み始められる。
+
 カテゴリ一覧:
     it           - テクノロジー
     knowledge    - 学び
@@ -21,11 +36,15 @@ JSON形式で標準出力に出力する。
 
 import sys
 import json
-import time
-import urllib.request
-import xml.etree.ElementTree as ET
 from datetime import datetime
 
+from fetch_scheduler import FetchScheduler
+from fetch_state import commit_state, select_changed
+from http_cache import cached_stream
+from ndjson_writer import NdjsonWriter
+import profiling
+from xml_stream import iter_elements
+
 # RSSフィードのベースURL
 HATENA_RSS_BASE = "https://b.hatena.ne.jp/hotentry/{category}.rss"
 
@@ -49,23 +68,21 @@ NAMESPACES = {
 }
 
 
-def fetch_rss(category: str) -> str:
+def fetch_rss_stream(category: str):
     """
-    指定カテゴリのはてなブックマークRSSフィードを取得する。
+    指定カテゴリのはてなブックマークRSSフィードをチャンク単位で取得する。
 
     Args:
         category: はてなブックマークのカテゴリ名
 
     Returns:
-        RSSフィードのXML文字列
+        RSSフィード本文（bytes）のチャンクを返すイテレータ
 
     Raises:
         urllib.error.URLError: HTTPリクエスト失敗時
     """
     url = HATENA_RSS_BASE.format(category=category)
-    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-    with urllib.request.urlopen(req, timeout=15) as response:
-        return response.read().decode("utf-8")
+    return cached_stream(url, headers={"User-Agent": USER_AGENT}, timeout=15)
 
 
 def parse_rss(xml_text: str, category: str) -> list[dict]:
@@ -79,11 +96,23 @@ def parse_rss(xml_text: str, category: str) -> list[dict]:
     Returns:
         記事情報の辞書リスト
     """
-    root = ET.fromstring(xml_text)
-    articles = []
+    return list(iter_rss_items([xml_text], category))
+
+
+def iter_rss_items(chunks, category: str):
+    """
+    RSSフィードをストリーミングでパースし、itemが閉じるたびに記事情報を返す。
+
+    Args:
+        chunks: RSSフィード本文のチャンク（bytes または str）のイテラブル
+        category: 記事が属するカテゴリ名
 
-    # RSS 1.0形式のitemを取得
-    for item in root.findall("rss:item", NAMESPACES):
+    Yields:
+        記事情報の辞書
+    """
+    # RSS 1.0形式のitemはルート（rdf:RDF）直下に並ぶ
+    item_tag = f"{{{NAMESPACES['rss']}}}item"
+    for item in iter_elements(chunks, item_tag, depth=2):
         title = item.find("rss:title", NAMESPACES)
         link = item.find("rss:link", NAMESPACES)
         description = item.find("rss:description", NAMESPACES)
@@ -105,44 +134,73 @@ def parse_rss(xml_text: str, category: str) -> list[dict]:
             "category": category,
             "description": description.text if description is not None and description.text else "",
         }
-        articles.append(article)
+        yield article
 
-    return articles
 
+def fetch_articles(category: str) -> list[dict]:
+    """
+    指定カテゴリのRSSを取得し、記事情報のリストに変換する。
 
-def main():
-    """メイン処理: カテゴリごとにRSSを取得してJSONとして出力する。"""
-    # コマンドライン引数からカテゴリを取得（なければデフォルト）
-    categories = sys.argv[1:] if len(sys.argv) > 1 else DEFAULT_CATEGORIES
+    Args:
+        category: はてなブックマークのカテゴリ名
 
-    # 無効なカテゴリのチェック
-    for cat in categories:
-        if cat not in VALID_CATEGORIES:
-            print(
-                json.dumps(
-                    {"error": f"無効なカテゴリ: {cat}", "valid_categories": VALID_CATEGORIES},
-                    ensure_ascii=False,
-                ),
-                file=sys.stderr,
-            )
-            sys.exit(1)
+    Returns:
+        記事情報の辞書リスト
+    """
+    return list(iter_rss_items(fetch_rss_stream(category), category))
+
+
+def iter_category_articles(categories: list[str], scheduler: FetchScheduler | None = None):
+    """
+    複数カテゴリのRSSを並列取得し、カテゴリの順に取得結果を返すジェネレータ。
 
+    Args:
+        categories: はてなブックマークのカテゴリ名リスト
+        scheduler: 共有するスケジューラ（省略時は新規作成）
+
+    Yields:
+        (カテゴリ名, 記事情報の辞書リスト, 例外) のタプル。成功時は例外が None、失敗時は記事リストが None
+    """
+    # カテゴリごとのRSSを並列取得（レート制限はスケジューラがホスト単位で行う）
+    jobs = [
+        (HATENA_RSS_BASE.format(category=category), fetch_articles, (category,))
+        for category in categories
+    ]
+    results = (scheduler or FetchScheduler()).iter_ordered(jobs, window=len(jobs))
+    for category, (articles, error) in zip(categories, results):
+        yield category, articles, error
+
+
+def collect_articles(
+    categories: list[str], scheduler: FetchScheduler | None = None, since_last_run: bool = False
+) -> dict:
+    """
+    複数カテゴリのRSSを並列取得し、出力用の結果辞書にまとめる。
+
+    Args:
+        categories: はてなブックマークのカテゴリ名リスト
+        scheduler: 共有するスケジューラ（省略時は新規作成）
+        since_last_run: True なら前回実行以降の新規・変化分のみに絞り込む
+            （既読セットは保存しない。出力後に呼び出し側で commit_state("hatena_rss") を呼ぶ）
+
+    Returns:
+        fetched_at / categories / total / articles（エラー時は errors、
+        差分モード時は total_fetched も）を持つ辞書
+    """
     all_articles = []
     errors = []
 
-    for i, category in enumerate(categories):
-        # カテゴリ間でレート制限対策のスリープ
-        if i > 0:
-            time.sleep(1)
+    for category, articles, error in iter_category_articles(categories, scheduler):
+        if error is not None:
+            errors.append({"category": category, "error": str(error)})
+            continue
+        all_articles.extend(articles)
 
-        try:
-            xml_text = fetch_rss(category)
-            articles = parse_rss(xml_text, category)
-            all_articles.extend(articles)
-        except Exception as e:
-            errors.append({"category": category, "error": str(e)})
+    # 差分モード: 前回実行以降の新規・日付変化分のみ
+    total_fetched = len(all_articles)
+    if since_last_run:
+        all_articles = select_changed("hatena_rss", all_articles, commit=False)
 
-    # 結果をJSON出力
     result = {
         "fetched_at": datetime.now().isoformat(),
         "categories": categories,
@@ -150,12 +208,75 @@ def main():
         "articles": all_articles,
     }
 
+    if since_last_run:
+        result["total_fetched"] = total_fetched
+
     # エラーがあった場合は含める
     if errors:
         result["errors"] = errors
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+
+def write_ndjson(categories: list[str], since_last_run: bool = False):
+    """
+    複数カテゴリのRSSを取得し、カテゴリの取得が終わるたびに記事をNDJSONで出力する。
+
+    Args:
+        categories: はてなブックマークのカテゴリ名リスト
+        since_last_run: True なら前回実行以降の新規・変化分のみに絞り込む
+    """
+    writer = NdjsonWriter("hatena_rss")
+    writer.header(fetched_at=datetime.now().isoformat(), categories=categories, since_last_run=since_last_run)
+
+    total_fetched = 0
+    for category, articles, error in iter_category_articles(categories):
+        if error is not None:
+            writer.error({"category": category, "error": str(error)})
+            continue
+        total_fetched += len(articles)
+        # 差分モード: 既読セットはカテゴリごとに照合・更新する
+        if since_last_run:
+            articles = select_changed("hatena_rss", articles, commit=False)
+        for article in articles:
+            writer.record("article", article)
+
+    writer.trailer(total_fetched=total_fetched)
+    # 既読セットは出力し終えてから保存する
+    if since_last_run:
+        commit_state("hatena_rss")
+
+
+def main():
+    """メイン処理: カテゴリごとにRSSを取得してJSONとして出力する。"""
+    # コマンドライン引数からカテゴリを取得（なければデフォルト）
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    full = "--full" in sys.argv[1:]
+    ndjson = "--ndjson" in sys.argv[1:]
+    categories = args if args else DEFAULT_CATEGORIES
+
+    # 無効なカテゴリのチェック
+    for cat in categories:
+        if cat not in VALID_CATEGORIES:
+            print(
+                json.dumps(
+                    {"error": f"無効なカテゴリ: {cat}", "valid_categories": VALID_CATEGORIES},
+                    ensure_ascii=False,
+                ),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+    if ndjson:
+        write_ndjson(categories, since_last_run=not full)
+        return
+
+    result = collect_articles(categories, since_last_run=not full)
+    with profiling.stage("serialize"):
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not full:
+        commit_state("hatena_rss")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -6,23 +6,38 @@ Reddit コメント取得スクリプト
 JSON形式で標準出力に出力する。
 
 使い方:
-    python3 fetch_reddit_comments.py <Reddit投稿URL>
+    python3 fetch_reddit_comments.py <Reddit投稿URL> [--expand-more] [--max-comments N] [--concurrency N] [--ndjson]
 
 例:
     python3 fetch_reddit_comments.py "https://www.reddit.com/r/programming/comments/xxxxx/title/"
     python3 fetch_reddit_comments.py "https://old.reddit.com/r/programming/comments/xxxxx/title/"
 
+    # 「more」スタブを展開して省略されたコメントも取得（最大1000件）
+    python3 fetch_reddit_comments.py "https://www.reddit.com/r/programming/comments/xxxxx/title/" --expand-more --max-comments 1000
+
+    # 1行1コメントのNDJSONで出力
+    python3 fetch_reddit_comments.py "https://www.reddit.com/r/programming/comments/xxxxx/title/" --ndjson
+
 注意:
     - WebFetchはreddit.comをブロックするためこのスクリプトを使用する
     - User-Agentヘッダを必ず付与する
     - ネストされた返信コメントもフラット化して取得する
     - スコア順（best）でソートして取得する
+    - --expand-more 指定時は「more」スタブのIDを morechildren API でバッチ取得し、
+      正しい深さでコメントツリーに合流させる（同時実行数・総コメント数の上限付き）
+    - --ndjson 指定時は、投稿情報を持つヘッダ・コメントごとのレコード・件数とエラーを持つ
+      トレーラーを1行ずつ出力する（形式は ndjson_writer.py を参照）。コメントツリーを
+      たどりながら書き出すため、フラット化したリストを作らない
 """
 
 import sys
 import json
 import re
-import urllib.request
+
+from fetch_scheduler import FetchScheduler
+from http_cache import cached_get
+from ndjson_writer import NdjsonWriter
+import profiling
 
 # User-Agentヘッダ（必須）
 USER_AGENT = "knowledge-hub/0.1"
@@ -31,6 +46,18 @@ USER_AGENT = "knowledge-hub/0.1"
 # limit=200でトップレベル+ネスト含め十分なコメント数を取得できる
 COMMENT_LIMIT = 200
 
+# 「more」スタブ展開用のAPI
+MORECHILDREN_API = "https://old.reddit.com/api/morechildren.json"
+
+# morechildren API 1リクエストあたりのID数（APIの上限）
+MORECHILDREN_BATCH_SIZE = 100
+
+# 「more」スタブ展開時の同時リクエスト数
+DEFAULT_MORE_CONCURRENCY = 2
+
+# 「more」スタブ展開時の総コメント数の上限
+DEFAULT_MAX_COMMENTS = 2000
+
 
 def extract_post_info(url: str) -> tuple[str, str]:
     """
@@ -77,15 +104,85 @@ def fetch_post_and_comments(subreddit: str, post_id: str) -> list:
         f".json?limit={COMMENT_LIMIT}&sort=best"
     )
 
-    req = urllib.request.Request(
+    body = cached_get(
         api_url,
         headers={
             "User-Agent": USER_AGENT,
             "Accept": "application/json",
         },
+        timeout=30,
     )
-    with urllib.request.urlopen(req, timeout=30) as response:
-        return json.loads(response.read().decode("utf-8"))
+    with profiling.stage("parse"):
+        return json.loads(body.decode("utf-8"))
+
+
+def format_comment(data: dict, depth: int) -> dict:
+    """
+    コメントデータを統一フォーマットに変換する。
+
+    Args:
+        data: Reddit APIからのコメントデータ（kind='t1' の data）
+        depth: ネスト深度
+
+    Returns:
+        整形されたコメント辞書
+    """
+    return {
+        "user": data.get("author", "[deleted]"),
+        "comment": data.get("body", ""),
+        "score": data.get("score", 0),
+        "depth": depth,
+        "comment_id": data.get("id", ""),
+        "permalink": (
+            f"https://www.reddit.com{data['permalink']}"
+            if data.get("permalink")
+            else ""
+        ),
+        "created_utc": data.get("created_utc", 0),
+    }
+
+
+def _reply_children(data: dict) -> list:
+    """コメントデータの返信リストを返す（返信がなければ空リスト）。"""
+    replies = data.get("replies", "")
+    if isinstance(replies, dict):
+        return replies.get("data", {}).get("children", [])
+    return []
+
+
+def iter_comments(children: list, depth: int = 0):
+    """
+    ネストされたRedditコメントツリーを深さ優先でたどり、コメントを1件ずつ返す。
+
+    再帰を使わず明示的なスタックでたどるため、深いスレッドでも
+    再帰上限に達せず、階層ごとのリストのコピーも発生しない。
+
+    Args:
+        children: コメントの子要素リスト
+        depth: 最上位のネスト深度
+
+    Yields:
+        整形されたコメント辞書
+    """
+    stack = [(iter(children), depth)]
+    while stack:
+        child_iter, current_depth = stack[-1]
+        child = next(child_iter, None)
+        if child is None:
+            stack.pop()
+            continue
+
+        # kind='t1' がコメント、'more' は追加コメントの参照
+        if child["kind"] != "t1":
+            continue
+
+        data = child["data"]
+        yield format_comment(data, current_depth)
+
+        # ネストされた返信は次にたどる
+        reply_children = _reply_children(data)
+        if reply_children:
+            stack.append((iter(reply_children), current_depth + 1))
 
 
 def flatten_comments(children: list, depth: int = 0) -> list[dict]:
@@ -99,35 +196,132 @@ def flatten_comments(children: list, depth: int = 0) -> list[dict]:
     Returns:
         フラット化されたコメント辞書のリスト
     """
-    result = []
-    for child in children:
-        # kind='t1' がコメント、'more' は追加コメントの参照
-        if child["kind"] != "t1":
-            continue
+    return list(iter_comments(children, depth))
 
-        data = child["data"]
-        comment = {
-            "user": data.get("author", "[deleted]"),
-            "comment": data.get("body", ""),
-            "score": data.get("score", 0),
-            "depth": depth,
-            "comment_id": data.get("id", ""),
-            "permalink": (
-                f"https://www.reddit.com{data['permalink']}"
-                if data.get("permalink")
-                else ""
-            ),
-            "created_utc": data.get("created_utc", 0),
-        }
-        result.append(comment)
 
-        # ネストされた返信を再帰的に処理
-        replies = data.get("replies", "")
-        if isinstance(replies, dict):
-            reply_children = replies.get("data", {}).get("children", [])
-            result.extend(flatten_comments(reply_children, depth + 1))
+def fetch_more_children(post_id: str, comment_ids: list[str]) -> list[dict]:
+    """
+    morechildren APIで「more」スタブに含まれるコメントを取得する。
 
-    return result
+    Args:
+        post_id: 投稿ID
+        comment_ids: 取得するコメントIDのリスト（最大 MORECHILDREN_BATCH_SIZE 件）
+
+    Returns:
+        コメント要素（kind + data）のリスト。親子関係は data.parent_id で表される
+
+    Raises:
+        urllib.error.HTTPError: APIリクエスト失敗時
+    """
+    body = cached_get(
+        more_children_url(post_id, comment_ids),
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/json",
+        },
+        timeout=30,
+    )
+    with profiling.stage("parse"):
+        data = json.loads(body.decode("utf-8"))
+    return data.get("json", {}).get("data", {}).get("things", [])
+
+
+def more_children_url(post_id: str, comment_ids: list[str]) -> str:
+    """
+    morechildren APIのURLを組み立てる。
+
+    Args:
+        post_id: 投稿ID
+        comment_ids: 取得するコメントIDのリスト
+
+    Returns:
+        APIのURL
+    """
+    return (
+        f"{MORECHILDREN_API}?api_type=json&link_id=t3_{post_id}"
+        f"&children={','.join(comment_ids)}&limit_children=false&sort=best"
+    )
+
+
+def _register_replies(child: dict, index: dict[str, list]):
+    """t1 要素の返信リストを用意し、フルネーム（t1_xxx）で索引に登録する。"""
+    data = child["data"]
+    if not isinstance(data.get("replies"), dict):
+        data["replies"] = {"kind": "Listing", "data": {"children": []}}
+    fullname = data.get("name") or f"t1_{data.get('id', '')}"
+    index[fullname] = data["replies"]["data"]["children"]
+
+
+def _more_ids(child: dict) -> list[str]:
+    """「more」スタブから展開可能なコメントIDを取り出す（続きスレッドへのリンクは除く）。"""
+    return [cid for cid in child["data"].get("children", []) if cid and cid != "_"]
+
+
+def expand_more_comments(
+    post_id: str,
+    children: list,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    concurrency: int = DEFAULT_MORE_CONCURRENCY,
+) -> list:
+    """
+    コメントツリー中の「more」スタブを morechildren API で展開し、ツリーに合流させる。
+
+    取得したコメントは parent_id が指す親の返信リストに追加するため、
+    展開後のツリーを flatten_comments に渡せば正しい深さでフラット化される。
+    展開結果に新たな「more」スタブが含まれていれば、上限に達するまで繰り返し展開する。
+
+    Args:
+        post_id: 投稿ID
+        children: 最上位のコメント子要素リスト（この中身を直接更新する）
+        max_comments: 展開後の総コメント数の上限
+        concurrency: 同時リクエスト数の上限
+
+    Returns:
+        展開後の最上位のコメント子要素リスト（children と同じオブジェクト）
+    """
+    # フルネーム -> 返信リスト の索引と、未展開の「more」IDを集める
+    index: dict[str, list] = {f"t3_{post_id}": children}
+    pending_ids: list[str] = []
+    comment_count = 0
+    stack = [children]
+    while stack:
+        for child in stack.pop():
+            if child["kind"] == "more":
+                pending_ids.extend(_more_ids(child))
+            elif child["kind"] == "t1":
+                comment_count += 1
+                _register_replies(child, index)
+                stack.append(_reply_children(child["data"]))
+
+    scheduler = FetchScheduler(max_workers=concurrency, max_in_flight=concurrency)
+    while pending_ids and comment_count < max_comments:
+        # 上限を超えないよう、今回展開するIDを残り枠に収める
+        round_ids = pending_ids[: max_comments - comment_count]
+        pending_ids = []
+        batches = [
+            round_ids[i : i + MORECHILDREN_BATCH_SIZE]
+            for i in range(0, len(round_ids), MORECHILDREN_BATCH_SIZE)
+        ]
+        jobs = [(more_children_url(post_id, batch), fetch_more_children, (post_id, batch)) for batch in batches]
+
+        for things, error in scheduler.run(jobs):
+            if error is not None:
+                raise error
+            # 親が先に返される（深さ優先順）ため、順に親の返信リストへ追加できる
+            for thing in things:
+                parent_list = index.get(thing.get("data", {}).get("parent_id", ""))
+                if parent_list is None:
+                    continue
+                if thing["kind"] == "more":
+                    pending_ids.extend(_more_ids(thing))
+                    continue
+                if thing["kind"] != "t1" or comment_count >= max_comments:
+                    continue
+                parent_list.append(thing)
+                _register_replies(thing, index)
+                comment_count += 1
+
+    return children
 
 
 def format_post(post_data: dict) -> dict:
@@ -159,14 +353,66 @@ def format_post(post_data: dict) -> dict:
     }
 
 
+def write_ndjson(post_url: str, subreddit: str, post_info: dict, comment_children: list, errors: list[dict]):
+    """
+    投稿情報をヘッダに、コメントを1行1件のNDJSONとして標準出力へ書き出す。
+
+    Args:
+        post_url: Reddit投稿URL
+        subreddit: subreddit名（r/なし）
+        post_info: format_post で整形した投稿情報
+        comment_children: コメントツリーの最上位の子要素リスト
+        errors: 「more」展開時のエラー（トレーラーに含める）
+    """
+    writer = NdjsonWriter("reddit_comments")
+    writer.header(
+        url=post_url,
+        subreddit=f"r/{subreddit}",
+        post=post_info,
+        total_comments=post_info["num_comments"],
+    )
+    for error in errors:
+        writer.error(error)
+
+    for comment in iter_comments(comment_children):
+        writer.record("comment", comment)
+
+    writer.trailer()
+
+
 def main():
     """メイン処理: Reddit投稿URLのコメントを取得してJSONとして出力する。"""
-    if len(sys.argv) < 2:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    expand_more = "--expand-more" in sys.argv[1:]
+    ndjson = "--ndjson" in sys.argv[1:]
+    max_comments = DEFAULT_MAX_COMMENTS
+    concurrency = DEFAULT_MORE_CONCURRENCY
+    for flag in ("--max-comments", "--concurrency"):
+        if flag in sys.argv[1:]:
+            value_index = sys.argv.index(flag) + 1
+            value = sys.argv[value_index] if value_index < len(sys.argv) else ""
+            number = int(value) if re.fullmatch(r"\d+", value) else 0
+            if number < 1:
+                print(
+                    json.dumps(
+                        {"error": f"{flag} には1以上の整数を指定してください: {value}"},
+                        ensure_ascii=False,
+                    ),
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            if flag == "--max-comments":
+                max_comments = number
+            else:
+                concurrency = number
+            args.remove(value)
+
+    if not args:
         print(
             json.dumps(
                 {
                     "error": "Reddit投稿URLを引数に指定してください。",
-                    "usage": "python3 fetch_reddit_comments.py <URL>",
+                    "usage": "python3 fetch_reddit_comments.py <URL> [--expand-more] [--max-comments N] [--concurrency N] [--ndjson]",
                 },
                 ensure_ascii=False,
             ),
@@ -174,7 +420,7 @@ def main():
         )
         sys.exit(1)
 
-    post_url = sys.argv[1]
+    post_url = args[0]
 
     # 投稿情報の抽出
     try:
@@ -206,11 +452,27 @@ def main():
         sys.exit(1)
 
     # 投稿情報の整形
-    post_info = format_post(raw_data[0]["data"]["children"][0]["data"])
+    with profiling.stage("format"):
+        post_info = format_post(raw_data[0]["data"]["children"][0]["data"])
 
-    # コメントのフラット化
+    # 「more」スタブの展開（オプトイン）
     comment_children = raw_data[1]["data"]["children"]
-    comments = flatten_comments(comment_children)
+    errors = []
+    if expand_more:
+        try:
+            expand_more_comments(post_id, comment_children, max_comments=max_comments, concurrency=concurrency)
+        except Exception as e:
+            # 展開に失敗しても取得済みのコメントは出力する
+            errors.append({"stage": "expand_more", "error": str(e)})
+
+    # NDJSONモード: ツリーをたどりながら1件ずつ出力
+    if ndjson:
+        write_ndjson(post_url, subreddit, post_info, comment_children, errors)
+        return
+
+    # コメントのフラット化
+    with profiling.stage("format"):
+        comments = flatten_comments(comment_children)
 
     # 結果をJSON出力
     result = {
@@ -222,8 +484,12 @@ def main():
         "comments": comments,
     }
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if errors:
+        result["errors"] = errors
+
+    with profiling.stage("serialize"):
+        print(json.dumps(result, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -6,7 +6,7 @@ Reddit ホット投稿取得スクリプト
 JSON形式で標準出力に出力する。
 
 使い方:
-    python3 fetch_reddit_hot.py [subreddit...]
+    python3 fetch_reddit_hot.py [subreddit...] [--full] [--ndjson]
 
 例:
     # デフォルトのsubredditから取得
@@ -15,22 +15,42 @@ JSON形式で標準出力に出力する。
     # 特定のsubredditから取得
     python3 fetch_reddit_hot.py programming webdev nextjs
 
+    # subredditごとに取得でき次第、1行1投稿で出力
+    python3 fetch_reddit_hot.py --ndjson
+
 デフォルトsubreddit:
     programming, webdev, nextjs, vuejs, LocalLLaMA, ClaudeAI
+
+差分モード:
+    デフォルトでは前回実行以降の新規投稿と、スコアが SCORE_CHANGE_THRESHOLD 以上
+    動いた投稿のみを出力する。既読セットは fetch_state.py が管理する。
+    --full を指定すると全件を出力し、既読セットも更新しない。
+
+NDJSONモード:
+    --ndjson を指定すると、ヘッダ・投稿ごとのレコード・件数とエラーを持つトレーラーを
+    1行ずつ出力する（形式は ndjson_writer.py を参照）。subredditの取得が終わるたびに
+    その投稿を書き出す。
 """
 
 import sys
 import json
-import time
-import urllib.request
 from datetime import datetime
 
+from fetch_scheduler import FetchScheduler
+from fetch_state import commit_state, select_changed
+from http_cache import cached_get
+from ndjson_writer import NdjsonWriter
+import profiling
+
 # User-Agentヘッダ（必須）
 USER_AGENT = "knowledge-hub/0.1"
 
 # 1サブレッドあたりの取得件数
 POSTS_PER_SUBREDDIT = 10
 
+# 差分モードで再出力するスコア変化量のしきい値
+SCORE_CHANGE_THRESHOLD = 50
+
 # デフォルトのsubredditリスト（PROFILE.mdの興味領域に対応）
 DEFAULT_SUBREDDITS = [
     "programming",   # プログラミング全般
@@ -42,6 +62,23 @@ DEFAULT_SUBREDDITS = [
 ]
 
 
+def hot_posts_url(subreddit: str, limit: int = POSTS_PER_SUBREDDIT) -> str:
+    """
+    指定subredditのホット投稿APIのURLを組み立てる。
+
+    Args:
+        subreddit: subreddit名（r/なし）
+        limit: 取得する投稿数
+
+    Returns:
+        APIのURL
+    """
+    return (
+        f"https://old.reddit.com/r/{subreddit}/hot.json"
+        f"?limit={limit}&t=day"
+    )
+
+
 def fetch_hot_posts(subreddit: str, limit: int = POSTS_PER_SUBREDDIT) -> list:
     """
     指定subredditのホット投稿をJSON APIから取得する。
@@ -56,21 +93,19 @@ def fetch_hot_posts(subreddit: str, limit: int = POSTS_PER_SUBREDDIT) -> list:
     Raises:
         urllib.error.HTTPError: APIリクエスト失敗時
     """
-    api_url = (
-        f"https://old.reddit.com/r/{subreddit}/hot.json"
-        f"?limit={limit}&t=day"
-    )
+    api_url = hot_posts_url(subreddit, limit)
 
-    req = urllib.request.Request(
+    body = cached_get(
         api_url,
         headers={
             "User-Agent": USER_AGENT,
             "Accept": "application/json",
         },
+        timeout=30,
     )
-    with urllib.request.urlopen(req, timeout=30) as response:
-        data = json.loads(response.read().decode("utf-8"))
-        return data.get("data", {}).get("children", [])
+    with profiling.stage("parse"):
+        data = json.loads(body.decode("utf-8"))
+    return data.get("data", {}).get("children", [])
 
 
 def format_post(child: dict, subreddit: str) -> dict:
@@ -103,33 +138,100 @@ def format_post(child: dict, subreddit: str) -> dict:
     }
 
 
-def main():
-    """メイン処理: subredditごとにホット投稿を取得してJSONとして出力する。"""
-    # コマンドライン引数からsubredditを取得（なければデフォルト）
-    subreddits = sys.argv[1:] if len(sys.argv) > 1 else DEFAULT_SUBREDDITS
+def fetch_subreddit_posts(subreddit: str) -> list[dict]:
+    """
+    指定subredditのホット投稿を取得し、ピン留めを除いた整形済み投稿リストを返す。
+
+    Args:
+        subreddit: subreddit名（r/なし）
+
+    Returns:
+        整形された投稿辞書のリスト
+    """
+    posts = []
+    for child in fetch_hot_posts(subreddit):
+        if child.get("kind") != "t3":
+            continue
+        with profiling.stage("format"):
+            post = format_post(child, subreddit)
+        # ピン留め投稿はスキップ
+        if post["stickied"]:
+            continue
+        posts.append(post)
+    return posts
+
+
+def iter_subreddit_posts(subreddits: list[str], scheduler: FetchScheduler | None = None):
+    """
+    複数subredditのホット投稿を並列取得し、subredditの順に取得結果を返すジェネレータ。
+
+    Args:
+        subreddits: subreddit名（r/なし）のリスト
+        scheduler: 共有するスケジューラ（省略時は新規作成）
+
+    Yields:
+        (subreddit名, 投稿辞書のリスト, 例外) のタプル。成功時は例外が None、失敗時は投稿リストが None
+    """
+    # subredditごとのホット投稿を並列取得（レート制限はスケジューラがホスト単位で行う）
+    jobs = [(hot_posts_url(s), fetch_subreddit_posts, (s,)) for s in subreddits]
+    results = (scheduler or FetchScheduler()).iter_ordered(jobs, window=len(jobs))
+    for subreddit, (posts, error) in zip(subreddits, results):
+        yield subreddit, posts, error
+
+
+def select_changed_posts(posts: list[dict]) -> list[dict]:
+    """
+    前回実行以降の新規投稿と、スコアが大きく動いた投稿だけを取り出す。
+
+    同じURLへのリンク投稿が複数ありうるため permalink で識別する。
 
+    Args:
+        posts: 整形された投稿辞書のリスト
+
+    Returns:
+        新規または変化のあった投稿のリスト
+    """
+    return select_changed(
+        "reddit_hot",
+        posts,
+        key_field="permalink",
+        date_field="created_utc",
+        score_field="score",
+        score_threshold=SCORE_CHANGE_THRESHOLD,
+        commit=False,
+    )
+
+
+def collect_posts(
+    subreddits: list[str], scheduler: FetchScheduler | None = None, since_last_run: bool = False
+) -> dict:
+    """
+    複数subredditのホット投稿を並列取得し、出力用の結果辞書にまとめる。
+
+    Args:
+        subreddits: subreddit名（r/なし）のリスト
+        scheduler: 共有するスケジューラ（省略時は新規作成）
+        since_last_run: True なら前回実行以降の新規・スコア変化分のみに絞り込む
+            （既読セットは保存しない。出力後に呼び出し側で commit_state("reddit_hot") を呼ぶ）
+
+    Returns:
+        fetched_at / subreddits / total / articles（エラー時は errors、
+        差分モード時は total_fetched も）を持つ辞書
+    """
     all_posts = []
     errors = []
 
-    for i, subreddit in enumerate(subreddits):
-        # subreddit間でレート制限対策のスリープ
-        if i > 0:
-            time.sleep(1)
-
-        try:
-            children = fetch_hot_posts(subreddit)
-            for child in children:
-                if child.get("kind") != "t3":
-                    continue
-                post = format_post(child, subreddit)
-                # ピン留め投稿はスキップ
-                if post["stickied"]:
-                    continue
-                all_posts.append(post)
-        except Exception as e:
-            errors.append({"subreddit": f"r/{subreddit}", "error": str(e)})
-
-    # 結果をJSON出力
+    for subreddit, posts, error in iter_subreddit_posts(subreddits, scheduler):
+        if error is not None:
+            errors.append({"subreddit": f"r/{subreddit}", "error": str(error)})
+            continue
+        all_posts.extend(posts)
+
+    # 差分モード: 前回実行以降の新規・スコア変化分のみ
+    total_fetched = len(all_posts)
+    if since_last_run:
+        all_posts = select_changed_posts(all_posts)
+
     result = {
         "fetched_at": datetime.now().isoformat(),
         "subreddits": [f"r/{s}" for s in subreddits],
@@ -137,11 +239,66 @@ def main():
         "articles": all_posts,
     }
 
+    if since_last_run:
+        result["total_fetched"] = total_fetched
+
     if errors:
         result["errors"] = errors
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+
+def write_ndjson(subreddits: list[str], since_last_run: bool = False):
+    """
+    複数subredditのホット投稿を取得し、subredditの取得が終わるたびに投稿をNDJSONで出力する。
+
+    Args:
+        subreddits: subreddit名（r/なし）のリスト
+        since_last_run: True なら前回実行以降の新規・スコア変化分のみに絞り込む
+    """
+    writer = NdjsonWriter("reddit_hot")
+    writer.header(
+        fetched_at=datetime.now().isoformat(),
+        subreddits=[f"r/{s}" for s in subreddits],
+        since_last_run=since_last_run,
+    )
+
+    total_fetched = 0
+    for subreddit, posts, error in iter_subreddit_posts(subreddits):
+        if error is not None:
+            writer.error({"subreddit": f"r/{subreddit}", "error": str(error)})
+            continue
+        total_fetched += len(posts)
+        # 差分モード: 既読セットはsubredditごとに照合・更新する
+        if since_last_run:
+            posts = select_changed_posts(posts)
+        for post in posts:
+            writer.record("article", post)
+
+    writer.trailer(total_fetched=total_fetched)
+    # 既読セットは出力し終えてから保存する
+    if since_last_run:
+        commit_state("reddit_hot")
+
+
+def main():
+    """メイン処理: subredditごとにホット投稿を取得してJSONとして出力する。"""
+    # コマンドライン引数からsubredditを取得（なければデフォルト）
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    full = "--full" in sys.argv[1:]
+    ndjson = "--ndjson" in sys.argv[1:]
+    subreddits = args if args else DEFAULT_SUBREDDITS
+
+    if ndjson:
+        write_ndjson(subreddits, since_last_run=not full)
+        return
+
+    result = collect_posts(subreddits, since_last_run=not full)
+    with profiling.stage("serialize"):
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not full:
+        commit_state("reddit_hot")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
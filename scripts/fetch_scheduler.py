@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+並列フェッチスケジューラ
+
+fetch_*.py スクリプトで共有する、ホスト単位のレート制限付き並列実行モジュール。
+リクエスト間の固定スリープの代わりに、ホストごとに
+「1秒あたりのリクエスト数」と「同時実行数」の上限を設けて並列に取得する。
+異なるホストへのリクエストは互いに待たないため、全体の所要時間は
+最も遅いホストの所要時間で決まる。
+
+サーバーがレート制限ヘッダで残り枠を通知しているホスト（throttle.py 参照）は、
+枠が残っている間は固定の開始間隔を空けずに同時実行数の上限まで取得する。
+
+使い方:
+    from fetch_scheduler import FetchScheduler
+
+    scheduler = FetchScheduler()
+    jobs = [(url, fetch_func, (arg,)) for url, arg in targets]
+    for value, error in scheduler.run(jobs):
+        ...
+"""
+
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+import throttle
+
+# 全体のワーカースレッド数
+DEFAULT_MAX_WORKERS = 8
+
+# ホストごとの1秒あたりの最大リクエスト開始数（従来の1秒スリープ相当）
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+
+# ホストごとの最大同時リクエスト数
+DEFAULT_MAX_IN_FLIGHT = 2
+
+
+def host_of(url: str) -> str:
+    """
+    URLからレート制限の単位となるホスト名を取り出す。
+
+    Args:
+        url: リクエスト先のURL
+
+    Returns:
+        小文字化したホスト名（取り出せない場合は空文字）
+    """
+    return (urllib.parse.urlsplit(url).hostname or "").lower()
+
+
+class HostLimiter:
+    """1ホスト分のレート制限（開始間隔）と同時実行数制限を管理する。"""
+
+    def __init__(self, host: str, requests_per_second: float, max_in_flight: int):
+        self.host = host
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._lock = threading.Lock()
+        self._last_start = float("-inf")
+
+    def acquire(self):
+        """
+        同時実行枠を確保し、前回の開始から規定間隔が空くまで待つ。
+
+        サーバーが通知したレート制限枠が残っている間は間隔を空けない。
+        """
+        self._slots.acquire()
+        interval = 0.0 if throttle.has_budget(self.host) else self.interval
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._last_start + interval)
+            self._last_start = start_at
+        wait = start_at - now
+        if wait > 0:
+            profiling.sleep(wait, self.host)
+
+    def release(self):
+        """同時実行枠を返却する。"""
+        self._slots.release()
+
+
+class FetchScheduler:
+    """ホスト単位のポライトネス制限を守りながらジョブを並列実行する。"""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.requests_per_second = requests_per_second
+        self.max_in_flight = max_in_flight
+        self._limiters: dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> HostLimiter:
+        """
+        ホストに対応するリミッタを返す（初回アクセス時に生成）。
+
+        Args:
+            host: ホスト名
+
+        Returns:
+            ホスト専用の HostLimiter
+        """
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(host, self.requests_per_second, self.max_in_flight)
+            return self._limiters[host]
+
+    def call(self, url: str, func, *args):
+        """
+        URLのホストのレート制限に従って func(*args) を実行する。
+
+        Args:
+            url: レート制限の判定に使うリクエスト先URL
+            func: 実行する関数
+            *args: func に渡す引数
+
+        Returns:
+            func の戻り値
+        """
+        limiter = self.limiter(host_of(url))
+        limiter.acquire()
+        try:
+            return func(*args)
+        finally:
+            limiter.release()
+
+    def iter_ordered(self, jobs, window: int | None = None):
+        """
+        ジョブを並列実行し、投入順に結果を返すジェネレータ。
+
+        window 件より先のジョブは投入しないため、未返却の結果として
+        保持されるのは最大 window 件に抑えられる。
+
+        Args:
+            jobs: (url, func, args) のイテラブル（遅延生成でもよい）
+            window: 同時に投入しておくジョブ数の上限（省略時はワーカー数）
+
+        Yields:
+            (戻り値, 例外) のタプル。成功時は例外が None、失敗時は戻り値が None
+        """
+        window = max(1, window or self.max_workers)
+        job_iter = iter(jobs)
+        pending = []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, window)) as executor:
+
+            def submit_next() -> bool:
+                for url, func, args in job_iter:
+                    pending.append(executor.submit(self.call, url, func, *args))
+                    return True
+                return False
+
+            while len(pending) < window and submit_next():
+                pass
+
+            while pending:
+                future = pending.pop(0)
+                try:
+                    yield future.result(), None
+                except Exception as e:
+                    yield None, e
+                submit_next()
+
+    def run(self, jobs) -> list[tuple]:
+        """
+        全ジョブを並列実行し、投入順の結果リストを返す。
+
+        Args:
+            jobs: (url, func, args) のイテラブル
+
+        Returns:
+            (戻り値, 例外) のタプルのリスト
+        """
+        jobs = list(jobs)
+        return list(self.iter_ordered(jobs, window=len(jobs)))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+フィード取得の前回実行状態（既読セット）管理
+
+fetch_hatena_rss.py / fetch_yahoo_rss.py / fetch_reddit_hot.py で共有する、
+ソースごとの永続的な既読セット。記事のキー（URL等）ごとに前回出力時の
+日付とスコアを記録しておき、新規の記事・日付が変わった記事・スコアが
+しきい値以上動いた記事だけを差分として取り出す。
+
+しばらく見かけなくなった記事は一定期間後に既読セットから削除する。
+
+既読セットの保存は出力の後に行う（select_changed(..., commit=False) で照合し、
+出力が終わってから commit_state() で保存する）。出力や後段の処理が失敗して
+同じ日に再実行した場合に備え、その日のそれまでの実行で出力した記事は
+再実行でも差分として出力し直す（同じ実行の中では一度だけ出力する）。
+
+環境変数:
+    KNOWLEDGE_HUB_STATE_DIR   状態ファイルの保存先（デフォルト: ~/.cache/knowledge-hub/state）
+"""
+
+import json
+import os
+import time
+from datetime import date as Date
+from pathlib import Path
+
+from url_canonical import canonicalize
+
+# 状態ファイルの保存先ディレクトリ
+STATE_DIR = Path(
+    os.environ.get("KNOWLEDGE_HUB_STATE_DIR")
+    or Path.home() / ".cache" / "knowledge-hub" / "state"
+)
+
+# 最後に見かけてからこの秒数を過ぎた記事は既読セットから削除する（14日）
+SEEN_TTL_SECONDS = 14 * 24 * 60 * 60
+
+# このプロセスで読み込んだ既読セット: ソース -> (既読セット, その日の前の実行で出力済みで、この実行ではまだ出力していないキー)
+_loaded: dict[str, tuple[dict[str, dict], set[str]]] = {}
+
+
+def state_path(source: str) -> Path:
+    """
+    ソースの状態ファイルのパスを返す。
+
+    Args:
+        source: ソース識別子（"hatena_rss" 等）
+
+    Returns:
+        状態ファイルのパス
+    """
+    return STATE_DIR / f"{source}.json"
+
+
+def load_state(source: str) -> dict[str, dict]:
+    """
+    ソースの既読セットを読み込む。
+
+    Args:
+        source: ソース識別子
+
+    Returns:
+        {記事キー: {"date", "score", "seen_at"}} の辞書（未作成・破損時は空）
+    """
+    try:
+        return json.loads(state_path(source).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(source: str, state: dict[str, dict]):
+    """
+    ソースの既読セットを一時ファイル経由で保存する。
+
+    Args:
+        source: ソース識別子
+        state: 既読セット
+    """
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    path = state_path(source)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _run_state(source: str) -> tuple[dict[str, dict], set[str]]:
+    """
+    この実行で使う既読セットを返す（プロセス内で初回だけ読み込む）。
+
+    Args:
+        source: ソース識別子
+
+    Returns:
+        (既読セット, その日の前の実行で出力済みのキーの集合) のタプル
+    """
+    if source not in _loaded:
+        state = load_state(source)
+        today = Date.today().isoformat()
+        _loaded[source] = (state, {key for key, entry in state.items() if entry.get("output_on") == today})
+    return _loaded[source]
+
+
+def commit_state(source: str):
+    """
+    select_changed(..., commit=False) で更新した既読セットを保存する。
+
+    出力が正常に終わってから呼ぶ。この実行で照合していないソースは何もしない。
+
+    Args:
+        source: ソース識別子
+    """
+    if source in _loaded:
+        save_state(source, _loaded[source][0])
+
+
+def select_changed(
+    source: str,
+    items: list[dict],
+    key_field: str = "url",
+    date_field: str = "date",
+    score_field: str | None = None,
+    score_threshold: int = 0,
+    commit: bool = True,
+) -> list[dict]:
+    """
+    前回実行以降に新規・変化のあった記事だけを取り出し、既読セットを更新する。
+
+    スコアの基準値は記事を出力したときだけ更新するため、
+    少しずつ伸びた記事も累計の変化がしきい値に達した時点で再出力される。
+    その日の前の実行で出力した記事は、この実行で初めて照合したときにも出力する。
+
+    Args:
+        source: ソース識別子
+        items: 今回取得した記事辞書のリスト
+        key_field: 記事を識別するキーのフィールド名（URLのキーは正規化して照合する）
+        date_field: 記事日付のフィールド名
+        score_field: スコアのフィールド名（スコア変化を見ない場合は None）
+        score_threshold: 再出力するスコア変化量のしきい値
+        commit: True なら既読セットをすぐに保存する（False なら出力後に commit_state() で保存する）
+
+    Returns:
+        新規または変化のあった記事のリスト（元の順序を維持）
+    """
+    state, output_earlier_today = _run_state(source)
+    now = time.time()
+    today = Date.today().isoformat()
+    changed = []
+
+    for item in items:
+        raw_key = item.get(key_field)
+        if not raw_key:
+            changed.append(item)
+            continue
+
+        # 正規化前のURLをキーに保存された既読セットも引き継ぐ
+        key = canonicalize(raw_key)
+        previous = state.get(key)
+        if previous is None and raw_key in state:
+            previous = state[key] = state.pop(raw_key)
+        date = item.get(date_field)
+        score = item.get(score_field, 0) if score_field else 0
+
+        is_changed = (
+            previous is None
+            or key in output_earlier_today
+            or previous.get("date") != date
+            or (
+                score_field is not None
+                and score_threshold > 0
+                and abs(score - previous.get("score", 0)) >= score_threshold
+            )
+        )
+        if is_changed:
+            changed.append(item)
+            output_earlier_today.discard(key)
+            state[key] = {"date": date, "score": score, "seen_at": now, "output_on": today}
+        else:
+            previous["seen_at"] = now
+
+    # 長期間見かけていない記事を削除
+    for key in [k for k, v in state.items() if now - v.get("seen_at", 0) > SEEN_TTL_SECONDS]:
+        del state[key]
+    if commit:
+        save_state(source, state)
+    return changed
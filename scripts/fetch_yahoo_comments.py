@@ -6,24 +6,41 @@ Yahoo ニュース コメント取得スクリプト
 JSON形式で標準出力に出力する。
 
 使い方:
-    python3 fetch_yahoo_comments.py <Yahoo ニュース記事URL>
+    python3 fetch_yahoo_comments.py <Yahoo ニュース記事URL> [--parallel] [--concurrency N] [--ndjson]
 
 例:
     python3 fetch_yahoo_comments.py "https://news.yahoo.co.jp/articles/xxxxx"
 
+    # 2ページ目以降を並列取得し、届いた順にストリーミング出力
+    python3 fetch_yahoo_comments.py "https://news.yahoo.co.jp/articles/xxxxx" --parallel --concurrency 4
+
+    # 1行1コメントのNDJSONで出力（--parallel と組み合わせ可能）
+    python3 fetch_yahoo_comments.py "https://news.yahoo.co.jp/articles/xxxxx" --ndjson
+
 注意:
     - User-Agentヘッダを必ず付与すること
     - ページネーション対応: 全コメントを自動取得する
-    - ページ間には1秒のスリープを入れてレート制限に対応
+    - ページ間はホスト単位のレート制限（既定1秒間隔）で間隔を空け、
+      429 / 5xx は Retry-After・バックオフに従って再試行する（throttle.py）
+    - --parallel 指定時は1ページ目の totalResults と件数（1ページの大きさ）から
+      残りページの開始位置を求め、同時実行数・レート上限付きで並列取得する。
+      ページ順に並べ直して出力し、全コメントをメモリに保持しない。
+      件数が足りないページがあれば、次のページの開始位置までを順に取り直す
+    - --ndjson 指定時は、ヘッダ・コメントごとのレコード・件数とエラーを持つトレーラーを
+      1行ずつ出力する（形式は ndjson_writer.py を参照）。ページ単位で書き出すため、
+      コメント数によらずメモリ使用量は一定
 """
 
 import sys
 import json
-import time
 import re
-import urllib.request
 import urllib.parse
 
+from fetch_scheduler import FetchScheduler
+from http_cache import cached_get
+from ndjson_writer import NdjsonWriter
+import profiling
+
 # User-Agentヘッダ（必須）
 USER_AGENT = "knowledge-hub/0.1"
 
@@ -45,6 +62,12 @@ COMMENT_DIGEST_API = (
 # デフォルトのプロパティID
 DEFAULT_PROPERTY_ID = "news_user"
 
+# 並列取得モードの同時リクエスト数
+DEFAULT_CONCURRENCY = 4
+
+# 並列取得モードの1秒あたりの最大リクエスト開始数
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
 
 def extract_article_id(url: str) -> str:
     """
@@ -74,6 +97,26 @@ def extract_article_id(url: str) -> str:
     )
 
 
+def comment_page_url(article_id: str, start: int, results: int = RESULTS_PER_PAGE) -> str:
+    """
+    コメントリストAPIの1ページ分のURLを組み立てる。
+
+    Args:
+        article_id: Yahoo ニュース記事ID（Shannon ID）
+        start: 開始位置（1始まり）
+        results: 1ページあたりの取得件数
+
+    Returns:
+        APIのURL
+    """
+    api_url = COMMENT_LIST_API.format(
+        property_id=DEFAULT_PROPERTY_ID,
+        article_id=article_id,
+    )
+    params = urllib.parse.urlencode({"start": start, "results": results})
+    return f"{api_url}?{params}"
+
+
 def fetch_comment_page(
     article_id: str, start: int, results: int = RESULTS_PER_PAGE
 ) -> dict:
@@ -91,22 +134,16 @@ def fetch_comment_page(
     Raises:
         urllib.error.HTTPError: APIリクエスト失敗時
     """
-    api_url = COMMENT_LIST_API.format(
-        property_id=DEFAULT_PROPERTY_ID,
-        article_id=article_id,
-    )
-    params = urllib.parse.urlencode({"start": start, "results": results})
-    full_url = f"{api_url}?{params}"
-
-    req = urllib.request.Request(
-        full_url,
+    body = cached_get(
+        comment_page_url(article_id, start, results),
         headers={
             "User-Agent": USER_AGENT,
             "Accept": "application/json",
         },
+        timeout=15,
     )
-    with urllib.request.urlopen(req, timeout=15) as response:
-        return json.loads(response.read().decode("utf-8"))
+    with profiling.stage("parse"):
+        return json.loads(body.decode("utf-8"))
 
 
 def fetch_all_comments(article_id: str) -> dict:
@@ -122,9 +159,13 @@ def fetch_all_comments(article_id: str) -> dict:
     all_comments = []
     start = 1
     total_results = None
+    # ページ間の間隔はスケジューラのホスト単位のレート制限で空ける
+    scheduler = FetchScheduler(max_workers=1, max_in_flight=1)
 
     while True:
-        page_data = fetch_comment_page(article_id, start)
+        page_data = scheduler.call(
+            comment_page_url(article_id, start), fetch_comment_page, article_id, start
+        )
 
         # 初回で総件数を取得
         if total_results is None:
@@ -143,9 +184,6 @@ def fetch_all_comments(article_id: str) -> dict:
         # 次のページへ
         start += len(comments)
 
-        # レート制限対応: ページ間に1秒のスリープ
-        time.sleep(1)
-
     return {
         "total_results": total_results or 0,
         "comments": all_comments,
@@ -153,6 +191,95 @@ def fetch_all_comments(article_id: str) -> dict:
     }
 
 
+def iter_gap_pages(scheduler: FetchScheduler, article_id: str, start: int, end: int):
+    """
+    start から end の手前までのコメントを1ページずつ順に取得するジェネレータ。
+
+    並列取得で件数が足りなかったページの不足分を取り直すのに使う。
+
+    Args:
+        scheduler: レート制限に使うスケジューラ
+        article_id: Yahoo ニュース記事ID（Shannon ID）
+        start: 開始位置（1始まり）
+        end: 取得を終える位置（この位置は含まない）
+
+    Yields:
+        APIレスポンス（1ページ分）の辞書
+
+    Raises:
+        urllib.error.HTTPError: APIリクエスト失敗時
+    """
+    while start < end:
+        results = min(RESULTS_PER_PAGE, end - start)
+        page_data = scheduler.call(
+            comment_page_url(article_id, start, results), fetch_comment_page, article_id, start, results
+        )
+        comments = page_data.get("comments", [])
+        if not comments:
+            return
+        yield page_data
+        start += len(comments)
+
+
+def iter_comment_pages(
+    article_id: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+):
+    """
+    1ページ目の総件数から残りページを求め、並列取得してページ順に返すジェネレータ。
+
+    1ページ目の件数を1ページの大きさとして残りページの開始位置を決める。
+    APIが途中のページを短く返した場合は、次のページの開始位置までを順に取り直すため、
+    ページ間のコメントを取りこぼさない。
+    先読みするページ数は concurrency 件までに抑えるため、
+    保持するページ数はコメント総数によらず一定になる。
+
+    Args:
+        article_id: Yahoo ニュース記事ID（Shannon ID）
+        concurrency: 同時に取得するページ数の上限
+        requests_per_second: 1秒あたりの最大リクエスト開始数
+
+    Yields:
+        APIレスポンス（1ページ分）の辞書。1件目は1ページ目
+
+    Raises:
+        urllib.error.HTTPError: APIリクエスト失敗時
+    """
+    first_page = fetch_comment_page(article_id, 1)
+    yield first_page
+
+    total_results = first_page.get("totalResults", 0)
+    page_size = len(first_page.get("comments", []))
+    if not page_size or 1 + page_size > total_results:
+        return
+
+    # 残りページの開始位置は1ページ目の時点で確定している（APIが返した件数ずつ進め、
+    # 各ページも同じ件数だけ要求して隣のページと重ならないようにする）
+    starts = range(1 + page_size, total_results + 1, page_size)
+    jobs = (
+        (comment_page_url(article_id, start, page_size), fetch_comment_page, (article_id, start, page_size))
+        for start in starts
+    )
+    scheduler = FetchScheduler(
+        max_workers=concurrency,
+        requests_per_second=requests_per_second,
+        max_in_flight=concurrency,
+    )
+    for (page_data, error), start in zip(scheduler.iter_ordered(jobs, window=concurrency), starts):
+        if error is not None:
+            raise error
+        count = len(page_data.get("comments", []))
+        if not count:
+            break
+        yield page_data
+
+        # 最後のページ以外で件数が足りなければ、次のページの開始位置までを順に取り直す
+        end = min(start + page_size, total_results + 1)
+        if start + count < end:
+            yield from iter_gap_pages(scheduler, article_id, start + count, end)
+
+
 def format_comment(raw_comment: dict) -> dict:
     """
     APIレスポンスのコメントデータを統一フォーマットに変換する。
@@ -180,14 +307,119 @@ def format_comment(raw_comment: dict) -> dict:
     }
 
 
+def stream_comments_json(article_url: str, article_id: str, first_page: dict, pages) -> int:
+    """
+    ページ単位で届くコメントを、そのまま標準出力へJSONとしてストリーミング出力する。
+
+    出力は通常モードと同じキーを持つJSONオブジェクトで、件数が最後まで確定しないため
+    fetched_comments は comments の後に出力する。途中で取得に失敗した場合は
+    それまでのコメントを閉じた上で error キーを付けて出力を終える。
+
+    Args:
+        article_url: 記事URL
+        article_id: Yahoo ニュース記事ID（Shannon ID）
+        first_page: 取得済みの1ページ目のAPIレスポンス
+        pages: 2ページ目以降のAPIレスポンスを順に返すイテレータ
+
+    Returns:
+        終了コード（成功時 0、途中失敗時 1）
+    """
+    out = sys.stdout
+
+    # ヘッダ部分（url / article_id / total_comments）
+    out.write("{\n")
+    out.write(f'  "url": {json.dumps(article_url, ensure_ascii=False)},\n')
+    out.write(f'  "article_id": {json.dumps(article_id, ensure_ascii=False)},\n')
+    out.write(f'  "total_comments": {first_page.get("totalResults", 0)},\n')
+    out.write('  "comments": [')
+
+    fetched = 0
+    error = None
+    try:
+        page_data = first_page
+        while page_data is not None:
+            for raw_comment in page_data.get("comments", []):
+                with profiling.stage("serialize"):
+                    text = json.dumps(format_comment(raw_comment), ensure_ascii=False, indent=2)
+                out.write(",\n" if fetched else "\n")
+                out.write("\n".join("    " + line for line in text.split("\n")))
+                fetched += 1
+            out.flush()
+            page_data = next(pages, None)
+    except Exception as e:
+        error = f"コメント取得に失敗しました: {str(e)}"
+
+    # フッタ部分（fetched_comments と、失敗時は error）
+    out.write("\n  ]," if fetched else "],")
+    out.write(f'\n  "fetched_comments": {fetched}')
+    if error:
+        out.write(f',\n  "error": {json.dumps(error, ensure_ascii=False)}')
+    out.write("\n}\n")
+    out.flush()
+    return 1 if error else 0
+
+
+def stream_comments_ndjson(article_url: str, article_id: str, first_page: dict, pages) -> int:
+    """
+    ページ単位で届くコメントを、1行1コメントのNDJSONとして標準出力へ書き出す。
+
+    途中で取得に失敗した場合は、それまでのコメントを出力済みのままエラーを
+    トレーラーに記録して終える。
+
+    Args:
+        article_url: 記事URL
+        article_id: Yahoo ニュース記事ID（Shannon ID）
+        first_page: 取得済みの1ページ目のAPIレスポンス
+        pages: 2ページ目以降のAPIレスポンスを順に返すイテレータ
+
+    Returns:
+        終了コード（成功時 0、途中失敗時 1）
+    """
+    writer = NdjsonWriter("yahoo_comments")
+    writer.header(url=article_url, article_id=article_id, total_comments=first_page.get("totalResults", 0))
+
+    try:
+        page_data = first_page
+        while page_data is not None:
+            for raw_comment in page_data.get("comments", []):
+                with profiling.stage("format"):
+                    comment = format_comment(raw_comment)
+                writer.record("comment", comment)
+            page_data = next(pages, None)
+    except Exception as e:
+        writer.error({"url": article_url, "error": f"コメント取得に失敗しました: {str(e)}"})
+
+    writer.trailer()
+    return 1 if writer.errors else 0
+
+
 def main():
     """メイン処理: Yahoo ニュース記事URLのコメントを取得してJSONとして出力する。"""
-    if len(sys.argv) < 2:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    parallel = "--parallel" in sys.argv[1:]
+    ndjson = "--ndjson" in sys.argv[1:]
+    concurrency = DEFAULT_CONCURRENCY
+    if "--concurrency" in sys.argv[1:]:
+        value_index = sys.argv.index("--concurrency") + 1
+        value = sys.argv[value_index] if value_index < len(sys.argv) else ""
+        concurrency = int(value) if re.fullmatch(r"\d+", value) else 0
+        if concurrency < 1:
+            print(
+                json.dumps(
+                    {"error": f"--concurrency には1以上の整数を指定してください: {value}"},
+                    ensure_ascii=False,
+                ),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        args.remove(value)
+
+    if not args:
         print(
             json.dumps(
                 {
                     "error": "Yahoo ニュース記事URLを引数に指定してください。",
-                    "usage": "python3 fetch_yahoo_comments.py <URL>",
+                    "usage": "python3 fetch_yahoo_comments.py <URL> [--parallel] [--concurrency N] [--ndjson]",
                 },
                 ensure_ascii=False,
             ),
@@ -195,8 +427,7 @@ def main():
         )
         sys.exit(1)
 
-    article_url = sys.argv[1]
-
+    article_url = args[0]
     # 記事IDの抽出
     try:
         article_id = extract_article_id(article_url)
@@ -210,6 +441,31 @@ def main():
         )
         sys.exit(1)
 
+    # 並列取得モード・NDJSONモード: 先読みしたページを順に並べ直してストリーミング出力
+    if parallel or ndjson:
+        if parallel:
+            pages = iter_comment_pages(article_id, concurrency=concurrency)
+        else:
+            # 並列指定がなければ通常モードと同じく1ページずつ1秒間隔で取得する
+            pages = iter_comment_pages(article_id, concurrency=1, requests_per_second=1.0)
+        try:
+            # 1ページ目の取得失敗は通常モードと同じくエラー終了
+            first_page = next(pages)
+        except Exception as e:
+            print(
+                json.dumps(
+                    {
+                        "error": f"コメント取得に失敗しました: {str(e)}",
+                        "url": article_url,
+                    },
+                    ensure_ascii=False,
+                ),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        stream = stream_comments_ndjson if ndjson else stream_comments_json
+        sys.exit(stream(article_url, article_id, first_page, pages))
+
     # コメント取得
     try:
         raw_data = fetch_all_comments(article_id)
@@ -227,7 +483,8 @@ def main():
         sys.exit(1)
 
     # コメントの整形
-    comments = [format_comment(c) for c in raw_data["comments"]]
+    with profiling.stage("format"):
+        comments = [format_comment(c) for c in raw_data["comments"]]
 
     # 結果をJSON出力
     result = {
@@ -238,8 +495,9 @@ def main():
         "comments": comments,
     }
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    with profiling.stage("serialize"):
+        print(json.dumps(result, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
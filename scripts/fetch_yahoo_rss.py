@@ -9,7 +9,7 @@ JSON形式で標準出力に出力する。
 フィードの追加・削除は JSON ファイルを編集するだけで反映される。
 
 使い方:
-    python3 fetch_yahoo_rss.py [フィードキー...]
+    python3 fetch_yahoo_rss.py [フィードキー...] [--full] [--ndjson]
 
 例:
     # 全フィードを取得（デフォルト）
@@ -20,16 +20,36 @@ JSON形式で標準出力に出力する。
 
     # 利用可能なフィード一覧を表示
     python3 fetch_yahoo_rss.py --list
+
+    # 前回実行との差分ではなく全件を出力
+    python3 fetch_yahoo_rss.py --full
+
+    # フィードごとに取得でき次第、1行1記事で出力
+    python3 fetch_yahoo_rss.py --ndjson
+
+差分モード:
+    デフォルトでは前回実行以降に新しく現れた（または日付が変わった）記事のみを出力する。
+    既読セットは fetch_state.py が管理する。--full を指定すると全件を出力し、既読セットも更新しない。
+
+NDJSONモード:
+    --ndjson を指定すると、ヘッダ・記事ごとのレコード・件数とエラーを持つトレーラーを
+    1行ずつ出力する（形式は ndjson_writer.py を参照）。フィードの取得が終わるたびに、
+    それまでのフィードと重複しない記事を書き出す。
 """
 
 import sys
 import json
-import time
-import urllib.request
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 
+from fetch_scheduler import FetchScheduler
+from fetch_state import commit_state, select_changed
+from http_cache import cached_stream
+from ndjson_writer import NdjsonWriter
+import profiling
+from url_canonical import canonicalize
+from xml_stream import iter_elements
+
 # User-Agentヘッダ（外部API利用ルールに準拠）
 USER_AGENT = "knowledge-hub/0.1"
 
@@ -90,22 +110,20 @@ def print_feed_list(feeds: dict[str, dict]):
         print()
 
 
-def fetch_rss(url: str) -> str:
+def fetch_rss_stream(url: str):
     """
-    指定URLのRSSフィードを取得する。
+    指定URLのRSSフィードをチャンク単位で取得する。
 
     Args:
         url: RSSフィードのURL
 
     Returns:
-        RSSフィードのXML文字列
+        RSSフィード本文（bytes）のチャンクを返すイテレータ
 
     Raises:
         urllib.error.URLError: HTTPリクエスト失敗時
     """
-    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-    with urllib.request.urlopen(req, timeout=15) as response:
-        return response.read().decode("utf-8")
+    return cached_stream(url, headers={"User-Agent": USER_AGENT}, timeout=15)
 
 
 def parse_rss(xml_text: str, feed_key: str, feeds: dict[str, dict]) -> list[dict]:
@@ -120,15 +138,23 @@ def parse_rss(xml_text: str, feed_key: str, feeds: dict[str, dict]) -> list[dict
     Returns:
         記事情報の辞書リスト
     """
-    root = ET.fromstring(xml_text)
-    articles = []
+    return list(iter_rss_items([xml_text], feed_key, feeds))
+
 
-    # RSS 2.0 形式: channel > item
-    channel = root.find("channel")
-    if channel is None:
-        return articles
+def iter_rss_items(chunks, feed_key: str, feeds: dict[str, dict]):
+    """
+    RSS 2.0形式のフィードをストリーミングでパースし、itemが閉じるたびに記事情報を返す。
+
+    Args:
+        chunks: RSSフィード本文のチャンク（bytes または str）のイテラブル
+        feed_key: フィードを識別するキー名
+        feeds: フィード定義の辞書
 
-    for item in channel.findall("item"):
+    Yields:
+        記事情報の辞書
+    """
+    # RSS 2.0 形式: rss > channel > item
+    for item in iter_elements(chunks, "item", depth=3):
         title_el = item.find("title")
         link_el = item.find("link")
         description_el = item.find("description")
@@ -149,14 +175,26 @@ def parse_rss(xml_text: str, feed_key: str, feeds: dict[str, dict]) -> list[dict
             "feed_label": feeds[feed_key]["label"],
             "description": description_el.text if description_el is not None and description_el.text else "",
         }
-        articles.append(article)
+        yield article
+
+
+def fetch_feed_articles(feed_key: str, feeds: dict[str, dict]) -> list[dict]:
+    """
+    指定フィードのRSSを取得し、記事情報のリストに変換する。
 
-    return articles
+    Args:
+        feed_key: フィードを識別するキー名
+        feeds: フィード定義の辞書
+
+    Returns:
+        記事情報の辞書リスト
+    """
+    return list(iter_rss_items(fetch_rss_stream(feeds[feed_key]["url"]), feed_key, feeds))
 
 
 def deduplicate_articles(articles: list[dict]) -> list[dict]:
     """
-    URLベースで重複記事を除去する。
+    正規化したURLをキーに重複記事を除去する。
 
     Args:
         articles: 記事情報の辞書リスト
@@ -167,13 +205,129 @@ def deduplicate_articles(articles: list[dict]) -> list[dict]:
     seen_urls = set()
     unique_articles = []
     for article in articles:
-        url = article["url"]
+        url = article["url"] and canonicalize(article["url"])
         if url and url not in seen_urls:
             seen_urls.add(url)
             unique_articles.append(article)
     return unique_articles
 
 
+def iter_feed_articles(feed_keys: list[str], feeds: dict[str, dict], scheduler: FetchScheduler | None = None):
+    """
+    複数フィードのRSSを並列取得し、フィードの順に取得結果を返すジェネレータ。
+
+    Args:
+        feed_keys: 取得するフィードキーのリスト
+        feeds: フィード定義の辞書
+        scheduler: 共有するスケジューラ（省略時は新規作成）
+
+    Yields:
+        (フィードキー, 記事情報の辞書リスト, 例外) のタプル。成功時は例外が None、失敗時は記事リストが None
+    """
+    # フィードごとのRSSを並列取得（レート制限はスケジューラがホスト単位で行う）
+    jobs = [(feeds[key]["url"], fetch_feed_articles, (key, feeds)) for key in feed_keys]
+    results = (scheduler or FetchScheduler()).iter_ordered(jobs, window=len(jobs))
+    for key, (articles, error) in zip(feed_keys, results):
+        yield key, articles, error
+
+
+def collect_articles(
+    feed_keys: list[str],
+    feeds: dict[str, dict],
+    scheduler: FetchScheduler | None = None,
+    since_last_run: bool = False,
+) -> dict:
+    """
+    複数フィードのRSSを並列取得し、重複除去して出力用の結果辞書にまとめる。
+
+    Args:
+        feed_keys: 取得するフィードキーのリスト
+        feeds: フィード定義の辞書
+        scheduler: 共有するスケジューラ（省略時は新規作成）
+        since_last_run: True なら前回実行以降の新規・変化分のみに絞り込む
+            （既読セットは保存しない。出力後に呼び出し側で commit_state("yahoo_rss") を呼ぶ）
+
+    Returns:
+        fetched_at / feeds / total_before_dedup / total / articles
+        （エラー時は errors、差分モード時は total_fetched も）を持つ辞書
+    """
+    all_articles = []
+    errors = []
+
+    for key, articles, error in iter_feed_articles(feed_keys, feeds, scheduler):
+        if error is not None:
+            errors.append({"feed": key, "error": str(error)})
+            continue
+        all_articles.extend(articles)
+
+    # 複数フィード間での重複を除去
+    with profiling.stage("format"):
+        unique_articles = deduplicate_articles(all_articles)
+
+    # 差分モード: 前回実行以降の新規・日付変化分のみ
+    total_fetched = len(unique_articles)
+    if since_last_run:
+        unique_articles = select_changed("yahoo_rss", unique_articles, commit=False)
+
+    result = {
+        "fetched_at": datetime.now().isoformat(),
+        "feeds": feed_keys,
+        "total_before_dedup": len(all_articles),
+        "total": len(unique_articles),
+        "articles": unique_articles,
+    }
+
+    if since_last_run:
+        result["total_fetched"] = total_fetched
+
+    # エラーがあった場合は含める
+    if errors:
+        result["errors"] = errors
+
+    return result
+
+
+def write_ndjson(feed_keys: list[str], feeds: dict[str, dict], since_last_run: bool = False):
+    """
+    複数フィードのRSSを取得し、フィードの取得が終わるたびに重複を除いた記事をNDJSONで出力する。
+
+    Args:
+        feed_keys: 取得するフィードキーのリスト
+        feeds: フィード定義の辞書
+        since_last_run: True なら前回実行以降の新規・変化分のみに絞り込む
+    """
+    writer = NdjsonWriter("yahoo_rss")
+    writer.header(fetched_at=datetime.now().isoformat(), feeds=feed_keys, since_last_run=since_last_run)
+
+    # フィードをまたいだ重複除去のため、出力済みの正規化URLだけを保持する
+    seen_urls = set()
+    total_before_dedup = 0
+    total_fetched = 0
+    for key, articles, error in iter_feed_articles(feed_keys, feeds):
+        if error is not None:
+            writer.error({"feed": key, "error": str(error)})
+            continue
+        total_before_dedup += len(articles)
+        unique_articles = []
+        for article in articles:
+            url = article["url"] and canonicalize(article["url"])
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                unique_articles.append(article)
+        total_fetched += len(unique_articles)
+
+        # 差分モード: 既読セットはフィードごとに照合・更新する
+        if since_last_run:
+            unique_articles = select_changed("yahoo_rss", unique_articles, commit=False)
+        for article in unique_articles:
+            writer.record("article", article)
+
+    writer.trailer(total_before_dedup=total_before_dedup, total_fetched=total_fetched)
+    # 既読セットは出力し終えてから保存する
+    if since_last_run:
+        commit_state("yahoo_rss")
+
+
 def main():
     """メイン処理: フィードごとにRSSを取得してJSONとして出力する。"""
     # フィード定義を読み込み
@@ -185,7 +339,10 @@ def main():
         sys.exit(0)
 
     # コマンドライン引数からフィードキーを取得（なければ全フィード）
-    feed_keys = sys.argv[1:] if len(sys.argv) > 1 else list(feeds.keys())
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    full = "--full" in sys.argv[1:]
+    ndjson = "--ndjson" in sys.argv[1:]
+    feed_keys = args if args else list(feeds.keys())
 
     # 無効なフィードキーのチェック
     valid_keys = list(feeds.keys())
@@ -200,39 +357,16 @@ def main():
             )
             sys.exit(1)
 
-    all_articles = []
-    errors = []
-
-    for i, key in enumerate(feed_keys):
-        # フィード間でレート制限対策のスリープ（1秒以上）
-        if i > 0:
-            time.sleep(1)
-
-        try:
-            xml_text = fetch_rss(feeds[key]["url"])
-            articles = parse_rss(xml_text, key, feeds)
-            all_articles.extend(articles)
-        except Exception as e:
-            errors.append({"feed": key, "error": str(e)})
-
-    # 複数フィード間での重複を除去
-    unique_articles = deduplicate_articles(all_articles)
-
-    # 結果をJSON出力
-    result = {
-        "fetched_at": datetime.now().isoformat(),
-        "feeds": feed_keys,
-        "total_before_dedup": len(all_articles),
-        "total": len(unique_articles),
-        "articles": unique_articles,
-    }
-
-    # エラーがあった場合は含める
-    if errors:
-        result["errors"] = errors
+    if ndjson:
+        write_ndjson(feed_keys, feeds, since_last_run=not full)
+        return
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    result = collect_articles(feed_keys, feeds, since_last_run=not full)
+    with profiling.stage("serialize"):
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not full:
+        commit_state("yahoo_rss")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -2,17 +2,42 @@
 """
 日次トレンドレポート生成スクリプト
 はてブ・Yahoo・Redditのデータを統合し、マッチング評価を行ってJSON出力する
+
+使い方:
+    python3 generate_report.py <はてなJSON> <YahooJSON> <RedditJSON> [--ndjson] [--cluster] [--prescore]
+
+--ndjson を指定すると、評価用の候補一覧の代わりに、ヘッダ・候補記事ごとのレコード・
+件数を持つトレーラーを1行ずつ出力する（形式は ndjson_writer.py を参照）
+
+--cluster を指定すると、別々のURLで届いた同じニュース（Yahoo の記事とはてブの元記事等）を
+near_duplicates.py で1件の代表記事にまとめる。代表記事には duplicates・sources・
+aggregatedScore が付き、候補一覧の末尾に dup:N（まとめた記事数）の列が加わる
+
+--prescore を指定すると、prescore.py で PROFILE.md の興味領域に基づく推定ランク・
+推定カテゴリ・一致したキーワードを各候補に付ける（prescore）。候補一覧の末尾には
+pre:ランク:スコア・推定カテゴリの列と、推定が不確かな記事の "?" が加わる
+
+記事ストア（article_store.py）のデータベースがあれば、前日までにレポート済み・
+詳細分析済みのURLをそこから取り出して除外する。EXCLUDED_URLS の一覧はデータベースの
+有無によらず常に除外する（データベースは build_report.py などが自動で作るため、
+DeepDives を取り込む前でも過去の詳細分析済みURLが候補に戻らないようにする）
 """
 import json
-import hashlib
 import sys
 from datetime import datetime
 
+import article_store
+from ndjson_writer import NdjsonWriter
+from near_duplicates import cluster_articles
+import prescore
+import profiling
+from url_canonical import canonicalize, url_id
+
 def gen_id(url):
-    """URLからSHA-256ハッシュ先頭8文字のIDを生成"""
-    return hashlib.sha256(url.encode()).hexdigest()[:8]
+    """正規化したURLからSHA-256ハッシュ先頭8文字のIDを生成"""
+    return url_id(url)
 
-# 除外URL（過去にDeepDivesで分析済み）
+# 除外URL（過去にDeepDivesで分析済み。記事ストアの除外対象と合わせて常に使う）
 EXCLUDED_URLS = {
     "https://azukiazusa.dev/blog/trying-claude-code-agent-teams/",
     "https://zenn.dev/sakasegawa/articles/e6a8aa168a7d19",
@@ -45,9 +70,10 @@ EXCLUDED_URLS = {
 
 def load_data():
     """3つのデータソースを読み込み"""
-    hatena_path = sys.argv[1]
-    yahoo_path = sys.argv[2]
-    reddit_path = sys.argv[3]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    hatena_path = args[0]
+    yahoo_path = args[1]
+    reddit_path = args[2]
 
     with open(hatena_path) as f:
         hatena = json.load(f)
@@ -58,19 +84,35 @@ def load_data():
 
     return hatena, yahoo, reddit
 
-def main():
-    hatena, yahoo, reddit = load_data()
+def load_excluded_urls(hatena, yahoo, reddit):
+    """3ソースの記事URLのうち、レポート済み・詳細分析済みのもの（と EXCLUDED_URLS）を返す"""
+    if not article_store.db_exists():
+        return EXCLUDED_URLS
 
-    # URL重複チェック用セット
+    urls = [art["url"] for data in (hatena, yahoo, reddit) for art in data["articles"]]
+    conn = article_store.connect()
+    try:
+        # 当日のレポートを作り直す場合に備え、前日までのレポートのみを対象にする
+        excluded = article_store.find_excluded(conn, urls, before_date=datetime.now().strftime("%Y-%m-%d"))
+    finally:
+        conn.close()
+    # deep_dives テーブルが未取り込みでも手元の一覧の記事は除外する
+    return excluded | EXCLUDED_URLS
+
+def merge_articles(hatena, yahoo, reddit, excluded_urls=EXCLUDED_URLS):
+    """3ソースの取得結果を統合し、除外URLと重複URLを取り除いた候補リストを返す（URLは正規化して比較）"""
+    excluded = {canonicalize(u) for u in excluded_urls}
+    # URL重複チェック用セット（正規化URL）
     seen_urls = set()
     all_articles = []
 
     # はてなブックマーク処理
     for art in hatena["articles"]:
         url = art["url"]
-        if url in EXCLUDED_URLS or url in seen_urls:
+        key = canonicalize(url)
+        if key in excluded or key in seen_urls:
             continue
-        seen_urls.add(url)
+        seen_urls.add(key)
         all_articles.append({
             "url": url,
             "title": art["title"],
@@ -86,9 +128,10 @@ def main():
     # Yahoo ニュース処理（はてブと重複するURLを除外）
     for art in yahoo["articles"]:
         url = art["url"]
-        if url in EXCLUDED_URLS or url in seen_urls:
+        key = canonicalize(url)
+        if key in excluded or key in seen_urls:
             continue
-        seen_urls.add(url)
+        seen_urls.add(key)
         all_articles.append({
             "url": url,
             "title": art["title"],
@@ -104,9 +147,10 @@ def main():
     # Reddit処理
     for art in reddit["articles"]:
         url = art["url"]
-        if url in EXCLUDED_URLS or url in seen_urls:
+        key = canonicalize(url)
+        if key in excluded or key in seen_urls:
             continue
-        seen_urls.add(url)
+        seen_urls.add(key)
         all_articles.append({
             "url": url,
             "title": art["title"],
@@ -119,11 +163,58 @@ def main():
             "permalink": art.get("permalink", ""),
         })
 
-    # 全記事のURLとタイトルをリスト出力（評価用）
+    return all_articles
+
+def print_candidates(all_articles, clustered=False, prescored=False):
+    """全記事のURLとタイトルをリスト出力（評価用。clustered / prescored の場合は列を加える）"""
     for i, art in enumerate(all_articles):
-        print(f"{i}|{art['source']}|{art['score']}|{gen_id(art['url'])}|{art['title'][:80]}|{art['url'][:80]}")
+        line = f"{i}|{art['source']}|{art['score']}|{gen_id(art['url'])}|{art['title'][:80]}|{art['url'][:80]}"
+        if clustered:
+            line += f"|dup:{len(art.get('duplicates', []))}"
+        if prescored:
+            pre = art["prescore"]
+            line += f"|pre:{pre['rank']}:{pre['score']}|{pre['category'] or '-'}"
+            if pre["borderline"]:
+                line += "|?"
+        print(line)
 
     print(f"\n--- Total: {len(all_articles)} articles ---")
+    if prescored:
+        summary = prescore.summarize(all_articles)
+        ranks = " / ".join(f"{rank}: {count}" for rank, count in summary["by_rank"].items())
+        print(f"--- Prescore: {ranks} / borderline: {summary['borderline']} ---")
+
+def write_candidates_ndjson(all_articles):
+    """全候補記事を1行1記事のNDJSONで出力（後段の評価処理用）"""
+    writer = NdjsonWriter("candidates")
+    writer.header(generated_at=datetime.now().isoformat(), total=len(all_articles))
+    for i, art in enumerate(all_articles):
+        writer.record("article", {"index": i, "id": gen_id(art["url"]), **art})
+    writer.trailer()
+
+def main():
+    hatena, yahoo, reddit = load_data()
+    excluded_urls = load_excluded_urls(hatena, yahoo, reddit)
+    with profiling.stage("format"):
+        all_articles = merge_articles(hatena, yahoo, reddit, excluded_urls)
+    clustered = "--cluster" in sys.argv[1:]
+    if clustered:
+        with profiling.stage("cluster"):
+            all_articles = cluster_articles(all_articles)
+    prescored = "--prescore" in sys.argv[1:]
+    if prescored:
+        try:
+            matcher = prescore.load_matcher()
+        except OSError as e:
+            print(json.dumps({"error": f"PROFILE.md を読み込めません: {e}"}, ensure_ascii=False), file=sys.stderr)
+            sys.exit(1)
+        with profiling.stage("prescore"):
+            prescore.prescore_articles(all_articles, matcher)
+    if "--ndjson" in sys.argv[1:]:
+        write_candidates_ndjson(all_articles)
+        return
+    with profiling.stage("serialize"):
+        print_candidates(all_articles, clustered, prescored)
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+HTTP条件付きGETのディスクキャッシュ
+
+fetch_*.py スクリプトで共有する、URLをキーとした永続レスポンスキャッシュ。
+前回取得時の ETag / Last-Modified とレスポンス本文を保存しておき、
+次回は If-None-Match / If-Modified-Since を付けてリクエストする。
+サーバーが 304 Not Modified を返した場合はディスク上の本文を返す。
+cached_stream() を使うと、本文をメモリに載せずチャンク単位で受け取れる。
+
+キャッシュは合計サイズの上限を超えると最終利用日時の古い順（LRU）に削除し、
+TTLを過ぎて使われていないエントリも削除する。
+
+環境変数:
+    KNOWLEDGE_HUB_HTTP_CACHE_DIR   キャッシュディレクトリ（デフォルト: ~/.cache/knowledge-hub/http）
+    KNOWLEDGE_HUB_HTTP_CACHE       "0" でキャッシュを無効化
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from http_client import CHUNK_SIZE, open_stream, raise_for_status, request
+
+# キャッシュディレクトリ
+CACHE_DIR = Path(
+    os.environ.get("KNOWLEDGE_HUB_HTTP_CACHE_DIR")
+    or Path.home() / ".cache" / "knowledge-hub" / "http"
+)
+
+# キャッシュの有効/無効
+CACHE_ENABLED = os.environ.get("KNOWLEDGE_HUB_HTTP_CACHE", "1") != "0"
+
+# キャッシュ全体のサイズ上限（バイト）
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+# 最終利用からこの秒数を過ぎたエントリは削除する（7日）
+ENTRY_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# 削除処理の排他用ロック
+_prune_lock = threading.Lock()
+
+
+def _entry_paths(url: str) -> tuple[Path, Path]:
+    """
+    URLに対応するメタデータファイルと本文ファイルのパスを返す。
+
+    Args:
+        url: キャッシュキーとなるURL
+
+    Returns:
+        (メタデータのパス, 本文のパス) のタプル
+    """
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return CACHE_DIR / f"{key}.json", CACHE_DIR / f"{key}.body"
+
+
+def _write_atomic(path: Path, data: bytes):
+    """一時ファイル経由で書き込み、途中状態のファイルを残さない。"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def load_meta(url: str) -> dict | None:
+    """
+    URLのキャッシュエントリのメタデータを読み込む（本文は読まない）。
+
+    Args:
+        url: キャッシュキーとなるURL
+
+    Returns:
+        メタデータの辞書。エントリがない・本文と整合しない場合は None
+    """
+    meta_path, body_path = _entry_paths(url)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        size = body_path.stat().st_size
+    except (OSError, ValueError):
+        return None
+    if meta.get("url") != url or meta.get("size") != size:
+        return None
+    return meta
+
+
+def load_entry(url: str) -> tuple[dict, bytes] | None:
+    """
+    URLのキャッシュエントリを読み込む。
+
+    Args:
+        url: キャッシュキーとなるURL
+
+    Returns:
+        (メタデータ, 本文) のタプル。エントリがない・壊れている場合は None
+    """
+    meta = load_meta(url)
+    if meta is None:
+        return None
+    _, body_path = _entry_paths(url)
+    try:
+        body = body_path.read_bytes()
+    except OSError:
+        return None
+    if meta.get("size") != len(body):
+        return None
+    return meta, body
+
+
+def store_entry(url: str, etag: str | None, last_modified: str | None, body: bytes):
+    """
+    レスポンスをキャッシュに保存し、必要に応じて古いエントリを削除する。
+
+    Args:
+        url: キャッシュキーとなるURL
+        etag: レスポンスの ETag ヘッダ
+        last_modified: レスポンスの Last-Modified ヘッダ
+        body: レスポンス本文
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    meta_path, body_path = _entry_paths(url)
+    now = time.time()
+    meta = {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "stored_at": now,
+        "last_used": now,
+        "size": len(body),
+    }
+    _write_atomic(body_path, body)
+    _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    prune()
+
+
+def touch_entry(url: str, meta: dict):
+    """
+    304応答でキャッシュを使ったときに最終利用日時を更新する。
+
+    Args:
+        url: キャッシュキーとなるURL
+        meta: 読み込み済みのメタデータ
+    """
+    meta_path, _ = _entry_paths(url)
+    meta["last_used"] = time.time()
+    try:
+        _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    except OSError:
+        pass
+
+
+def prune(max_bytes: int = MAX_CACHE_BYTES, ttl_seconds: int = ENTRY_TTL_SECONDS):
+    """
+    TTL切れのエントリを削除し、合計サイズが上限を超えていれば古い順に削除する。
+
+    Args:
+        max_bytes: キャッシュ全体のサイズ上限（バイト）
+        ttl_seconds: 最終利用からの保持秒数
+    """
+    with _prune_lock:
+        now = time.time()
+        entries = []
+        for meta_path in CACHE_DIR.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                meta = {}
+            entries.append((meta.get("last_used", 0), meta.get("size", 0), meta_path))
+
+        # 最終利用日時の新しい順に並べ、上限を超えた分とTTL切れを削除
+        entries.sort(key=lambda e: e[0], reverse=True)
+        total = 0
+        for last_used, size, meta_path in entries:
+            total += size
+            if total <= max_bytes and now - last_used <= ttl_seconds:
+                continue
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix(".body").unlink(missing_ok=True)
+
+
+def cached_get(url: str, headers: dict | None = None, timeout: float = 15) -> bytes:
+    """
+    条件付きGETでURLの本文を取得する。
+
+    通信は共有HTTPクライアント（http_client.py）の持続的接続を使う。
+    キャッシュがあれば If-None-Match / If-Modified-Since を付けてリクエストし、
+    304 の場合はキャッシュの本文を返す。
+
+    Args:
+        url: 取得するURL
+        headers: 追加のリクエストヘッダ
+        timeout: タイムアウト秒数
+
+    Returns:
+        レスポンス本文のバイト列
+
+    Raises:
+        urllib.error.HTTPError: 2xx / 304 以外のステータス時
+        urllib.error.URLError: 接続失敗時
+    """
+    entry = load_entry(url) if CACHE_ENABLED else None
+    request_headers = _conditional_headers(headers, entry[0] if entry else None)
+
+    response = request(url, headers=request_headers, timeout=timeout)
+
+    # 304 Not Modified: ディスク上の本文を返す
+    if response.status == 304 and entry:
+        meta, body = entry
+        touch_entry(url, meta)
+        return body
+    raise_for_status(response)
+
+    body = response.body
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+
+    # 検証用ヘッダがないレスポンスは再検証できないため保存しない
+    if CACHE_ENABLED and (etag or last_modified):
+        try:
+            store_entry(url, etag, last_modified, body)
+        except OSError:
+            pass
+    return body
+
+
+def _conditional_headers(headers: dict | None, meta: dict | None) -> dict:
+    """キャッシュのメタデータから条件付きリクエストヘッダを組み立てる。"""
+    request_headers = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+    return request_headers
+
+
+def cached_stream(url: str, headers: dict | None = None, timeout: float = 15, chunk_size: int = CHUNK_SIZE):
+    """
+    条件付きGETでURLの本文をチャンク単位で返すジェネレータ。
+
+    304 の場合はディスク上の本文をチャンク単位で読み出す。
+    200 の場合は受信したチャンクをそのまま返しつつ一時ファイルに書き出し、
+    最後まで受信できたときだけキャッシュとして確定する。
+    いずれの場合も本文全体をメモリに載せない。
+
+    Args:
+        url: 取得するURL
+        headers: 追加のリクエストヘッダ
+        timeout: タイムアウト秒数
+        chunk_size: 1回に返すバイト数の目安
+
+    Yields:
+        レスポンス本文のバイト列
+
+    Raises:
+        urllib.error.HTTPError: 2xx / 304 以外のステータス時
+        urllib.error.URLError: 接続失敗時
+    """
+    meta = load_meta(url) if CACHE_ENABLED else None
+    request_headers = _conditional_headers(headers, meta)
+
+    with open_stream(url, headers=request_headers, timeout=timeout) as response:
+        # 304 Not Modified: ディスク上の本文を返す
+        if response.status == 304 and meta:
+            response.read()
+            touch_entry(url, meta)
+            _, body_path = _entry_paths(url)
+            with open(body_path, "rb") as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+            return
+        raise_for_status(response)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (CACHE_ENABLED and (etag or last_modified)):
+            yield from response.iter_chunks(chunk_size)
+            return
+
+        # 受信しながら一時ファイルへ書き出し、完了時にキャッシュとして確定する
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = _entry_paths(url)
+        tmp_path = body_path.with_name(f"{body_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_chunks(chunk_size):
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    now = time.time()
+    os.replace(tmp_path, body_path)
+    new_meta = {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "stored_at": now,
+        "last_used": now,
+        "size": size,
+    }
+    _write_atomic(meta_path, json.dumps(new_meta, ensure_ascii=False).encode("utf-8"))
+    prune()
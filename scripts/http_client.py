@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+キープアライブ対応の共有HTTPクライアント
+
+fetch_*.py スクリプトで共有するHTTPクライアント。
+ホストごとに持続的接続をプールして再利用し、TCP/TLSハンドシェイクを
+リクエストごとに繰り返さないようにする。gzip / deflate 圧縮を要求し、
+受信した本文は透過的に展開して返す。
+
+ホスト単位で受信バイト数・レイテンシ等のカウンタを集計しており、
+stats() で参照できる。本文を読み進めながら処理したい場合は
+open_stream() でチャンク単位に受け取れる。
+
+レート制限ヘッダ・Retry-After に従った待機、429 / 5xx の再試行、
+ホスト単位のサーキットブレーカーは throttle.py に委ねている。
+
+環境変数:
+    KNOWLEDGE_HUB_UPSTREAM_OVERRIDE   全リクエストの接続先を差し替えるベースURL
+                                      （例: http://127.0.0.1:8765。ベンチマーク用のモックサーバー向け）
+
+使い方:
+    from http_client import request
+
+    response = request("https://example.com/feed.rss", headers={"User-Agent": "..."})
+    response.status, response.headers, response.body
+"""
+
+import http.client
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+
+import profiling
+import throttle
+
+# リダイレクトを追跡する最大回数
+MAX_REDIRECTS = 5
+
+# ホストごとにプールしておくアイドル接続の最大数
+MAX_IDLE_PER_HOST = 4
+
+# ストリーミング受信時の1回あたりの受信バイト数
+CHUNK_SIZE = 64 * 1024
+
+# 接続先の差し替え（"scheme://host:port"。未設定なら各URLのホストへ接続する）
+UPSTREAM_OVERRIDE = os.environ.get("KNOWLEDGE_HUB_UPSTREAM_OVERRIDE", "")
+
+# 再利用した接続が切断済みだった場合に発生する例外
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+# プール: (scheme, host, port) -> アイドル接続のリスト
+_pool: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+_pool_lock = threading.Lock()
+
+# ホストごとのカウンタ
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+class Response:
+    """展開済み本文を持つHTTPレスポンス。"""
+
+    def __init__(self, url: str, status: int, reason: str, headers, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+def _record(host: str, **deltas):
+    """ホストのカウンタに値を加算する。"""
+    with _stats_lock:
+        counters = _stats.setdefault(
+            host,
+            {
+                "requests": 0,
+                "connections_opened": 0,
+                "connections_reused": 0,
+                "bytes_received": 0,
+                "bytes_decoded": 0,
+                "latency_seconds": 0.0,
+            },
+        )
+        for key, value in deltas.items():
+            counters[key] += value
+
+
+def stats() -> dict[str, dict]:
+    """
+    ホストごとのカウンタのスナップショットを返す。
+
+    Returns:
+        {ホスト名: {"requests", "connections_opened", "connections_reused",
+                  "bytes_received", "bytes_decoded", "latency_seconds"}} の辞書
+    """
+    with _stats_lock:
+        return {host: dict(counters) for host, counters in _stats.items()}
+
+
+def _new_connection(scheme: str, host: str, port: int, timeout: float) -> http.client.HTTPConnection:
+    """
+    新しい接続を生成する。環境変数のプロキシ設定があればトンネル経由にする。
+
+    Args:
+        scheme: "http" または "https"
+        host: 接続先ホスト
+        port: 接続先ポート
+        timeout: タイムアウト秒数
+
+    Returns:
+        未接続の HTTPConnection / HTTPSConnection
+    """
+    connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    proxy = urllib.request.getproxies().get(scheme)
+    if proxy and not urllib.request.proxy_bypass(host):
+        proxy_parts = urllib.parse.urlsplit(proxy)
+        conn = connection_class(proxy_parts.hostname, proxy_parts.port or 8080, timeout=timeout)
+        conn.set_tunnel(host, port)
+        return conn
+    return connection_class(host, port, timeout=timeout)
+
+
+def _connect_key(scheme: str, host: str, port: int) -> tuple[str, str, int]:
+    """
+    接続先の (scheme, host, port) を返す。UPSTREAM_OVERRIDE が設定されていればそちらに差し替える。
+
+    Args:
+        scheme: URLのスキーム
+        host: URLのホスト
+        port: URLのポート
+
+    Returns:
+        実際に接続する (scheme, host, port) のタプル
+    """
+    if not UPSTREAM_OVERRIDE:
+        return scheme, host, port
+    override = urllib.parse.urlsplit(UPSTREAM_OVERRIDE)
+    override_scheme = override.scheme.lower() or "http"
+    return (
+        override_scheme,
+        override.hostname or "127.0.0.1",
+        override.port or (443 if override_scheme == "https" else 80),
+    )
+
+
+def _checkout(
+    key: tuple[str, str, int], timeout: float, fresh: bool = False
+) -> tuple[http.client.HTTPConnection, bool]:
+    """
+    プールからアイドル接続を取り出す。なければ新しく生成する。
+
+    Args:
+        key: (scheme, host, port) のタプル
+        timeout: タイムアウト秒数
+        fresh: True の場合はプールを使わず必ず新しく生成する
+
+    Returns:
+        (接続, 再利用かどうか) のタプル
+    """
+    with _pool_lock:
+        idle = _pool.get(key)
+        if idle and not fresh:
+            conn = idle.pop()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+    return _new_connection(*key, timeout), False
+
+
+def _checkin(key: tuple[str, str, int], conn: http.client.HTTPConnection):
+    """使い終わった接続をプールに戻す。上限を超える場合は閉じる。"""
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def close_all():
+    """プール中の全接続を閉じる。"""
+    with _pool_lock:
+        connections = [conn for idle in _pool.values() for conn in idle]
+        _pool.clear()
+    for conn in connections:
+        conn.close()
+
+
+class _StreamDecoder:
+    """Content-Encoding に従ってチャンク単位で本文を展開する。"""
+
+    def __init__(self, content_encoding: str | None):
+        encoding = (content_encoding or "").strip().lower()
+        self._encoding = encoding
+        self._decompressor = None
+        if encoding in ("gzip", "x-gzip"):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decompressor = zlib.decompressobj()
+        self._started = False
+
+    def decompress(self, raw: bytes) -> bytes:
+        if self._decompressor is None:
+            return raw
+        if not self._started and self._encoding == "deflate":
+            self._started = True
+            # zlibヘッダなしの生deflateだった場合は展開器を作り直す
+            try:
+                return self._decompressor.decompress(raw)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._started = True
+        return self._decompressor.decompress(raw)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush() if self._decompressor is not None else b""
+
+
+class StreamResponse:
+    """
+    本文を読み進めながら受け取るHTTPレスポンス。
+
+    iter_chunks() で展開済みの本文をチャンク単位で返す。
+    最後まで読み終えた接続はプールに戻し、途中で閉じた接続は破棄する。
+    """
+
+    def __init__(self, url: str, key: tuple[str, str, int], conn, resp, reused: bool, started: float):
+        self.url = url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self._key = key
+        self._host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        self._conn = conn
+        self._resp = resp
+        self._reused = reused
+        self._started = started
+        self._received = 0
+        self._decoded = 0
+        self._finished = False
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE):
+        """
+        展開済みの本文をチャンク単位で返すジェネレータ。
+
+        Args:
+            chunk_size: 1回に受信するバイト数
+
+        Yields:
+            展開済み本文のバイト列
+
+        Raises:
+            urllib.error.URLError: 受信途中で通信に失敗した場合
+        """
+        decoder = _StreamDecoder(self._resp.getheader("Content-Encoding"))
+        try:
+            while True:
+                with profiling.stage("read", self._host):
+                    raw = self._resp.read(chunk_size)
+                if not raw:
+                    break
+                self._received += len(raw)
+                with profiling.stage("decode", self._host):
+                    data = decoder.decompress(raw)
+                if data:
+                    self._decoded += len(data)
+                    yield data
+            tail = decoder.flush()
+            if tail:
+                self._decoded += len(tail)
+                yield tail
+        except (OSError, http.client.HTTPException) as e:
+            self._finish(complete=False)
+            raise urllib.error.URLError(e) from e
+        self._finish(complete=True)
+
+    def read(self) -> bytes:
+        """本文をすべて読み込んで返す。"""
+        return b"".join(self.iter_chunks())
+
+    def close(self):
+        """読み終えていない場合は接続を破棄する。"""
+        self._finish(complete=False)
+
+    def _finish(self, complete: bool):
+        """接続をプールに戻すか破棄し、カウンタを記録する。"""
+        if self._finished:
+            return
+        self._finished = True
+        if complete and not self._resp.will_close:
+            _checkin(self._key, self._conn)
+        else:
+            self._conn.close()
+        # 接続先を差し替えていても、カウンタは元のURLのホスト単位で集計する
+        _record(
+            self._host,
+            requests=1,
+            connections_opened=0 if self._reused else 1,
+            connections_reused=1 if self._reused else 0,
+            bytes_received=self._received,
+            bytes_decoded=self._decoded,
+            latency_seconds=time.perf_counter() - self._started,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _send_once(url: str, headers: dict, timeout: float) -> StreamResponse:
+    """
+    リダイレクトを追跡せずに1回だけリクエストを送信し、ヘッダまで受信する。
+
+    切断済みの再利用接続に当たった場合は、新しい接続で1度だけ再送する。
+    """
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ""
+    port = parts.port or (443 if scheme == "https" else 80)
+    key = _connect_key(scheme, host, port)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    request_headers = {
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+        **headers,
+    }
+    if key != (scheme, host, port):
+        # 差し替え先でも元のホストを判別できるよう Host ヘッダは元のまま送る
+        request_headers["Host"] = parts.netloc
+
+    stats_host = host.lower()
+    started = time.perf_counter()
+    for attempt in range(2):
+        conn, reused = _checkout(key, timeout, fresh=attempt > 0)
+        try:
+            if conn.sock is None:
+                # 名前解決・TCP接続・TLSハンドシェイク
+                with profiling.stage("connect", stats_host):
+                    conn.connect()
+            with profiling.stage("request", stats_host):
+                conn.request("GET", path, headers=request_headers)
+                resp = conn.getresponse()
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if reused and attempt == 0:
+                continue
+            raise
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+        return StreamResponse(url, key, conn, resp, reused, started)
+
+
+def _send_with_retry(url: str, headers: dict, timeout: float) -> StreamResponse:
+    """
+    throttle.py の指示に従って待機しながらリクエストを送信する。
+
+    429 / 5xx と通信エラーはジッタ付き指数バックオフで再試行する。
+    Retry-After が指示された場合はその秒数だけ待ってから再試行する。
+
+    Raises:
+        urllib.error.URLError: 接続失敗時・サーキット遮断中
+    """
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    for attempt in range(throttle.MAX_RETRIES + 1):
+        throttle.before_request(host)
+        try:
+            response = _send_once(url, headers, timeout)
+        except (OSError, http.client.HTTPException) as e:
+            throttle.record_error(host)
+            if attempt < throttle.MAX_RETRIES:
+                profiling.sleep(throttle.backoff_delay(attempt), host)
+                continue
+            if isinstance(e, socket.timeout):
+                raise urllib.error.URLError(f"timed out: {url}") from e
+            raise urllib.error.URLError(e) from e
+
+        retry_after = throttle.after_response(host, response.status, response.headers)
+        if response.status in throttle.RETRY_STATUSES and attempt < throttle.MAX_RETRIES:
+            # 再試行する応答の本文は読み捨てて接続を再利用する
+            try:
+                response.read()
+            except urllib.error.URLError:
+                pass
+            # Retry-After の待機は次回の before_request で行う
+            if retry_after is None:
+                profiling.sleep(throttle.backoff_delay(attempt), host)
+            continue
+        return response
+
+
+def open_stream(url: str, headers: dict | None = None, timeout: float = 15) -> StreamResponse:
+    """
+    プール済み接続でGETリクエストを送信し、本文を読む前のレスポンスを返す。
+
+    リダイレクトは追跡し、429 / 5xx と通信エラーは再試行する。
+    再試行しきれなかったステータスコードによる例外は送出しないため、
+    呼び出し側で判定する。使い終わったら close() するか with 文で使う。
+
+    Args:
+        url: リクエスト先のURL
+        headers: 追加のリクエストヘッダ
+        timeout: タイムアウト秒数
+
+    Returns:
+        StreamResponse
+
+    Raises:
+        urllib.error.URLError: 接続失敗時・リダイレクト回数超過時・サーキット遮断中
+    """
+    headers = dict(headers or {})
+    for _ in range(MAX_REDIRECTS + 1):
+        response = _send_with_retry(url, headers, timeout)
+
+        location = response.headers.get("Location")
+        if response.status in (301, 302, 303, 307, 308) and location:
+            # リダイレクト応答の本文は読み捨てて接続を再利用する
+            response.read()
+            url = urllib.parse.urljoin(url, location)
+            # 別ホストへの条件付きヘッダは意味を持たないため外す
+            headers.pop("If-None-Match", None)
+            headers.pop("If-Modified-Since", None)
+            continue
+        return response
+
+    raise urllib.error.URLError(f"リダイレクト回数が上限を超えました: {url}")
+
+
+def request(url: str, headers: dict | None = None, timeout: float = 15) -> Response:
+    """
+    プール済み接続でGETリクエストを送信し、リダイレクトを追跡してレスポンスを返す。
+
+    ステータスコードによる例外は送出しないため、呼び出し側で判定する。
+
+    Args:
+        url: リクエスト先のURL
+        headers: 追加のリクエストヘッダ
+        timeout: タイムアウト秒数
+
+    Returns:
+        Response（本文は展開済み）
+
+    Raises:
+        urllib.error.URLError: 接続失敗時・リダイレクト回数超過時・サーキット遮断中
+    """
+    with open_stream(url, headers=headers, timeout=timeout) as response:
+        body = response.read()
+    return Response(response.url, response.status, response.reason, response.headers, body)
+
+
+def get(url: str, headers: dict | None = None, timeout: float = 15) -> bytes:
+    """
+    GETリクエストを送信し、2xx 以外は HTTPError として送出する。
+
+    Args:
+        url: リクエスト先のURL
+        headers: 追加のリクエストヘッダ
+        timeout: タイムアウト秒数
+
+    Returns:
+        展開済みのレスポンス本文
+
+    Raises:
+        urllib.error.HTTPError: 2xx 以外のステータス時
+        urllib.error.URLError: 接続失敗時
+    """
+    response = request(url, headers=headers, timeout=timeout)
+    raise_for_status(response)
+    return response.body
+
+
+def raise_for_status(response: Response | StreamResponse):
+    """
+    2xx 以外のレスポンスを urllib と同じ HTTPError として送出する。
+
+    Args:
+        response: 判定するレスポンス
+
+    Raises:
+        urllib.error.HTTPError: 2xx 以外のステータス時
+    """
+    if not 200 <= response.status < 300:
+        raise urllib.error.HTTPError(response.url, response.status, response.reason, response.headers, None)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+既存の Headlines JSON の記事IDを正規化URLベースのIDに付け替える移行スクリプト
+
+記事IDを生のURLではなく正規化URL（url_canonical.py）から生成するように
+変えたため、それ以前に作ったレポートの記事IDを付け替える。
+articles[].id に加えて、pickupTop3[].articleId と trendAnalysis[].relatedArticleIds の
+参照も同じ対応で書き換える。正規化すると同じ記事になる重複記事は先の1件にまとめる
+（チェック状態はどちらかがチェック済みならチェック済みとする）。
+
+旧ID -> 新ID の対応は Headlines ディレクトリ直下の id_map.json に書き出す
+（月ディレクトリには置かない）。既存の対応表があれば追記し、何度実行しても
+結果は変わらない。記事ストア・検索インデックスが作成済みなら、書き換えた
+レポートをそれぞれに登録し直す。
+
+使い方:
+    python3 migrate_canonical_ids.py [--headlines ディレクトリ] [--dry-run] [--no-store]
+
+例:
+    # 書き換える件数だけを確認する（ファイルは変更しない）
+    python3 migrate_canonical_ids.py --dry-run
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import article_store
+import profiling
+import search_index
+from url_canonical import url_id
+
+# 旧ID -> 新ID の対応表のファイル名（Headlines ディレクトリ直下）
+ID_MAP_FILENAME = "id_map.json"
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="Headlines JSON の記事IDを正規化URLベースのIDに付け替える")
+    parser.add_argument("--headlines", type=Path, default=article_store.HEADLINES_DIR, help="Headlines ディレクトリ")
+    parser.add_argument("--dry-run", action="store_true", help="ファイルを変更せず、書き換える件数だけを出力する")
+    parser.add_argument("--no-store", action="store_true", help="記事ストア・検索インデックスに登録し直さない")
+    return parser.parse_args()
+
+
+def rekey_report(report: dict) -> tuple[dict[str, str], list[dict]]:
+    """
+    レポートの記事IDと、その参照を正規化URLベースのIDに書き換える。
+
+    Args:
+        report: Headlines JSON のレポート辞書（その場で書き換える）
+
+    Returns:
+        (変わったIDの {旧ID: 新ID}, まとめた重複記事の {id, url, mergedInto} のリスト) のタプル
+    """
+    id_map: dict[str, str] = {}
+    merged: list[dict] = []
+    merged_articles: list[dict] = []
+    kept: dict[str, dict] = {}
+    articles = []
+    for article in report.get("articles", []):
+        old_id = article.get("id")
+        if not article.get("url"):
+            articles.append(article)
+            continue
+        new_id = url_id(article["url"])
+        if old_id != new_id:
+            id_map[old_id] = new_id
+        first = kept.get(new_id)
+        if first is not None:
+            first["checked"] = bool(first.get("checked") or article.get("checked"))
+            merged.append({"id": old_id, "url": article["url"], "mergedInto": new_id})
+            merged_articles.append(article)
+            continue
+        article["id"] = new_id
+        kept[new_id] = article
+        articles.append(article)
+    report["articles"] = articles
+
+    for pickup in report.get("pickupTop3", []):
+        pickup["articleId"] = id_map.get(pickup.get("articleId"), pickup.get("articleId"))
+    for trend in report.get("trendAnalysis", []):
+        related = [id_map.get(i, i) for i in trend.get("relatedArticleIds", [])]
+        trend["relatedArticleIds"] = list(dict.fromkeys(related))
+
+    # まとめた記事の分だけ件数サマリー（カテゴリ別 / convert_md_to_json.py のランク別）を減らす
+    summary = report.get("summary")
+    if merged and isinstance(summary, dict):
+        summary["total"] = len(articles)
+        by_category = summary.get("byCategory", {})
+        for article in merged_articles:
+            if by_category.get(article.get("category")):
+                by_category[article["category"]] -= 1
+            if isinstance(summary.get(article.get("rank")), int) and summary[article["rank"]] > 0:
+                summary[article["rank"]] -= 1
+
+    return id_map, merged
+
+
+def write_json(path: Path, data: dict, trailing_newline: bool):
+    """JSONを一時ファイル経由で書き出す（元ファイルの末尾改行の有無を維持する）。"""
+    text = json.dumps(data, ensure_ascii=False, indent=2) + ("\n" if trailing_newline else "")
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def load_id_map(path: Path) -> dict[str, str]:
+    """既存の対応表を読み込む（未作成・破損時は空）。"""
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("ids", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def main():
+    """メイン処理: Headlines JSON の記事IDを付け替え、結果をJSONで出力する。"""
+    args = parse_args()
+    headlines_dir = args.headlines
+    if not headlines_dir.is_dir():
+        print(
+            json.dumps({"error": f"Headlines ディレクトリが見つかりません: {headlines_dir}"}, ensure_ascii=False),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    result = {"files": 0, "changed_files": 0, "rekeyed": 0, "merged": [], "errors": [], "dry_run": args.dry_run}
+    id_map: dict[str, str] = {}
+    changed_reports = []
+    for path in sorted(headlines_dir.glob("*/*.json")):
+        result["files"] += 1
+        try:
+            text = path.read_text(encoding="utf-8")
+            with profiling.stage("parse"):
+                report = json.loads(text)
+            file_map, merged = rekey_report(report)
+        except (OSError, ValueError, AttributeError) as e:
+            result["errors"].append({"path": str(path), "error": str(e)})
+            continue
+        if not file_map and not merged:
+            continue
+        id_map.update(file_map)
+        result["changed_files"] += 1
+        result["rekeyed"] += len(file_map)
+        result["merged"].extend({"path": str(path.relative_to(headlines_dir)), **m} for m in merged)
+        if not args.dry_run:
+            with profiling.stage("serialize"):
+                write_json(path, report, text.endswith("\n"))
+            changed_reports.append(report)
+
+    map_path = headlines_dir / ID_MAP_FILENAME
+    result["id_map"] = str(map_path)
+    if args.dry_run or not changed_reports:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    if id_map:
+        # 以前の移行で付け替えたIDも、今回の付け替え先まで辿れるようにする
+        ids = load_id_map(map_path)
+        ids = {old: id_map.get(new, new) for old, new in ids.items()}
+        ids.update(id_map)
+        write_json(map_path, {"updatedAt": datetime.now().isoformat(), "ids": ids}, True)
+
+    if not args.no_store:
+        try:
+            if article_store.db_exists():
+                conn = article_store.connect()
+                try:
+                    for report in changed_reports:
+                        article_store.upsert_report(report, conn)
+                finally:
+                    conn.close()
+            if search_index.INDEX_PATH.exists():
+                conn = search_index.connect()
+                try:
+                    for report in changed_reports:
+                        search_index.index_report(report, conn)
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            result["errors"].append({"error": f"記事ストア・検索インデックスへの登録に失敗しました: {e}"})
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
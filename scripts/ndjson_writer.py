@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+1行1JSON（NDJSON）形式の出力
+
+fetch_*.py / generate_report.py / build_report.py の --ndjson モードで共有する書き出し処理。
+全体を1つのJSONにまとめてから出力する代わりに、次の3種類のレコードを
+1行ずつ書き出してその都度フラッシュする。後段の処理は先頭の記事から
+すぐに読み始められ、コメント数が多くても出力側のメモリ使用量は一定に保たれる。
+
+    {"type": "header", "kind": "hatena_rss", ...}            実行条件などのメタ情報
+    {"type": "article", "data": {...}}                       記事・コメントごとのレコード
+    {"type": "comment", "url": "...", "data": {...}}
+    {"type": "trailer", "kind": "hatena_rss", "counts": {"article": 42}, ..., "errors": []}
+
+トレーラーは最後に必ず1行出力される。途中で異常終了した場合はトレーラーが
+欠けるため、読み手はトレーラーの有無で出力が完結したかを判定できる。
+
+使い方:
+    writer = NdjsonWriter("hatena_rss")
+    writer.header(fetched_at=..., categories=categories)
+    for article in articles:
+        writer.record("article", article)
+    writer.error({"category": "it", "error": "..."})
+    writer.trailer()
+"""
+
+import json
+import sys
+
+import profiling
+
+
+class NdjsonWriter:
+    """ヘッダ・レコード・トレーラーを1行ずつ書き出す。"""
+
+    def __init__(self, kind: str, out=None):
+        """
+        Args:
+            kind: 出力の種類（"hatena_rss" / "yahoo_comments" 等）
+            out: 出力先のテキストストリーム（省略時は標準出力）
+        """
+        self.kind = kind
+        self.out = out or sys.stdout
+        self.counts: dict[str, int] = {}
+        self.errors: list[dict] = []
+
+    def _write(self, obj: dict):
+        """1レコードを1行として書き出し、すぐにフラッシュする。"""
+        with profiling.stage("serialize"):
+            line = json.dumps(obj, ensure_ascii=False)
+        self.out.write(line + "\n")
+        self.out.flush()
+
+    def header(self, **fields):
+        """
+        ヘッダレコードを書き出す。
+
+        Args:
+            **fields: ヘッダに含めるメタ情報
+        """
+        self._write({"type": "header", "kind": self.kind, **fields})
+
+    def record(self, record_type: str, data: dict, **fields):
+        """
+        記事・コメント等のレコードを1件書き出す。
+
+        Args:
+            record_type: レコードの種類（"article" / "comment" 等）
+            data: レコード本体
+            **fields: 本体の外に付ける識別情報（親記事のURL等）
+        """
+        self.counts[record_type] = self.counts.get(record_type, 0) + 1
+        self._write({"type": record_type, **fields, "data": data})
+
+    def error(self, error: dict):
+        """
+        エラーをトレーラーに含めるために記録する。
+
+        Args:
+            error: エラー内容の辞書
+        """
+        self.errors.append(error)
+
+    def trailer(self, **fields):
+        """
+        レコード種類ごとの件数とエラーを持つトレーラーを書き出す。
+
+        Args:
+            **fields: トレーラーに含める追加の集計値
+        """
+        self._write({"type": "trailer", "kind": self.kind, "counts": self.counts, **fields, "errors": self.errors})
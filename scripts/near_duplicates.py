@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+ソースをまたいだ同一ニュースの検出（ニアデュプリケート判定）
+
+同じニュースが Yahoo ニュースの記事・はてブの元記事・Reddit のリンク投稿として
+別々のURLで届く場合に、タイトルと概要の類似度で1つのストーリーにまとめる。
+
+手順:
+    1. タイトル・概要を正規化し、文字3-gramの集合（シングル）にする
+    2. MinHash で集合を NUM_PERM 個の最小ハッシュ値（シグネチャ）に縮約する
+    3. シグネチャを LSH_BANDS 個の帯に分け、帯が一致する組だけを候補にする（LSH）
+    4. 候補の組のうち推定 Jaccard 係数が SIMILARITY_THRESHOLD 以上のものを Union-Find でまとめる
+
+概要のない記事（Reddit のリンク投稿等）はタイトルだけで比べるため、短いタイトルが偶然
+一致しやすい。シングルが MIN_TITLE_SHINGLES 個未満の概要のない記事はまとめない。
+また、タイトル中の数（"3.12" / "3.13" 等）が異なる記事は、類似度によらず同じクラスタにしない。
+数のないタイトルを介して連鎖的につながる場合も同じで、クラスタごとに数の集合を持って判定する。
+
+全組の比較をしないため、件数が増えても計算量はほぼ線形に収まる。
+
+使い方:
+    from near_duplicates import cluster_articles
+
+    clustered = cluster_articles(all_articles)
+    # 各クラスタの代表記事に duplicates（まとめた記事）と aggregatedScore が付く
+"""
+
+import hashlib
+import re
+import struct
+import unicodedata
+from functools import lru_cache
+
+# MinHash のハッシュ関数の数
+NUM_PERM = 64
+
+# LSH の帯の数（1帯あたり NUM_PERM // LSH_BANDS 行。しきい値の目安は (1/帯数)^(1/行数) ≈ 0.5）
+LSH_BANDS = 16
+
+# 同一ストーリーとみなす推定 Jaccard 係数
+SIMILARITY_THRESHOLD = 0.5
+
+# シングルの文字数
+SHINGLE_SIZE = 3
+
+# 概要から使う先頭の文字数（長い概要で類似度が薄まらないようにする）
+DESCRIPTION_CHARS = 200
+
+# 概要のない記事をまとめる対象にする最小のシングル数（"Help" と "Help!" 等をまとめない）
+MIN_TITLE_SHINGLES = 10
+
+# シングル1つ分の NUM_PERM 個のハッシュ値（32ビット整数）の並び
+_HASH_VALUES = struct.Struct(f"<{NUM_PERM}I")
+
+# タイトル末尾の媒体名: "(ITmedia NEWS)" / "（Impress Watch）"
+_MEDIA_SUFFIX = re.compile(r"\s*[(（][^()（）]*[)）]\s*$")
+
+# タイトルの区切り: "記事名 - サイト名" / "記事名 | サイト名" / "記事名｜サイト名"
+_TITLE_SEPARATOR = re.compile(r"\s+[-|–—]\s+|｜")
+
+# 文字・数字以外
+_NON_WORD = re.compile(r"[\W_]+")
+
+# タイトル中の数: "3.12" / "1,000" / "5"
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def normalize_title(title: str) -> str:
+    """
+    比較用にタイトルを正規化する。
+
+    末尾の媒体名と「 - サイト名」等の区切り以降を取り除き（最も長い区間を残す）、
+    NFKC正規化・小文字化して記号と空白を除く。
+
+    Args:
+        title: 記事タイトル
+
+    Returns:
+        正規化したタイトル
+    """
+    text = unicodedata.normalize("NFKC", title)
+    text = _MEDIA_SUFFIX.sub("", text)
+    text = max(_TITLE_SEPARATOR.split(text), key=len, default="")
+    return _NON_WORD.sub("", text.lower())
+
+
+def shingles(article: dict) -> set[str]:
+    """
+    記事のタイトルと概要から、文字 SHINGLE_SIZE-gram の集合を作る。
+
+    Args:
+        article: title / description を持つ記事辞書
+
+    Returns:
+        シングルの集合
+    """
+    title = normalize_title(article.get("title", ""))
+    description = _NON_WORD.sub("", unicodedata.normalize("NFKC", article.get("description") or "").lower())
+    result = set()
+    for text in (title, description[:DESCRIPTION_CHARS]):
+        if len(text) <= SHINGLE_SIZE:
+            if text:
+                result.add(text)
+            continue
+        for i in range(len(text) - SHINGLE_SIZE + 1):
+            result.add(text[i : i + SHINGLE_SIZE])
+    return result
+
+
+def title_numbers(article: dict) -> frozenset[str]:
+    """
+    記事タイトル（末尾の媒体名を除く）に含まれる数の集合を返す。
+
+    Args:
+        article: title を持つ記事辞書
+
+    Returns:
+        数の文字列の集合
+    """
+    title = _MEDIA_SUFFIX.sub("", unicodedata.normalize("NFKC", article.get("title", "")))
+    return frozenset(_NUMBER.findall(title))
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash_values(shingle: str) -> tuple[int, ...]:
+    """
+    シングルを NUM_PERM 個の独立したハッシュ関数にかけた値を返す。
+
+    SHAKE128 の可変長出力を32ビットずつに区切って使う（ハッシュ関数ごとに
+    計算し直すより速く、実行ごとに同じ値になる）。同じ3-gramは記事をまたいで
+    何度も現れるため結果をキャッシュする。
+    """
+    return _HASH_VALUES.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(_HASH_VALUES.size))
+
+
+def minhash(values: set[str]) -> tuple[int, ...]:
+    """
+    シングルの集合から MinHash シグネチャを計算する。
+
+    Args:
+        values: シングルの集合
+
+    Returns:
+        NUM_PERM 個の最小ハッシュ値のタプル（空集合の場合は空のタプル）
+    """
+    if not values:
+        return ()
+    return tuple(map(min, zip(*map(_hash_values, values))))
+
+
+def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """
+    2つのシグネチャから Jaccard 係数を推定する。
+
+    Args:
+        sig_a: MinHash シグネチャ
+        sig_b: MinHash シグネチャ
+
+    Returns:
+        一致した最小ハッシュ値の割合（0.0〜1.0）
+    """
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _find(parent: list[int], i: int) -> int:
+    """Union-Find の根を返す（経路圧縮付き）。"""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def article_signature(article: dict) -> tuple[int, ...]:
+    """
+    記事の MinHash シグネチャを返す（概要がなくタイトルが短い記事はまとめないため空）。
+
+    Args:
+        article: title / description を持つ記事辞書
+
+    Returns:
+        MinHash シグネチャ（まとめる対象にしない記事は空のタプル）
+    """
+    values = shingles(article)
+    if not article.get("description") and len(values) < MIN_TITLE_SHINGLES:
+        return ()
+    return minhash(values)
+
+
+def find_clusters(articles: list[dict]) -> list[list[int]]:
+    """
+    ニアデュプリケートな記事をまとめたクラスタを返す。
+
+    Args:
+        articles: title / description を持つ記事辞書のリスト
+
+    Returns:
+        記事インデックスのリストのリスト（元の順序で、最初の出現位置の順に並ぶ。単独の記事も1件のクラスタ）
+    """
+    signatures = [article_signature(a) for a in articles]
+    numbers = [title_numbers(a) for a in articles]
+    rows = NUM_PERM // LSH_BANDS
+    parent = list(range(len(articles)))
+    # 根ごとのクラスタ内のタイトルの数の集合（数のある記事を含まないクラスタは空）
+    cluster_numbers = list(numbers)
+    no_numbers: frozenset[str] = frozenset()
+
+    # 帯ごとのバケツで候補の組を作り、推定類似度がしきい値以上なら同じクラスタにまとめる
+    for band in range(LSH_BANDS):
+        buckets: dict[tuple, list[int]] = {}
+        for i, signature in enumerate(signatures):
+            if signature:
+                buckets.setdefault(signature[band * rows : (band + 1) * rows], []).append(i)
+        for members in buckets.values():
+            # バケツ内のクラスタごとに先頭の記事とだけ比べる（同一記事が大量にあっても線形に収まる）。
+            # タイトル中の数が食い違う記事はまとめないため、先頭の記事は数の集合ごとに分けて持ち、
+            # 数が同じか、どちらかに数がない先頭の記事とだけ比べる
+            heads: dict[frozenset[str], list[int]] = {}
+            for i in members:
+                root_i = _find(parent, i)
+                if numbers[i]:
+                    candidates = [*heads.get(numbers[i], ()), *heads.get(no_numbers, ())]
+                else:
+                    candidates = [head for group in heads.values() for head in group]
+                for head in candidates:
+                    root_head = _find(parent, head)
+                    if root_i == root_head:
+                        break
+                    # 数のないタイトルを介して、数の異なるクラスタ同士をつなげない
+                    numbers_i, numbers_head = cluster_numbers[root_i], cluster_numbers[root_head]
+                    if numbers_i and numbers_head and numbers_i != numbers_head:
+                        continue
+                    if similarity(signatures[i], signatures[head]) >= SIMILARITY_THRESHOLD:
+                        root, child = min(root_i, root_head), max(root_i, root_head)
+                        parent[child] = root
+                        cluster_numbers[root] = numbers_i or numbers_head
+                        break
+                else:
+                    heads.setdefault(numbers[i], []).append(i)
+
+    clusters: dict[int, list[int]] = {}
+    for i in range(len(articles)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+    return list(clusters.values())
+
+
+def cluster_articles(articles: list[dict]) -> list[dict]:
+    """
+    同一ストーリーの記事を代表記事1件にまとめた候補リストを返す。
+
+    代表はクラスタ内でスコアが最も高い記事（同点なら先に現れた記事）とし、
+    duplicates（まとめた他の記事の url / source / title / score）・
+    sources（クラスタ内のソース）・aggregatedScore（スコアの合計）を付け加える。
+    重複のない記事はそのまま返す。
+
+    Args:
+        articles: merge_articles が返す候補記事のリスト
+
+    Returns:
+        代表記事のリスト（代表の元の順序を維持）
+    """
+    representatives = []
+    for members in find_clusters(articles):
+        if len(members) == 1:
+            representatives.append((members[0], articles[members[0]]))
+            continue
+        best = max(members, key=lambda i: (articles[i].get("score", 0), -i))
+        duplicates = [
+            {
+                "url": articles[i]["url"],
+                "source": articles[i].get("source"),
+                "title": articles[i].get("title"),
+                "score": articles[i].get("score", 0),
+            }
+            for i in members
+            if i != best
+        ]
+        representative = {
+            **articles[best],
+            "duplicates": duplicates,
+            "sources": sorted({articles[i].get("source") for i in members}),
+            "aggregatedScore": sum(articles[i].get("score", 0) for i in members),
+        }
+        representatives.append((best, representative))
+
+    representatives.sort(key=lambda item: item[0])
+    return [article for _, article in representatives]
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+PROFILE.md に基づく候補記事の事前スコアリング
+
+PROFILE.md の興味領域（見出しと箇条書き）からキーワードを取り出し、
+ランク（S/A/B/C）に応じた重みを付けて Aho-Corasick の多パターン照合器にまとめる。
+候補記事のタイトル・概要・タグを1回ずつ走査するだけで全キーワードを照合し、
+記事ごとに推定ランク・推定カテゴリ・一致したキーワードを付ける。
+
+人手やLLMによる評価は、推定が不確かな記事（borderline）だけに絞り込める。
+
+PROFILE.md の読み方:
+    - 「さらに深掘りしたい分野」→ S、「まだ詳しくない分野」→ A、
+      「仕事分野」「趣味分野」→ B、「その他」→ C（README の評価ランクの基準に対応）
+    - 「####」見出しをカテゴリとし、見出し自体と配下の箇条書きをキーワードにする
+    - 箇条書きは "/"・"・"・"、"・括弧等で区切って複数のキーワードにする。
+      括弧内を「同義語: a, b」「別名: a, b」と書くと同じランク・カテゴリの同義語になる
+    - 「（あなたの〜）」のようなテンプレートの記入欄と「基本情報」は読み飛ばす
+    - 同じキーワードが複数の場所にある場合は高いランクを採り、カテゴリは最初に見つかったものを使う
+
+推定の規則:
+    - rank: 一致したキーワードのうち最も高いランク（一致なしは D）
+    - category: カテゴリごとの重みの合計が最も大きいカテゴリ（なければ None）
+    - score: 一致したキーワードの重みの合計（タイトルでの一致は TITLE_WEIGHT 倍）
+    - borderline: タイトルに一致がなく、概要・タグにだけ一致した記事、または
+      一致のない Reddit 投稿（subreddit 自体が興味領域に対応するため）
+
+使い方:
+    # 候補一覧に推定ランクを付けて出力
+    python3 generate_report.py <はてなJSON> <YahooJSON> <RedditJSON> --prescore
+
+    # PROFILE.md から取り出したキーワードを確認
+    python3 prescore.py terms [--profile-md パス]
+
+    # 任意のタイトルを採点
+    python3 prescore.py score <タイトル> [--profile-md パス]
+"""
+
+import json
+import re
+import sys
+import unicodedata
+from collections import deque
+from pathlib import Path
+
+import profiling
+
+# リポジトリのルートディレクトリ
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# PROFILE.md のパス（なければ PROFILE.example.md を使う）
+PROFILE_PATH = REPO_ROOT / "PROFILE.md"
+EXAMPLE_PROFILE_PATH = REPO_ROOT / "PROFILE.example.md"
+
+# ランクごとの重み（README の評価ランクの点数）
+RANK_WEIGHTS = {"S": 5, "A": 4, "B": 3, "C": 2}
+
+# 一致なしのランク
+NO_MATCH_RANK = "D"
+
+# タイトルでの一致の重みの倍率
+TITLE_WEIGHT = 2
+
+# ランクを決める見出し（「###」見出しに含まれる語 -> ランク）
+RANK_SECTIONS = [
+    ("さらに深掘りしたい", "S"),
+    ("まだ詳しくない", "A"),
+    ("仕事分野", "B"),
+    ("趣味分野", "B"),
+    ("その他", "C"),
+]
+
+# 読み飛ばす「##」見出し
+SKIP_SECTIONS = {"基本情報"}
+
+# 組み込みの同義語（正規化したキーワード -> 同義語）
+SYNONYMS = {
+    "ai": ["人工知能", "生成ai"],
+    "llm": ["大規模言語モデル"],
+    "javascript": ["js", "ecmascript"],
+    "フロントエンド開発": ["フロントエンド", "frontend", "front-end"],
+    "バックエンド開発": ["バックエンド", "backend"],
+    "セキュリティ": ["security", "脆弱性"],
+    "個人開発": ["indie hacker", "side project"],
+    "マネジメント": ["management"],
+    "政治": ["politics"],
+    "選挙": ["election"],
+    "経済": ["economy"],
+}
+
+# 箇条書き・見出しをキーワードに分ける区切り
+_TERM_SEPARATOR = re.compile(r"\s*(?:/|・|、|,|等の|など|等)\s*")
+
+# 括弧: "AI（開発とセキュリティへの応用）"
+_PARENTHESES = re.compile(r"[(（]([^()（）]*)[)）]")
+
+# 括弧内の同義語の指定: "同義語: a, b" / "別名: a, b"
+_SYNONYM_PREFIX = re.compile(r"^\s*(?:同義語|別名)\s*[:：]\s*")
+
+# キーワードの前後から取り除く一般的な語
+_GENERIC_PREFIXES = ("各種", "最新の")
+_GENERIC_SUFFIXES = ("技術スタック", "ニュース", "全般", "分野", "系")
+
+# 見出し: "## 基本情報" / "### 仕事分野" / "#### AI/LLM"
+_HEADING = re.compile(r"^(#{2,4})\s+(.+?)\s*$")
+
+# 箇条書き: "- JavaScript/TypeScript技術スタック"
+_BULLET = re.compile(r"^\s*[-*]\s+(.+?)\s*$")
+
+
+def normalize(text: str) -> str:
+    """照合用にNFKC正規化・小文字化する。"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _is_placeholder(text: str) -> bool:
+    """テンプレートの記入欄（「（あなたの名前）」等）なら True を返す。"""
+    return "あなたの" in text or bool(re.fullmatch(r"[(（][^()（）]*[)）]", text.strip()))
+
+
+def split_terms(text: str) -> list[str]:
+    """
+    箇条書き・見出しの文をキーワードに分ける。
+
+    Args:
+        text: 箇条書き・見出しの文
+
+    Returns:
+        キーワード（正規化済み）のリスト（括弧内の同義語の指定を含む）
+    """
+    pieces = []
+    for inner in _PARENTHESES.findall(text):
+        pieces.extend(_TERM_SEPARATOR.split(_SYNONYM_PREFIX.sub("", inner)))
+    pieces.extend(_TERM_SEPARATOR.split(_PARENTHESES.sub(" / ", text)))
+
+    terms = []
+    for piece in pieces:
+        term = normalize(piece).strip(" :：")
+        for prefix in _GENERIC_PREFIXES:
+            if term.startswith(prefix) and len(term) > len(prefix) + 1:
+                term = term[len(prefix) :]
+        for suffix in _GENERIC_SUFFIXES:
+            if term.endswith(suffix) and len(term) > len(suffix) + 1:
+                term = term[: -len(suffix)]
+        term = term.strip()
+        if len(term) >= 2 and not term.isdigit() and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def parse_profile(text: str) -> dict[str, dict]:
+    """
+    PROFILE.md からキーワードを取り出す。
+
+    Args:
+        text: PROFILE.md の内容
+
+    Returns:
+        {キーワード: {"rank", "category", "weight"}} の辞書
+    """
+    terms: dict[str, dict] = {}
+
+    def add(term: str, rank: str, category: str | None):
+        current = terms.get(term)
+        if current is None:
+            terms[term] = {"rank": rank, "category": category, "weight": RANK_WEIGHTS[rank]}
+            return
+        if RANK_WEIGHTS[rank] > current["weight"]:
+            current["rank"], current["weight"] = rank, RANK_WEIGHTS[rank]
+        current["category"] = current["category"] or category
+
+    skip = False
+    rank = None
+    category = None
+    for line in text.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            level, title = len(heading.group(1)), heading.group(2)
+            if level == 2:
+                skip = title in SKIP_SECTIONS
+                rank = category = None
+            elif level == 3:
+                rank = next((r for word, r in RANK_SECTIONS if word in title), None)
+                category = None
+            elif not skip and rank and not _is_placeholder(title):
+                category = title
+                for term in split_terms(title):
+                    add(term, rank, category)
+            continue
+
+        bullet = _BULLET.match(line)
+        if bullet and not skip and rank and not _is_placeholder(bullet.group(1)):
+            for term in split_terms(bullet.group(1)):
+                add(term, rank, category)
+
+    for term, synonyms in SYNONYMS.items():
+        if term in terms:
+            for synonym in synonyms:
+                add(synonym, terms[term]["rank"], terms[term]["category"])
+    return terms
+
+
+class KeywordMatcher:
+    """Aho-Corasick 法による多パターン照合器。"""
+
+    def __init__(self, terms: dict[str, dict]):
+        """
+        Args:
+            terms: parse_profile が返すキーワードの辞書
+        """
+        self.terms = terms
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[str]] = [[]]
+
+        # キーワードのトライ木
+        for term in terms:
+            node = 0
+            for char in term:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(term)
+
+        # 幅優先で失敗遷移を張り、失敗先の出力を引き継ぐ
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> set[str]:
+        """
+        正規化済みの文に含まれるキーワードを返す。
+
+        英数字で始まる・終わるキーワードは、前後が英数字に続いていない場合だけ一致とする
+        （"go" が "google" に一致しないようにする）。
+
+        Args:
+            text: normalize 済みの文
+
+        Returns:
+            一致したキーワードの集合
+        """
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for term in output[node]:
+                if term in found:
+                    continue
+                start = end - len(term) + 1
+                if _is_word_char(term[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(term[-1]) and end + 1 < len(text) and _is_word_char(text[end + 1]):
+                    continue
+                found.add(term)
+        return found
+
+
+def _is_word_char(char: str) -> bool:
+    """ASCIIの英数字なら True を返す。"""
+    return char.isascii() and char.isalnum()
+
+
+def load_matcher(profile_path: Path | None = None) -> KeywordMatcher:
+    """
+    PROFILE.md を読み込んで照合器を作る。
+
+    Args:
+        profile_path: PROFILE.md のパス（省略時は PROFILE_PATH、なければ EXAMPLE_PROFILE_PATH）
+
+    Returns:
+        KeywordMatcher
+
+    Raises:
+        FileNotFoundError: PROFILE.md が見つからない場合
+    """
+    path = profile_path or (PROFILE_PATH if PROFILE_PATH.exists() else EXAMPLE_PROFILE_PATH)
+    return KeywordMatcher(parse_profile(path.read_text(encoding="utf-8")))
+
+
+def score_article(article: dict, matcher: KeywordMatcher) -> dict:
+    """
+    記事1件を採点する。
+
+    Args:
+        article: title / description / tags / source を持つ記事辞書
+        matcher: 照合器
+
+    Returns:
+        score / rank / category / matched（一致したキーワード）/ borderline を持つ辞書
+    """
+    title_terms = matcher.find(normalize(article.get("title") or ""))
+    body = " ".join([article.get("description") or "", *(article.get("tags") or [])])
+    body_terms = matcher.find(normalize(body)) - title_terms if body.strip() else set()
+
+    score = 0
+    best_rank = NO_MATCH_RANK
+    category_weights: dict[str, int] = {}
+    for term in title_terms | body_terms:
+        info = matcher.terms[term]
+        weight = info["weight"] * (TITLE_WEIGHT if term in title_terms else 1)
+        score += weight
+        if info["weight"] > RANK_WEIGHTS.get(best_rank, 0):
+            best_rank = info["rank"]
+        if info["category"]:
+            category_weights[info["category"]] = category_weights.get(info["category"], 0) + weight
+
+    matched = sorted(title_terms | body_terms, key=lambda t: (-matcher.terms[t]["weight"], t))
+    borderline = not title_terms and (bool(body_terms) or article.get("source") == "reddit")
+    return {
+        "score": score,
+        "rank": best_rank,
+        "category": max(category_weights, key=category_weights.get) if category_weights else None,
+        "matched": matched,
+        "borderline": borderline,
+    }
+
+
+def prescore_articles(articles: list[dict], matcher: KeywordMatcher | None = None) -> list[dict]:
+    """
+    候補記事のリストを1回の走査で採点し、各記事に prescore を付ける。
+
+    Args:
+        articles: merge_articles が返す候補記事のリスト（その場で書き換える）
+        matcher: 照合器（省略時は load_matcher で作る）
+
+    Returns:
+        prescore を付けた候補記事のリスト
+    """
+    matcher = matcher or load_matcher()
+    for article in articles:
+        article["prescore"] = score_article(article, matcher)
+    return articles
+
+
+def summarize(articles: list[dict]) -> dict:
+    """
+    採点済みの候補記事の推定ランク別件数と borderline の件数を集計する。
+
+    Args:
+        articles: prescore_articles で採点した候補記事のリスト
+
+    Returns:
+        by_rank / borderline を持つ辞書
+    """
+    by_rank = {rank: 0 for rank in [*RANK_WEIGHTS, NO_MATCH_RANK]}
+    borderline = 0
+    for article in articles:
+        by_rank[article["prescore"]["rank"]] += 1
+        borderline += article["prescore"]["borderline"]
+    return {"by_rank": by_rank, "borderline": borderline}
+
+
+def main():
+    """メイン処理: キーワードの一覧または採点結果をJSONで出力する。"""
+    argv = sys.argv[1:]
+    profile_path = None
+    if "--profile-md" in argv:
+        value_index = argv.index("--profile-md")
+        if value_index + 1 < len(argv):
+            profile_path = Path(argv[value_index + 1])
+        del argv[value_index : value_index + 2]
+    args = [a for a in argv if not a.startswith("--")]
+    command = args[0] if args else ""
+
+    if command not in ("terms", "score") or (command == "score" and len(args) < 2):
+        print(
+            json.dumps(
+                {
+                    "error": "サブコマンドを指定してください。",
+                    "usage": "python3 prescore.py terms [--profile-md PATH] | score <タイトル> [--profile-md PATH]",
+                },
+                ensure_ascii=False,
+            ),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    try:
+        matcher = load_matcher(profile_path)
+    except OSError as e:
+        print(json.dumps({"error": f"PROFILE.md を読み込めません: {e}"}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+    if command == "terms":
+        result = {"total": len(matcher.terms), "terms": matcher.terms}
+    else:
+        result = score_article({"title": " ".join(args[1:])}, matcher)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+実行時間の内訳計測（プロファイリング）
+
+scripts/*.py の各エントリポイントで共有する計測モジュール。
+--profile オプションまたは環境変数 KNOWLEDGE_HUB_PROFILE で有効にすると、
+処理段階（connect / request / read / decode / parse / format / cluster / prescore / serialize / sleep）
+ごと・ホストごとの所要時間を集計し、終了時にJSONのサイドファイルへ書き出す。
+標準出力のJSONは変わらない。
+
+計測モード（カンマ区切りで組み合わせ可能。段階ごとの計測は常に行う）:
+    cprofile      cProfile の関数別統計（メインスレッドのみ）と .prof ファイル
+    tracemalloc   メモリ確保量の多い箇所の上位とピーク使用量
+
+有効化の例:
+    python3 fetch_hatena_rss.py --profile
+    python3 fetch_hatena_rss.py --profile=cprofile,tracemalloc
+    KNOWLEDGE_HUB_PROFILE=1 python3 fetch_yahoo_rss.py
+    KNOWLEDGE_HUB_PROFILE=tracemalloc python3 fetch_reddit_comments.py <URL>
+
+環境変数:
+    KNOWLEDGE_HUB_PROFILE       "1" で有効化（計測モードの指定も可）
+    KNOWLEDGE_HUB_PROFILE_DIR   サイドファイルの出力先（デフォルト: ~/.cache/knowledge-hub/profile）
+
+使い方（計測箇所）:
+    import profiling
+
+    with profiling.stage("parse"):
+        data = json.loads(body)
+
+    with profiling.stage("read", host):
+        raw = resp.read(chunk_size)
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# サイドファイルの出力先ディレクトリ
+PROFILE_DIR = Path(
+    os.environ.get("KNOWLEDGE_HUB_PROFILE_DIR")
+    or Path.home() / ".cache" / "knowledge-hub" / "profile"
+)
+
+# cProfile / tracemalloc の結果として出力する上位件数
+TOP_N = 30
+
+# 計測が有効かどうか（install() で設定）
+ENABLED = False
+
+# 無効時に返す何もしないコンテキストマネージャ
+_NULL_STAGE = contextlib.nullcontext()
+
+# 段階ごと・ホストごとの集計: {段階: [秒数, 回数]} / {ホスト: {段階: [秒数, 回数]}}
+_stages: dict[str, list] = {}
+_hosts: dict[str, dict[str, list]] = {}
+_lock = threading.Lock()
+
+_started_at = ""
+_started = 0.0
+_modes: set[str] = set()
+_profiler = None
+
+
+class _Stage:
+    """with 文の間の経過時間を段階（とホスト）に加算する。"""
+
+    __slots__ = ("name", "host", "_started")
+
+    def __init__(self, name: str, host: str | None):
+        self.name = name
+        self.host = host
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add(self.name, time.perf_counter() - self._started, self.host)
+
+
+def stage(name: str, host: str | None = None):
+    """
+    処理段階の所要時間を計測するコンテキストマネージャを返す。
+
+    計測が無効な場合は何もしないコンテキストマネージャを返すため、
+    計測箇所のオーバーヘッドはほぼない。
+
+    Args:
+        name: 段階名（"request" / "read" / "decode" / "parse" / "format" / "serialize" / "sleep" 等）
+        host: 通信を伴う段階の場合はホスト名
+
+    Returns:
+        コンテキストマネージャ
+    """
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, host)
+
+
+def add(name: str, seconds: float, host: str | None = None):
+    """
+    計測済みの所要時間を段階（とホスト）に加算する。
+
+    Args:
+        name: 段階名
+        seconds: 所要時間（秒）
+        host: ホスト名
+    """
+    if not ENABLED:
+        return
+    with _lock:
+        totals = _stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+        if host:
+            host_totals = _hosts.setdefault(host, {}).setdefault(name, [0.0, 0])
+            host_totals[0] += seconds
+            host_totals[1] += 1
+
+
+def sleep(seconds: float, host: str | None = None):
+    """
+    time.sleep() と同じく待機し、待機時間を "sleep" 段階に加算する。
+
+    Args:
+        seconds: 待機秒数
+        host: 待機の原因となったホスト名
+    """
+    time.sleep(seconds)
+    add("sleep", seconds, host)
+
+
+def _parse_modes(argv: list[str]) -> set[str] | None:
+    """
+    コマンドライン引数と環境変数から計測モードを決める。
+
+    --profile / --profile=モード は引数リストから取り除く。
+
+    Returns:
+        計測モードの集合（無効な場合は None）
+    """
+    modes = None
+    for arg in list(argv[1:]):
+        if arg == "--profile" or arg.startswith("--profile="):
+            argv.remove(arg)
+            modes = set(arg.partition("=")[2].split(",")) if "=" in arg else set()
+
+    env_value = os.environ.get("KNOWLEDGE_HUB_PROFILE", "")
+    if modes is None and env_value and env_value != "0":
+        modes = set(env_value.split(","))
+    if modes is None:
+        return None
+    return {m.strip() for m in modes if m.strip() and m.strip() not in ("1", "timing")}
+
+
+def install():
+    """
+    --profile / KNOWLEDGE_HUB_PROFILE の指定があれば計測を開始し、
+    終了時にサイドファイルを書き出すよう登録する。指定がなければ何もしない。
+    """
+    global ENABLED, _started_at, _started, _modes, _profiler
+    modes = _parse_modes(sys.argv)
+    if modes is None or ENABLED:
+        return
+
+    ENABLED = True
+    _modes = modes
+    _started_at = datetime.now().isoformat()
+    _started = time.perf_counter()
+
+    if "tracemalloc" in modes:
+        import tracemalloc
+
+        tracemalloc.start()
+    if "cprofile" in modes:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(write_report)
+
+
+def run(main):
+    """
+    計測の指定を反映した上でエントリポイントを実行する。
+
+    Args:
+        main: スクリプトのメイン関数
+    """
+    install()
+    return main()
+
+
+def _totals(table: dict[str, list]) -> dict[str, dict]:
+    """[秒数, 回数] の集計を出力用の辞書に変換する。"""
+    return {
+        name: {"seconds": round(seconds, 6), "count": count}
+        for name, (seconds, count) in sorted(table.items(), key=lambda item: -item[1][0])
+    }
+
+
+def _cprofile_top(prof_path: Path) -> list[dict]:
+    """cProfile の統計を .prof に保存し、累積時間の上位を返す。"""
+    import pstats
+
+    _profiler.disable()
+    _profiler.dump_stats(prof_path)
+    stats = pstats.Stats(_profiler)
+    rows = []
+    for (filename, line, func), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{Path(filename).name}:{line}({func})",
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            }
+        )
+    rows.sort(key=lambda row: -row["cumulative_seconds"])
+    return rows[:TOP_N]
+
+
+def _tracemalloc_top() -> dict:
+    """メモリ確保量の多い箇所の上位と、現在・ピークの使用量を返す。"""
+    import tracemalloc
+
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    top = []
+    for stat in snapshot.statistics("lineno")[:TOP_N]:
+        frame = stat.traceback[0]
+        top.append(
+            {
+                "location": f"{Path(frame.filename).name}:{frame.lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+        )
+    return {"current_bytes": current, "peak_bytes": peak, "top": top}
+
+
+def report() -> dict:
+    """
+    これまでの計測結果を辞書として返す。
+
+    Returns:
+        段階別・ホスト別の所要時間と、HTTPクライアントのカウンタを含む辞書
+    """
+    with _lock:
+        result = {
+            "script": Path(sys.argv[0]).name,
+            "argv": sys.argv[1:],
+            "started_at": _started_at,
+            "wall_seconds": round(time.perf_counter() - _started, 6),
+            "stages": _totals(_stages),
+            "hosts": {host: _totals(table) for host, table in sorted(_hosts.items())},
+        }
+    # HTTPクライアントを使ったスクリプトのみ、接続再利用・受信量のカウンタも含める
+    http_client = sys.modules.get("http_client")
+    if http_client is not None:
+        result["http"] = http_client.stats()
+    return result
+
+
+def write_report():
+    """計測結果をサイドファイルに書き出し、そのパスを標準エラー出力に表示する。"""
+    result = report()
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = PROFILE_DIR / f"{Path(sys.argv[0]).stem}-{stamp}-{os.getpid()}"
+
+    if _profiler is not None:
+        result["cprofile"] = _cprofile_top(base.with_suffix(".prof"))
+        result["cprofile_file"] = str(base.with_suffix(".prof"))
+    if "tracemalloc" in _modes:
+        result["tracemalloc"] = _tracemalloc_top()
+
+    path = base.with_suffix(".json")
+    path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps({"profile": str(path)}, ensure_ascii=False), file=sys.stderr)
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Headlines・DeepDives の全文検索インデックス
+
+Headlines JSON の記事（title / titleJa / summary / category）と DeepDives の
+Markdown本文から転置インデックスを作り、SQLiteに保存する。検索時はファイルを
+読み直さず、インデックスだけを引いて BM25 で順位付けする。
+
+トークン分割:
+    NFKC正規化・小文字化した上で、日本語（ひらがな・カタカナ・漢字）の連続部分は
+    文字バイグラム（1文字だけの場合はその1文字）に、それ以外は英数字の単語に分ける。
+    例: "Valkey移行の手順" -> ["valkey", "移行", "行の", "の手", "手順"]
+
+インデックスの更新:
+    ファイルの更新日時を記録し、変わったファイルだけを読み直す。
+    build_report.py / convert_md_to_json.py はレポートを生成した時点でその日の記事を登録する。
+
+使い方:
+    # 変更のあった Headlines JSON / DeepDives をインデックスに反映
+    python3 search_index.py update [--headlines ディレクトリ] [--deepdives ディレクトリ] [--rebuild]
+
+    # 検索（デフォルトは全語を含む文書のみ。--any でいずれかの語を含む文書も対象）
+    python3 search_index.py search Valkey 移行 [--limit N] [--any] [--kind headline|deepdive]
+
+環境変数:
+    KNOWLEDGE_HUB_SEARCH_INDEX   インデックスのパス（デフォルト: 01.Trends/search_index.sqlite3）
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from article_store import DEEPDIVE_FILENAME, DEEPDIVES_DIR, HEADLINES_DIR, REPO_ROOT
+import profiling
+
+# インデックスのパス
+INDEX_PATH = Path(os.environ.get("KNOWLEDGE_HUB_SEARCH_INDEX") or REPO_ROOT / "01.Trends" / "search_index.sqlite3")
+
+# BM25 のパラメータ
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# タイトル（title / titleJa）の語の重み（出現回数をこの倍数で数える）
+TITLE_WEIGHT = 2
+
+# 検索結果のデフォルト件数
+DEFAULT_LIMIT = 20
+
+# 日本語（ひらがな・カタカナ・漢字・ハングル）の連続部分と、それ以外の英数字の単語
+CJK_CHARS = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+TOKEN_PATTERN = re.compile(rf"(?P<cjk>[{CJK_CHARS}]+)|(?P<word>[^\W_{CJK_CHARS}]+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    date TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    title_ja TEXT,
+    url TEXT,
+    rank TEXT,
+    category TEXT,
+    summary TEXT,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_docs_source_path ON docs (source_path);
+
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc_id ON postings (doc_id);
+
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (name, value) VALUES ('doc_count', 0), ('total_length', 0);
+
+CREATE TABLE IF NOT EXISTS indexed_files (
+    source_path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    テキストを検索語に分割する。
+
+    Args:
+        text: 対象のテキスト
+
+    Returns:
+        語のリスト（日本語は文字バイグラム、それ以外は英数字の単語）
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(unicodedata.normalize("NFKC", text).lower()):
+        run = match.group("cjk")
+        if run is None:
+            tokens.append(match.group("word"))
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def connect(index_path: Path | None = None) -> sqlite3.Connection:
+    """
+    インデックスに接続し、未作成のテーブルを作成する。
+
+    Args:
+        index_path: インデックスのパス（省略時は INDEX_PATH）
+
+    Returns:
+        sqlite3.Connection（行は sqlite3.Row）
+    """
+    path = index_path or INDEX_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _term_counts(title_text: str, body_text: str) -> Counter:
+    """タイトルと本文の語の出現回数を数える（タイトルは TITLE_WEIGHT 倍）。"""
+    counts = Counter(tokenize(body_text))
+    for term in tokenize(title_text):
+        counts[term] += TITLE_WEIGHT
+    return counts
+
+
+def _add_doc(conn: sqlite3.Connection, fields: dict, counts: Counter):
+    """
+    文書1件と、その語のポスティングを追加する。
+
+    検索時に文書表を引かずにスコアを計算できるよう、ポスティングにも文書長を持たせ、
+    語ごとの文書頻度と全体の文書数・総語数は集計表で管理する。
+    """
+    length = sum(counts.values())
+    cursor = conn.execute(
+        "INSERT INTO docs (key, kind, source_path, date, title, title_ja, url, rank, category, summary, length) "
+        "VALUES (:key, :kind, :source_path, :date, :title, :title_ja, :url, :rank, :category, :summary, :length)",
+        {**fields, "length": length},
+    )
+    doc_id = cursor.lastrowid
+    conn.executemany(
+        "INSERT INTO postings (term, doc_id, tf, length) VALUES (?, ?, ?, ?)",
+        ((term, doc_id, tf, length) for term, tf in counts.items()),
+    )
+    conn.executemany(
+        "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT (term) DO UPDATE SET df = df + 1",
+        ((term,) for term in counts),
+    )
+    _add_stats(conn, 1, length)
+
+
+def _add_stats(conn: sqlite3.Connection, doc_count: int, total_length: int):
+    """全体の文書数・総語数に加算する。"""
+    conn.executemany(
+        "UPDATE stats SET value = value + ? WHERE name = ?",
+        ((doc_count, "doc_count"), (total_length, "total_length")),
+    )
+
+
+def _remove_source(conn: sqlite3.Connection, source_path: str):
+    """ファイル由来の文書とポスティングを削除し、文書頻度・集計値から差し引く。"""
+    doc_ids = [row[0] for row in conn.execute("SELECT doc_id FROM docs WHERE source_path = ?", (source_path,))]
+    if not doc_ids:
+        return
+    placeholders = ", ".join("?" * len(doc_ids))
+    term_counts = conn.execute(
+        f"SELECT term, COUNT(*) FROM postings WHERE doc_id IN ({placeholders}) GROUP BY term", doc_ids
+    ).fetchall()
+    conn.executemany("UPDATE terms SET df = df - ? WHERE term = ?", ((count, term) for term, count in term_counts))
+    conn.execute("DELETE FROM terms WHERE df <= 0")
+    total_length = conn.execute(f"SELECT SUM(length) FROM docs WHERE doc_id IN ({placeholders})", doc_ids).fetchone()[0]
+    _add_stats(conn, -len(doc_ids), -(total_length or 0))
+    conn.execute(f"DELETE FROM postings WHERE doc_id IN ({placeholders})", doc_ids)
+    conn.execute(f"DELETE FROM docs WHERE doc_id IN ({placeholders})", doc_ids)
+
+
+def headline_source_path(date: str) -> str:
+    """レポート日付から、文書の出所として記録する Headlines JSON の相対パスを返す。"""
+    return f"Headlines/{date[:7]}/{date}.json"
+
+
+def index_report(report: dict, conn: sqlite3.Connection | None = None) -> int:
+    """
+    1日分のレポート（Headlines JSON の形式）の記事をインデックスに登録し直す。
+
+    Args:
+        report: date と articles を持つレポート辞書
+        conn: インデックスへの接続（省略時は INDEX_PATH に接続して閉じる）
+
+    Returns:
+        登録した記事数
+    """
+    own_conn = conn is None
+    conn = conn or connect()
+    try:
+        return _index_report(conn, report)
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def _index_report(conn: sqlite3.Connection, report: dict) -> int:
+    """レポートの記事を、同じ日付の登録済み文書と入れ替える。"""
+    date = report["date"]
+    source_path = headline_source_path(date)
+    seen_ids = set()
+    count = 0
+    with conn:
+        _remove_source(conn, source_path)
+        for article in report.get("articles", []):
+            # 同じ記事が重複して載っている場合は1件として扱う
+            article_id = article.get("id", "")
+            if article_id in seen_ids:
+                continue
+            seen_ids.add(article_id)
+            counts = _term_counts(
+                f"{article.get('title') or ''} {article.get('titleJa') or ''}",
+                f"{article.get('summary') or ''} {article.get('category') or ''}",
+            )
+            fields = {
+                "key": f"headline:{date}:{article_id}",
+                "kind": "headline",
+                "source_path": source_path,
+                "date": date,
+                "title": article.get("title") or "",
+                "title_ja": article.get("titleJa"),
+                "url": article.get("url"),
+                "rank": article.get("rank"),
+                "category": article.get("category"),
+                "summary": article.get("summary"),
+            }
+            _add_doc(conn, fields, counts)
+            count += 1
+    return count
+
+
+def index_deep_dive(conn: sqlite3.Connection, path: Path) -> bool:
+    """
+    DeepDivesのMarkdown1件をインデックスに登録し直す。
+
+    Args:
+        conn: インデックスへの接続
+        path: DeepDivesファイルのパス（YYYY-MM/YYYY-MM-DD_タイトル.md）
+
+    Returns:
+        登録した場合は True（ファイル名が規則に合わない場合は False）
+    """
+    match = DEEPDIVE_FILENAME.match(path.name)
+    if not match:
+        return False
+    source_path = f"DeepDives/{path.parent.name}/{path.name}"
+    body = path.read_text(encoding="utf-8")
+    fields = {
+        "key": f"deepdive:{path.parent.name}/{path.name}",
+        "kind": "deepdive",
+        "source_path": source_path,
+        "date": match.group(1),
+        "title": match.group(2),
+        "title_ja": None,
+        "url": None,
+        "rank": None,
+        "category": None,
+        "summary": None,
+    }
+    with conn:
+        _remove_source(conn, source_path)
+        _add_doc(conn, fields, _term_counts(match.group(2), body))
+    return True
+
+
+def _mark_indexed(conn: sqlite3.Connection, source_path: str, mtime: float):
+    """ファイルをインデックス済みとして記録する。"""
+    with conn:
+        conn.execute(
+            "INSERT INTO indexed_files (source_path, mtime) VALUES (?, ?) "
+            "ON CONFLICT (source_path) DO UPDATE SET mtime = excluded.mtime",
+            (source_path, mtime),
+        )
+
+
+def update(
+    conn: sqlite3.Connection,
+    headlines_dir: Path = HEADLINES_DIR,
+    deep_dives_dir: Path = DEEPDIVES_DIR,
+    rebuild: bool = False,
+) -> dict:
+    """
+    更新日時が変わった Headlines JSON / DeepDives だけをインデックスに反映する。
+
+    削除されたファイルの文書はインデックスからも取り除く。
+
+    Args:
+        conn: インデックスへの接続
+        headlines_dir: Headlines ディレクトリ
+        deep_dives_dir: DeepDives ディレクトリ
+        rebuild: True なら全文書を削除して作り直す
+
+    Returns:
+        indexed / skipped / removed / docs / errors を持つ辞書
+    """
+    if rebuild:
+        with conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM terms")
+            conn.execute("DELETE FROM docs")
+            conn.execute("UPDATE stats SET value = 0")
+            conn.execute("DELETE FROM indexed_files")
+
+    indexed_mtimes = {row["source_path"]: row["mtime"] for row in conn.execute("SELECT * FROM indexed_files")}
+    files = {}
+    for path in headlines_dir.glob("*/*.json"):
+        files[f"Headlines/{path.parent.name}/{path.name}"] = path
+    for path in deep_dives_dir.glob("*/*.md"):
+        files[f"DeepDives/{path.parent.name}/{path.name}"] = path
+
+    result = {"indexed": 0, "skipped": 0, "removed": 0, "errors": []}
+    for source_path, path in sorted(files.items()):
+        mtime = path.stat().st_mtime
+        if indexed_mtimes.get(source_path) == mtime:
+            result["skipped"] += 1
+            continue
+        try:
+            if source_path.startswith("Headlines/"):
+                with profiling.stage("parse"):
+                    report = json.loads(path.read_text(encoding="utf-8"))
+                _index_report(conn, report)
+            elif not index_deep_dive(conn, path):
+                continue
+        except (OSError, ValueError, KeyError) as e:
+            result["errors"].append({"path": str(path), "error": str(e)})
+            continue
+        _mark_indexed(conn, source_path, mtime)
+        result["indexed"] += 1
+
+    # 削除されたファイルの文書を取り除く
+    for source_path in indexed_mtimes.keys() - files.keys():
+        with conn:
+            _remove_source(conn, source_path)
+            conn.execute("DELETE FROM indexed_files WHERE source_path = ?", (source_path,))
+        result["removed"] += 1
+
+    result["docs"] = conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+    return result
+
+
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    limit: int = DEFAULT_LIMIT,
+    match_all: bool = True,
+    kind: str | None = None,
+) -> list[dict]:
+    """
+    インデックスを BM25 で検索する。
+
+    Args:
+        conn: インデックスへの接続
+        query: 検索文字列
+        limit: 返す件数の上限
+        match_all: True なら全語を含む文書のみ、False ならいずれかの語を含む文書を対象にする
+        kind: "headline" / "deepdive" で文書の種類を絞り込む
+
+    Returns:
+        スコアの高い順の検索結果辞書のリスト
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return []
+
+    stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+    doc_count = stats.get("doc_count", 0)
+    if not doc_count:
+        return []
+    avg_length = stats["total_length"] / doc_count
+
+    # 語ごとの IDF（BM25 の idf。負にならないよう 1 を足す）
+    placeholders = ", ".join("?" * len(terms))
+    dfs = dict(conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms).fetchall())
+    if match_all and len(dfs) < len(terms):
+        return []
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_terms (term TEXT PRIMARY KEY, idf REAL NOT NULL)")
+    conn.execute("DELETE FROM query_terms")
+    conn.executemany(
+        "INSERT INTO query_terms VALUES (?, ?)",
+        ((term, math.log(1 + (doc_count - df + 0.5) / (df + 0.5))) for term, df in dfs.items()),
+    )
+
+    # CROSS JOIN で検索語 -> ポスティングの順に結合させ、該当語のポスティングだけを読んで集計する。
+    # 文書表は上位 limit 件（種類の絞り込み時は該当した文書）についてのみ引く
+    kind_join = "CROSS JOIN docs k ON k.doc_id = p.doc_id AND k.kind = :kind" if kind else ""
+    rows = conn.execute(
+        f"""
+        SELECT d.*, s.score FROM (
+            SELECT p.doc_id, SUM(q.idf * p.tf * (:k1 + 1) / (p.tf + :k1 * (1 - :b + :b * p.length / :avg_length))) AS score
+            FROM query_terms q
+            CROSS JOIN postings p ON p.term = q.term
+            {kind_join}
+            GROUP BY p.doc_id
+            HAVING NOT :match_all OR COUNT(*) = :term_count
+            ORDER BY score DESC, p.doc_id DESC
+            LIMIT :limit
+        ) s
+        CROSS JOIN docs d ON d.doc_id = s.doc_id
+        ORDER BY s.score DESC, s.doc_id DESC
+        """,
+        {
+            "k1": BM25_K1,
+            "b": BM25_B,
+            "avg_length": avg_length,
+            "kind": kind,
+            "match_all": match_all,
+            "term_count": len(terms),
+            "limit": limit,
+        },
+    ).fetchall()
+
+    return [
+        {
+            "score": round(row["score"], 4),
+            "kind": row["kind"],
+            "date": row["date"],
+            "title": row["title"],
+            "titleJa": row["title_ja"],
+            "url": row["url"],
+            "rank": row["rank"],
+            "category": row["category"],
+            "summary": row["summary"],
+            "path": row["source_path"],
+        }
+        for row in rows
+    ]
+
+
+def _option(name: str) -> str | None:
+    """--name の値を返す（未指定なら None）。"""
+    if name in sys.argv[1:]:
+        value_index = sys.argv.index(name) + 1
+        if value_index < len(sys.argv):
+            return sys.argv[value_index]
+    return None
+
+
+def main():
+    """メイン処理: サブコマンドに応じてインデックスの更新・検索を行い、JSONで出力する。"""
+    option_values = {_option(name) for name in ("--headlines", "--deepdives", "--limit", "--kind")}
+    args = [a for a in sys.argv[1:] if not a.startswith("--") and a not in option_values]
+    command = args[0] if args else ""
+
+    if command not in ("update", "search") or (command == "search" and len(args) < 2):
+        print(
+            json.dumps(
+                {
+                    "error": "サブコマンドを指定してください。",
+                    "usage": "python3 search_index.py update [--headlines DIR] [--deepdives DIR] [--rebuild] | "
+                    "search <検索語...> [--limit N] [--any] [--kind headline|deepdive]",
+                },
+                ensure_ascii=False,
+            ),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    conn = connect()
+    try:
+        if command == "update":
+            result = update(
+                conn,
+                Path(_option("--headlines") or HEADLINES_DIR),
+                Path(_option("--deepdives") or DEEPDIVES_DIR),
+                rebuild="--rebuild" in sys.argv[1:],
+            )
+        else:
+            query = " ".join(args[1:])
+            started = time.perf_counter()
+            results = search(
+                conn,
+                query,
+                limit=int(_option("--limit") or DEFAULT_LIMIT),
+                match_all="--any" not in sys.argv[1:],
+                kind=_option("--kind"),
+            )
+            result = {
+                "query": query,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                "total": len(results),
+                "results": results,
+            }
+    finally:
+        conn.close()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
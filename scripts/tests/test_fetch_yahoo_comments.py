@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+fetch_yahoo_comments.py のテスト
+
+並列取得（iter_comment_pages）で、APIがページを短く返してもコメントを取りこぼさず、
+重複もしないことを確かめる。通信は行わず、fetch_comment_page を差し替えて
+コメントリストAPIの応答を再現する。
+
+使い方:
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# 取得スクリプトのディレクトリ
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import fetch_yahoo_comments  # noqa: E402
+
+
+def _fake_api(total: int, page_limit):
+    """
+    コメントリストAPIの代わりに、1ページの件数を page_limit(start) 件までに絞って返す関数を作る。
+
+    Args:
+        total: コメント総数
+        page_limit: 開始位置 -> そのページで返す最大件数
+
+    Returns:
+        fetch_comment_page と同じ引数を取る関数
+    """
+    def fetch_comment_page(article_id, start, results=fetch_yahoo_comments.RESULTS_PER_PAGE):
+        count = min(results, page_limit(start))
+        comments = [{"commentId": str(i)} for i in range(start, min(start + count, total + 1))]
+        return {"totalResults": total, "comments": comments}
+
+    return fetch_comment_page
+
+
+def _fetched_ids(total: int, page_limit, concurrency: int) -> list[str]:
+    """差し替えたAPIで iter_comment_pages を最後まで回し、取得したコメントIDを順に返す。"""
+    with mock.patch.object(fetch_yahoo_comments, "fetch_comment_page", _fake_api(total, page_limit)):
+        pages = fetch_yahoo_comments.iter_comment_pages("a" * 40, concurrency=concurrency, requests_per_second=0)
+        return [comment["commentId"] for page in pages for comment in page["comments"]]
+
+
+class IterCommentPagesTest(unittest.TestCase):
+    def assert_all_fetched(self, total: int, page_limit):
+        expected = [str(i) for i in range(1, total + 1)]
+        for concurrency in (1, 4):
+            with self.subTest(concurrency=concurrency):
+                self.assertEqual(_fetched_ids(total, page_limit, concurrency), expected)
+
+    def test_full_pages(self):
+        self.assert_all_fetched(230, lambda start: 50)
+
+    def test_api_caps_every_page(self):
+        # APIの上限が RESULTS_PER_PAGE より小さい場合は1ページ目の件数ずつ進める
+        self.assert_all_fetched(230, lambda start: 30)
+
+    def test_short_page_in_the_middle(self):
+        # 51件目からのページだけ短い: 71〜100件目を順に取り直す
+        self.assert_all_fetched(230, lambda start: 20 if start == 51 else 50)
+
+    def test_irregular_short_pages(self):
+        self.assert_all_fetched(500, lambda start: 7 + start % 41)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+near_duplicates.py のテスト
+
+概要のない短いタイトルや、数だけが異なるタイトルを同じストーリーにまとめないことと、
+同じニュースはまとめることを確かめる。
+
+使い方:
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import sys
+import unittest
+from itertools import permutations
+from pathlib import Path
+
+# 取得スクリプトのディレクトリ
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from near_duplicates import cluster_articles  # noqa: E402
+
+
+def _articles(*titles: str, description: str = "") -> list[dict]:
+    """タイトルごとに概要・スコアを揃えた候補記事を作る。"""
+    return [
+        {"url": f"https://example.com/{i}", "title": title, "description": description, "score": i}
+        for i, title in enumerate(titles)
+    ]
+
+
+class ClusterArticlesTest(unittest.TestCase):
+    def test_keeps_titles_with_different_numbers_apart(self):
+        self.assertEqual(len(cluster_articles(_articles("Python 3.12 released", "Python 3.13 released"))), 2)
+
+    def test_keeps_short_titles_without_description_apart(self):
+        self.assertEqual(len(cluster_articles(_articles("Help", "Help!"))), 2)
+        self.assertEqual(len(cluster_articles(_articles("速報 (共同通信)", "速報 (時事通信)"))), 2)
+
+    def test_merges_same_story_without_description(self):
+        articles = _articles(
+            "OpenAI releases GPT-5 with a new reasoning mode",
+            "OpenAI releases GPT-5 with a new reasoning mode (The Verge)",
+        )
+        clustered = cluster_articles(articles)
+        self.assertEqual(len(clustered), 1)
+        self.assertEqual(clustered[0]["url"], "https://example.com/1")
+        self.assertEqual([d["url"] for d in clustered[0]["duplicates"]], ["https://example.com/0"])
+
+    def test_merges_same_story_when_only_one_title_has_numbers(self):
+        description = "Anthropic は新しいモデルを公開し、コーディング性能が大きく向上したと発表した"
+        articles = _articles("Anthropic が新モデルを公開", "Anthropic が新モデル 4.6 を公開", description=description)
+        self.assertEqual(len(cluster_articles(articles)), 1)
+
+    def test_does_not_chain_different_numbers_through_title_without_numbers(self):
+        description = "Python の新しいバージョンが公開され、型ヒントやエラーメッセージが改善された"
+        titles = ("Python 3.12 がリリース、新機能まとめ", "Python がリリース、新機能まとめ", "Python 3.13 がリリース、新機能まとめ")
+        # 数のないタイトルが先に来る並びでは、それを介して 3.12 と 3.13 がつながりやすい
+        for order in permutations(titles):
+            with self.subTest(order=order):
+                clustered = cluster_articles(_articles(*order, description=description))
+                self.assertEqual(len(clustered), 2)
+                for article in clustered:
+                    merged = {article["title"], *(d["title"] for d in article.get("duplicates", []))}
+                    self.assertFalse({titles[0], titles[2]} <= merged)
+
+    def test_many_numbered_titles_stay_separate(self):
+        articles = _articles(*(f"Weekly discussion thread #{i}" for i in range(200)))
+        self.assertEqual(len(cluster_articles(articles)), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
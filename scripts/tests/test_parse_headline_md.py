@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+convert_md_to_json.parse_headline_md のゴールデンファイルテスト
+
+fixtures/headlines/ の各 .md を変換した結果が、同名の .json と一致することを確かめる。
+ピックアップ、CRLF 改行、途中で終わる記事（メタデータ行・概要行がない）を含む。
+
+使い方:
+    python3 -m unittest discover -s scripts/tests
+
+期待値の更新（パーサーの出力を意図して変えたとき）:
+    UPDATE_GOLDEN=1 python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import os
+import sys
+import unittest
+from pathlib import Path
+
+# 取得スクリプトのディレクトリ
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from convert_md_to_json import parse_headline_md  # noqa: E402
+
+# ゴールデンファイルのディレクトリ
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "headlines"
+
+
+class ParseHeadlineMdGoldenTest(unittest.TestCase):
+    def test_fixtures_exist(self):
+        self.assertTrue(sorted(FIXTURES_DIR.glob("*.md")))
+
+    def test_matches_golden_json(self):
+        for md_path in sorted(FIXTURES_DIR.glob("*.md")):
+            json_path = md_path.with_suffix(".json")
+            # 改行コードを変えずに読む（CRLF のまま文字列として渡す）
+            text = md_path.read_bytes().decode("utf-8")
+            with self.subTest(fixture=md_path.name):
+                report = parse_headline_md(text)
+                if os.environ.get("UPDATE_GOLDEN"):
+                    json_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+                expected = json.loads(json_path.read_text(encoding="utf-8"))
+                self.assertEqual(report, expected)
+
+    def test_file_object_matches_string(self):
+        for md_path in sorted(FIXTURES_DIR.glob("*.md")):
+            with self.subTest(fixture=md_path.name), open(md_path, encoding="utf-8") as f:
+                self.assertEqual(parse_headline_md(f), parse_headline_md(md_path.read_bytes().decode("utf-8")))
+
+    def test_crlf_matches_lf(self):
+        crlf = parse_headline_md((FIXTURES_DIR / "crlf.md").read_bytes().decode("utf-8"))
+        lf = parse_headline_md((FIXTURES_DIR / "crlf.md").read_bytes().decode("utf-8").replace("\r\n", "\n"))
+        self.assertEqual(crlf, lf)
+
+
+if __name__ == "__main__":
+    unittest.main()
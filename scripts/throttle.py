@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+レスポンスヘッダに基づく適応的スロットリング
+
+http_client.py と fetch_scheduler.py で共有する、ホスト単位のスロットリング層。
+
+- X-Ratelimit-Remaining / X-Ratelimit-Reset（Reddit 等）を読み取り、
+  残り枠があるうちは固定間隔を空けずにリクエストし、枠を使い切ったら
+  リセットまで待つ
+- 429 / 503 等の Retry-After は指示された秒数だけ正確に待つ
+- 429 / 5xx と通信エラーはジッタ付き指数バックオフで再試行する
+- 失敗が続いたホストはサーキットブレーカーで一定時間遮断し、
+  1ホストの障害で収集全体が止まらないようにする
+"""
+
+import email.utils
+import random
+import threading
+import time
+import urllib.error
+
+import profiling
+
+# 再試行の最大回数（初回を除く）
+MAX_RETRIES = 3
+
+# 指数バックオフの基準秒数と上限秒数
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# 再試行対象のステータスコード
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# この秒数を超える待機を指示された場合は待たずに失敗させる
+MAX_WAIT_SECONDS = 120.0
+
+# 連続失敗がこの回数に達したらサーキットを開く
+CIRCUIT_FAILURE_THRESHOLD = 5
+
+# サーキットを開いておく秒数
+CIRCUIT_COOLDOWN_SECONDS = 60.0
+
+
+class CircuitOpenError(urllib.error.URLError):
+    """サーキットブレーカーが開いているホストへのリクエスト。"""
+
+
+class RateLimitedError(urllib.error.URLError):
+    """許容できないほど長い待機を指示されたリクエスト。"""
+
+
+class HostState:
+    """1ホスト分のレート制限枠・待機期限・連続失敗数。"""
+
+    def __init__(self):
+        self.remaining: float | None = None
+        self.reset_at: float | None = None
+        self.blocked_until = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+
+
+_states: dict[str, HostState] = {}
+_lock = threading.Lock()
+
+
+def _state(host: str) -> HostState:
+    """ホストの状態を返す（初回アクセス時に生成）。呼び出し側で _lock を保持すること。"""
+    if host not in _states:
+        _states[host] = HostState()
+    return _states[host]
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Retry-After ヘッダを待機秒数に変換する。
+
+    Args:
+        value: ヘッダ値（秒数または HTTP-date）
+
+    Returns:
+        待機秒数（解釈できない場合は None）
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _header_float(headers, *names: str) -> float | None:
+    """ヘッダ候補のうち最初に見つかった値を数値として返す。"""
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
+
+
+def has_budget(host: str) -> bool:
+    """
+    サーバーが通知したレート制限枠がまだ残っているかを返す。
+
+    Args:
+        host: ホスト名
+
+    Returns:
+        残り枠が判明しており1以上ある（またはリセット時刻を過ぎた）場合 True
+    """
+    with _lock:
+        state = _state(host)
+        if state.remaining is None:
+            return False
+        if state.remaining >= 1:
+            return True
+        return state.reset_at is not None and time.monotonic() >= state.reset_at
+
+
+def before_request(host: str):
+    """
+    リクエスト前に、サーキットの状態確認とサーバー指示どおりの待機を行う。
+
+    Args:
+        host: ホスト名
+
+    Raises:
+        CircuitOpenError: サーキットが開いている場合
+        RateLimitedError: 待機時間が MAX_WAIT_SECONDS を超える場合
+    """
+    with _lock:
+        state = _state(host)
+        now = time.monotonic()
+        if state.open_until > now:
+            raise CircuitOpenError(f"{host} への接続を一時停止中です（失敗が続いたため）")
+
+        wait_until = state.blocked_until
+        if state.remaining is not None and state.remaining < 1 and state.reset_at is not None:
+            wait_until = max(wait_until, state.reset_at)
+        wait = wait_until - now
+
+    if wait > MAX_WAIT_SECONDS:
+        raise RateLimitedError(f"{host} から {wait:.0f} 秒の待機を指示されました")
+    if wait > 0:
+        profiling.sleep(wait, host)
+
+
+def after_response(host: str, status: int, headers) -> float | None:
+    """
+    レスポンスヘッダからレート制限枠と待機指示を記録し、成否を集計する。
+
+    Args:
+        host: ホスト名
+        status: ステータスコード
+        headers: レスポンスヘッダ
+
+    Returns:
+        Retry-After で指示された待機秒数（指示がなければ None）
+    """
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+    remaining = _header_float(headers, "X-Ratelimit-Remaining", "RateLimit-Remaining")
+    reset = _header_float(headers, "X-Ratelimit-Reset", "RateLimit-Reset")
+
+    with _lock:
+        state = _state(host)
+        now = time.monotonic()
+        if remaining is not None:
+            state.remaining = remaining
+            state.reset_at = now + reset if reset is not None else None
+        if retry_after is not None:
+            state.blocked_until = max(state.blocked_until, now + retry_after)
+
+        if status in RETRY_STATUSES:
+            _record_failure(state, now)
+        else:
+            state.failures = 0
+
+    return retry_after
+
+
+def record_error(host: str):
+    """
+    通信エラー（接続失敗・タイムアウト等）を失敗として記録する。
+
+    Args:
+        host: ホスト名
+    """
+    with _lock:
+        _record_failure(_state(host), time.monotonic())
+
+
+def _record_failure(state: HostState, now: float):
+    """連続失敗数を加算し、しきい値に達したらサーキットを開く。"""
+    state.failures += 1
+    if state.failures >= CIRCUIT_FAILURE_THRESHOLD:
+        state.open_until = now + CIRCUIT_COOLDOWN_SECONDS
+        # 遮断明けは1回の失敗で再び遮断する（ハーフオープン）
+        state.failures = CIRCUIT_FAILURE_THRESHOLD - 1
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    ジッタ付き指数バックオフの待機秒数を返す。
+
+    Args:
+        attempt: 何回目の再試行か（0始まり）
+
+    Returns:
+        待機秒数
+    """
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
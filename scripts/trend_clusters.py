@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+その日の記事からトレンド分析（trendAnalysis）のトピック候補を作る
+
+記事ごとに title / titleJa / summary の文字 n-gram（2〜3文字）の TF-IDF ベクトルを作り、
+コサイン類似度で記事をまとめて、Headlines JSON の trendAnalysis と同じ形
+（topic / description / relatedArticleIds）のトピック候補を出力する。
+各候補には代表語（terms）も付け、topic は代表語をつなげた仮の見出しにする。
+
+手順:
+    1. テキストを NFKC正規化・小文字化し、日本語の連続部分・英数字の単語ごとに
+       前後に空白を補って文字 n-gram にする（単語をまたぐ n-gram は作らない）
+    2. TF は 1 + log(出現回数)、IDF は平滑化した log((1 + N) / (1 + df)) + 1 とし、L2 正規化する
+    3. 記事ごとに重みの大きい TOP_FEATURES 個の n-gram（多くの記事にある n-gram は除く）だけで
+       転置インデックスを引き、類似度が SIMILARITY_THRESHOLD 以上の記事の組を求める（全組は比較しない）
+    4. 類似する記事の多い記事から順に中心とし、まだどのトピックにも入っていない
+       類似記事をまとめる（star clustering。連鎖的に無関係な記事がつながらない）
+    5. MIN_TOPIC_SIZE 件以上のトピックを記事数の多い順に MAX_TOPICS 件まで出力する
+
+代表語は、日本語のカタカナ・漢字の連続部分と英数字の単語のうち、トピック内の
+複数の記事に現れ、かつ全体では珍しいものを選ぶ。
+
+処理時間の目安（benchmarks/bench_hotpaths.py の trend_clusters。一般的なノートPCの半分ほどの速度の環境での実測）:
+    2000件  約0.4〜0.5秒
+    4000件  約0.9〜1.3秒
+    8000件  約2.3〜2.8秒
+    n-gram の数え上げ・重みの計算と、転置インデックスでの内積の積み上げを純 Python で行うため、
+    「1日数千件を1秒を十分下回る時間で」という目標は2000件程度までしか満たしていない。
+    また、転置インデックスに載せる n-gram の出現記事数の上限（MAX_DF_RATIO）が記事数に比例するため、
+    処理時間は件数に対して線形よりやや速く増える。ベンチマークの上限（TARGETS）はこの実測値に合わせてある。
+
+使い方:
+    python3 trend_clusters.py <Headlines JSON | build_report.py --ndjson の出力 | -> [--threshold 値] [--max-topics 件数]
+
+    build_report.py --auto-trends を指定すると、評価結果にトレンド分析がない場合に
+    ここで作った候補をそのまま trendAnalysis に入れる。
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter, mul
+
+import profiling
+from url_canonical import url_id
+
+# n-gram の文字数
+NGRAM_SIZES = (2, 3)
+
+# 類似度の計算に使う記事ごとの n-gram の数（重みの大きいもの）
+TOP_FEATURES = 40
+
+# 転置インデックスに載せない n-gram の出現記事数（全記事の MAX_DF_RATIO 以上、かつ MAX_DF_FLOOR 件以上。
+# どの記事にもある n-gram はトピックを区別せず、転置リストが長くなって計算量が2乗に近づく）
+MAX_DF_RATIO = 0.05
+MAX_DF_FLOOR = 20
+
+# 同じトピックとみなすコサイン類似度
+SIMILARITY_THRESHOLD = 0.1
+
+# トピックにする最小の記事数
+MIN_TOPIC_SIZE = 2
+
+# 出力するトピックの最大件数
+MAX_TOPICS = 5
+
+# トピックごとの代表語の数（topic にはこのうち先頭の TOPIC_TERMS 個を使う）
+MAX_TERMS = 5
+TOPIC_TERMS = 3
+
+# 日本語（ひらがな・カタカナ・漢字）の連続部分と、それ以外の英数字の単語
+CJK_CHARS = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+SEGMENT_PATTERN = re.compile(rf"[{CJK_CHARS}]+|[^\W_{CJK_CHARS}]+")
+
+# 代表語の候補: カタカナ・漢字の連続部分（2文字以上）と英数字の単語
+TERM_PATTERN = re.compile(rf"[\u30a0-\u30ff]{{2,}}|[\u3400-\u4dbf\u4e00-\u9fff]{{2,}}|[^\W_{CJK_CHARS}]+")
+
+# 代表語にしない英単語
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "my", "of", "on", "or", "that", "the", "this", "to", "vs", "was", "what", "with", "you", "your",
+}
+
+
+def _text(article: dict) -> str:
+    """記事のベクトル化に使うテキスト（title / titleJa / summary）を返す。"""
+    return " ".join(article.get(k) or "" for k in ("title", "titleJa", "summary"))
+
+
+@lru_cache(maxsize=1 << 16)
+def _segment_ngrams(segment: str) -> tuple[str, ...]:
+    """
+    語（日本語の連続部分・英数字の単語）の前後に空白を補った文字 n-gram を返す。
+
+    同じ語は記事をまたいで何度も現れるため結果をキャッシュする。
+    """
+    padded = f" {segment} "
+    return tuple(padded[i : i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1))
+
+
+def ngrams(text: str) -> Counter:
+    """
+    テキストの文字 n-gram の出現回数を数える。
+
+    Args:
+        text: 対象のテキスト
+
+    Returns:
+        n-gram -> 出現回数
+    """
+    segments = SEGMENT_PATTERN.findall(unicodedata.normalize("NFKC", text).lower())
+    return Counter(chain.from_iterable(map(_segment_ngrams, segments)))
+
+
+def vectorize(texts: list[str]) -> list[dict[str, float]]:
+    """
+    テキストを L2 正規化した TF-IDF の疎ベクトル（n-gram -> 重み）にする。
+
+    ノルムは全 n-gram で計算するが、ベクトルには類似度の計算に使う n-gram
+    （2件以上の記事にあり、ありふれていないもの）だけを残す。IDF は出現記事数だけで
+    決まるため出現記事数ごとに1回だけ計算し、重みは残す n-gram の分だけ求める。
+
+    Args:
+        texts: 記事ごとのテキスト
+
+    Returns:
+        記事ごとの疎ベクトル
+    """
+    counts = [ngrams(text) for text in texts]
+    df = Counter()
+    for c in counts:
+        df.update(c.keys())
+    n = len(texts)
+    max_df = max(MAX_DF_FLOOR, int(n * MAX_DF_RATIO))
+
+    # 出現記事数 -> IDF とその2乗、出現回数 -> TF（1 + log(出現回数)）の2乗
+    idf_by_df = [math.log((1 + n) / (1 + d)) + 1 for d in range(n + 1)]
+    squared_idf_by_df = [idf * idf for idf in idf_by_df]
+    squared_idf = dict(zip(df.keys(), map(squared_idf_by_df.__getitem__, df.values())))
+    max_tf = max((max(c.values()) for c in counts if c), default=1)
+    tf_by_count = [0.0, 1.0] + [1 + math.log(tf) for tf in range(2, max_tf + 1)]
+    squared_tf = [tf * tf for tf in tf_by_count]
+    kept_idf = {gram: idf_by_df[d] for gram, d in df.items() if 1 < d <= max_df}
+
+    vectors = []
+    for c in counts:
+        norm_sq = sum(map(mul, map(squared_idf.__getitem__, c.keys()), map(squared_tf.__getitem__, c.values())))
+        scale = 1 / math.sqrt(norm_sq) if norm_sq else 1.0
+        grams = list(filter(kept_idf.__contains__, c))
+        weights = map(mul, map(kept_idf.__getitem__, grams), map(tf_by_count.__getitem__, map(c.__getitem__, grams)))
+        vectors.append(dict(zip(grams, map(scale.__mul__, weights))))
+    return vectors
+
+
+def similar_pairs(vectors: list[dict[str, float]], threshold: float = SIMILARITY_THRESHOLD) -> list[dict[int, float]]:
+    """
+    コサイン類似度がしきい値以上の記事の組を求める。
+
+    各記事の重みの大きい TOP_FEATURES 個の n-gram だけを転置インデックスに載せ、
+    先に処理した記事との内積を転置インデックス経由で積み上げる（使わない n-gram の分だけ
+    類似度はやや低めに見積もられる）。
+
+    Args:
+        vectors: vectorize が返す疎ベクトル
+        threshold: 類似とみなすコサイン類似度
+
+    Returns:
+        記事ごとの {類似する記事の番号: 類似度}
+    """
+    postings: dict[str, list[tuple[int, float]]] = {}
+    neighbors: list[dict[int, float]] = [{} for _ in vectors]
+    for i, vector in enumerate(vectors):
+        top = sorted(vector.items(), key=itemgetter(1), reverse=True)[:TOP_FEATURES]
+        scores: dict[int, float] = {}
+        get_score = scores.get
+        for gram, weight in top:
+            for j, other_weight in postings.get(gram, ()):
+                scores[j] = get_score(j, 0.0) + weight * other_weight
+        for j, score in scores.items():
+            if score >= threshold:
+                neighbors[i][j] = score
+                neighbors[j][i] = score
+        for gram, weight in top:
+            postings.setdefault(gram, []).append((i, weight))
+    return neighbors
+
+
+def star_clusters(neighbors: list[dict[int, float]], min_size: int = MIN_TOPIC_SIZE) -> list[list[int]]:
+    """
+    類似する記事の多い記事から順に中心とし、未割り当ての類似記事をまとめる。
+
+    Args:
+        neighbors: similar_pairs が返す類似記事
+        min_size: トピックにする最小の記事数
+
+    Returns:
+        記事番号のリストのリスト（先頭が中心の記事、残りは中心との類似度の高い順。記事数の多い順）
+    """
+    order = sorted(range(len(neighbors)), key=lambda i: (-len(neighbors[i]), i))
+    assigned = set()
+    clusters = []
+    for center in order:
+        if center in assigned or len(neighbors[center]) + 1 < min_size:
+            continue
+        members = [j for j in sorted(neighbors[center], key=lambda j: (-neighbors[center][j], j)) if j not in assigned]
+        if len(members) + 1 < min_size:
+            continue
+        assigned.add(center)
+        assigned.update(members)
+        clusters.append([center, *members])
+    clusters.sort(key=lambda members: (-len(members), members[0]))
+    return clusters
+
+
+def representative_terms(members: list[int], texts: list[str], document_freq: Counter, surfaces: dict[str, str]) -> list[str]:
+    """
+    トピック内の複数の記事に現れ、全体では珍しい語を代表語として選ぶ。
+
+    Args:
+        members: トピックの記事番号
+        texts: 記事ごとのテキスト
+        document_freq: 語 -> 全記事での出現記事数
+        surfaces: 語 -> 最も多く使われている表記
+
+    Returns:
+        代表語の表記のリスト（最大 MAX_TERMS 個）
+    """
+    in_topic = Counter()
+    for i in members:
+        in_topic.update(set(extract_terms(texts[i])))
+    n = len(texts)
+    scored = [
+        (count * math.log((1 + n) / (1 + document_freq[term])), term)
+        for term, count in in_topic.items()
+        if count >= 2 or len(members) == 1
+    ]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [surfaces[term] for _, term in scored[:MAX_TERMS]]
+
+
+def extract_terms(text: str) -> list[str]:
+    """
+    テキストから語（カタカナ・漢字の連続部分と英数字の単語）を取り出す。
+
+    英単語は2文字以上でストップワード・数字だけのものを除き、すべて小文字にする。
+
+    Args:
+        text: 対象のテキスト
+
+    Returns:
+        語のリスト（出現順。重複を含む）
+    """
+    return _filter_terms(TERM_PATTERN.findall(unicodedata.normalize("NFKC", text)))
+
+
+def _filter_terms(found: list[str]) -> list[str]:
+    """TERM_PATTERN で見つけた語を小文字にし、短い英単語・ストップワード・数字を除く。"""
+    result = []
+    for term in found:
+        key = term.lower()
+        if key.isascii() and (len(key) < 2 or key in STOP_WORDS or key.isdigit()):
+            continue
+        result.append(key)
+    return result
+
+
+def propose_topics(
+    articles: list[dict], threshold: float = SIMILARITY_THRESHOLD, max_topics: int = MAX_TOPICS
+) -> list[dict]:
+    """
+    記事をまとめて trendAnalysis のトピック候補を作る。
+
+    Args:
+        articles: title / titleJa / summary と id（なければ url）を持つ記事辞書のリスト
+        threshold: 同じトピックとみなすコサイン類似度
+        max_topics: 出力するトピックの最大件数
+
+    Returns:
+        {topic, description, relatedArticleIds, terms} のリスト（記事数の多い順）
+    """
+    texts = [_text(a) for a in articles]
+    vectors = vectorize(texts)
+    clusters = star_clusters(similar_pairs(vectors, threshold))[:max_topics]
+
+    # 語ごとの出現記事数と、最も多く使われている表記（"opus" / "Opus" 等）
+    document_freq = Counter()
+    surface_counts = Counter()
+    for text in texts:
+        found = TERM_PATTERN.findall(unicodedata.normalize("NFKC", text))
+        surface_counts.update(found)
+        document_freq.update(set(_filter_terms(found)))
+    surfaces: dict[str, str] = {}
+    for surface, _ in surface_counts.most_common():
+        surfaces.setdefault(surface.lower(), surface)
+
+    topics = []
+    for members in clusters:
+        terms = representative_terms(members, texts, document_freq, surfaces)
+        center = articles[members[0]]
+        title = center.get("titleJa") or center.get("title", "")
+        topics.append({
+            "topic": "・".join(terms[:TOPIC_TERMS]) or title,
+            "description": f"「{title}」など{len(members)}件の記事",
+            "relatedArticleIds": [articles[i].get("id") or url_id(articles[i]["url"]) for i in members],
+            "terms": terms,
+        })
+    return topics
+
+
+def load_articles(path: str) -> tuple[str | None, list[dict]]:
+    """
+    Headlines JSON または build_report.py --ndjson の出力から記事を読み込む。
+
+    Args:
+        path: ファイルのパス（"-" は標準入力）
+
+    Returns:
+        (レポートの日付, 記事のリスト) のタプル
+    """
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    with profiling.stage("parse"):
+        try:
+            report = json.loads(text)
+        except ValueError:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+            header = next((r for r in records if r.get("type") == "header"), {})
+            return header.get("date"), [r["data"] for r in records if r.get("type") == "article"]
+    if isinstance(report, list):
+        return None, report
+    return report.get("date"), report.get("articles", [])
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析する。"""
+    parser = argparse.ArgumentParser(description="その日の記事から trendAnalysis のトピック候補を作る")
+    parser.add_argument("report", help="Headlines JSON / build_report.py --ndjson の出力（\"-\" で標準入力）")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD, help="同じトピックとみなすコサイン類似度")
+    parser.add_argument("--max-topics", type=int, default=MAX_TOPICS, help="出力するトピックの最大件数")
+    return parser.parse_args()
+
+
+def main():
+    """メイン処理: トピック候補をJSONで出力する。"""
+    args = parse_args()
+    try:
+        date, articles = load_articles(args.report)
+    except (OSError, ValueError, AttributeError) as e:
+        print(json.dumps({"error": f"レポートを読み込めません: {e}"}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+    with profiling.stage("cluster"):
+        topics = propose_topics(articles, args.threshold, args.max_topics)
+    result = {"date": date, "total": len(articles), "trendAnalysis": topics}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
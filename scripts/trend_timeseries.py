@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+日をまたいだトピックの推移（日別件数の時系列）
+
+Headlines JSON は1日ごとに独立したファイルのため、「今週はこの話題が増えているか」を
+調べるには毎回すべてのレポートを読み直す必要がある。このモジュールは
+レポートごとに カテゴリ・ソース・subreddit・キーワード の日別の記事数だけを
+SQLite にまとめておき、直近の期間の集計と前の期間との比較を表引きだけで返す。
+
+集計の単位:
+    category / source / subreddit   記事のその項目の値ごとの記事数
+    keyword                         title / titleJa から取り出した語（trend_clusters.extract_terms）
+                                    ごとの、その語を含む記事数（1記事で1回と数える）
+
+更新:
+    レポートを追加・作り直した日は、その日付の行だけを入れ替える（1日分の記事数に比例）。
+    build_report.py / convert_md_to_json.py はレポートを生成した時点でその日の件数を登録する。
+    update は更新日時の変わった Headlines JSON だけを読み直す。
+
+増加・減少の判定:
+    直近 N 日と、その前の N 日の記事数を比べる。期間ごとの総記事数の差を打ち消すため、
+    総記事数に対する割合の比（加算スムージング付き）を使い、RISING_RATIO 倍以上かつ
+    直近の記事数が MIN_COUNT 件以上なら増加、1/RISING_RATIO 倍以下かつ前の期間の記事数が
+    MIN_COUNT 件以上なら減少とする。
+
+使い方:
+    # 変更のあった Headlines JSON を反映
+    python3 trend_timeseries.py update [--headlines ディレクトリ] [--rebuild]
+
+    # 直近7日間の件数（--end を省略すると登録済みの最新の日付まで）
+    python3 trend_timeseries.py window keyword [--days 7] [--end YYYY-MM-DD] [--limit N]
+
+    # 値ごとの日別件数と移動合計
+    python3 trend_timeseries.py series keyword opus [--days 28] [--window 7] [--end YYYY-MM-DD]
+
+    # 前週比で増えている・減っている値（次元を省略するとすべての次元）
+    python3 trend_timeseries.py momentum [keyword] [--days 7] [--end YYYY-MM-DD] [--min-count N] [--limit N]
+
+環境変数:
+    KNOWLEDGE_HUB_TREND_DB   データベースのパス（デフォルト: 01.Trends/trend_timeseries.sqlite3）
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from collections import Counter
+from datetime import date as Date
+from datetime import timedelta
+from pathlib import Path
+
+from article_store import HEADLINES_DIR, REPO_ROOT
+import profiling
+from trend_clusters import extract_terms
+
+# データベースのパス
+DB_PATH = Path(os.environ.get("KNOWLEDGE_HUB_TREND_DB") or REPO_ROOT / "01.Trends" / "trend_timeseries.sqlite3")
+
+# 集計する次元
+DIMENSIONS = ("category", "source", "subreddit", "keyword")
+
+# 期間のデフォルトの日数
+DEFAULT_DAYS = 7
+
+# series の移動合計のデフォルトの日数と、表示する日数
+DEFAULT_WINDOW = 7
+DEFAULT_SERIES_DAYS = 28
+
+# 増加・減少とみなす割合の比
+RISING_RATIO = 1.5
+
+# 増加・減少の判定に必要な記事数
+MIN_COUNT = 3
+
+# 結果のデフォルト件数
+DEFAULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_counts (
+    dimension TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, date, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    total INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS indexed_files (
+    source_path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+
+def connect(db_path: Path | None = None) -> sqlite3.Connection:
+    """
+    データベースに接続し、未作成のテーブルを作成する。
+
+    Args:
+        db_path: データベースのパス（省略時は DB_PATH）
+
+    Returns:
+        sqlite3.Connection（行は sqlite3.Row）
+    """
+    path = db_path or DB_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def count_report(report: dict) -> tuple[dict[str, Counter], int]:
+    """
+    1日分のレポートの記事数を次元・値ごとに数える。
+
+    Args:
+        report: articles を持つレポート辞書
+
+    Returns:
+        (次元 -> (値 -> 記事数), 総記事数) のタプル
+    """
+    counts = {dimension: Counter() for dimension in DIMENSIONS}
+    seen_ids = set()
+    for article in report.get("articles", []):
+        # 同じ記事が重複して載っている場合は1件として扱う
+        article_id = article.get("id") or article.get("url")
+        if article_id in seen_ids:
+            continue
+        seen_ids.add(article_id)
+        for dimension in ("category", "source", "subreddit"):
+            if article.get(dimension):
+                counts[dimension][article[dimension]] += 1
+        counts["keyword"].update(set(extract_terms(f"{article.get('title') or ''} {article.get('titleJa') or ''}")))
+    return counts, len(seen_ids)
+
+
+def add_report(report: dict, conn: sqlite3.Connection | None = None) -> int:
+    """
+    1日分のレポートの件数を登録し直す（同じ日付の登録済みの件数と入れ替える）。
+
+    Args:
+        report: date と articles を持つレポート辞書
+        conn: データベースへの接続（省略時は DB_PATH に接続して閉じる）
+
+    Returns:
+        登録した行数
+    """
+    own_conn = conn is None
+    conn = conn or connect()
+    try:
+        return _add_report(conn, report)
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def _add_report(conn: sqlite3.Connection, report: dict) -> int:
+    """レポートの件数を、同じ日付の登録済みの件数と入れ替える。"""
+    date = report["date"]
+    counts, total = count_report(report)
+    rows = [
+        (dimension, date, value, count) for dimension, values in counts.items() for value, count in values.items()
+    ]
+    with conn:
+        _remove_date(conn, date)
+        conn.executemany("INSERT INTO daily_counts (dimension, date, value, count) VALUES (?, ?, ?, ?)", rows)
+        conn.execute("INSERT INTO days (date, total) VALUES (?, ?)", (date, total))
+    return len(rows)
+
+
+def _remove_date(conn: sqlite3.Connection, date: str):
+    """日付の件数を削除する（主キーの先頭の次元ごとに引く）。"""
+    conn.executemany("DELETE FROM daily_counts WHERE dimension = ? AND date = ?", ((d, date) for d in DIMENSIONS))
+    conn.execute("DELETE FROM days WHERE date = ?", (date,))
+
+
+def _mark_indexed(conn: sqlite3.Connection, source_path: str, mtime: float):
+    """ファイルを登録済みとして記録する。"""
+    with conn:
+        conn.execute(
+            "INSERT INTO indexed_files (source_path, mtime) VALUES (?, ?) "
+            "ON CONFLICT (source_path) DO UPDATE SET mtime = excluded.mtime",
+            (source_path, mtime),
+        )
+
+
+def update(conn: sqlite3.Connection, headlines_dir: Path = HEADLINES_DIR, rebuild: bool = False) -> dict:
+    """
+    更新日時が変わった Headlines JSON だけを読み直して件数に反映する。
+
+    削除されたファイルの日付の件数は取り除く。
+
+    Args:
+        conn: データベースへの接続
+        headlines_dir: Headlines ディレクトリ
+        rebuild: True なら全件数を削除して作り直す
+
+    Returns:
+        indexed / skipped / removed / days / errors を持つ辞書
+    """
+    if rebuild:
+        with conn:
+            conn.execute("DELETE FROM daily_counts")
+            conn.execute("DELETE FROM days")
+            conn.execute("DELETE FROM indexed_files")
+
+    indexed_mtimes = {row["source_path"]: row["mtime"] for row in conn.execute("SELECT * FROM indexed_files")}
+    files = {f"Headlines/{path.parent.name}/{path.name}": path for path in headlines_dir.glob("*/*.json")}
+
+    result = {"indexed": 0, "skipped": 0, "removed": 0, "errors": []}
+    for source_path, path in sorted(files.items()):
+        mtime = path.stat().st_mtime
+        if indexed_mtimes.get(source_path) == mtime:
+            result["skipped"] += 1
+            continue
+        try:
+            with profiling.stage("parse"):
+                report = json.loads(path.read_text(encoding="utf-8"))
+            _add_report(conn, report)
+        except (OSError, ValueError, KeyError) as e:
+            result["errors"].append({"path": str(path), "error": str(e)})
+            continue
+        _mark_indexed(conn, source_path, mtime)
+        result["indexed"] += 1
+
+    # 削除されたファイルの日付の件数を取り除く（ファイル名が日付）
+    for source_path in indexed_mtimes.keys() - files.keys():
+        with conn:
+            _remove_date(conn, Path(source_path).stem)
+            conn.execute("DELETE FROM indexed_files WHERE source_path = ?", (source_path,))
+        result["removed"] += 1
+
+    result["days"] = conn.execute("SELECT COUNT(*) FROM days").fetchone()[0]
+    return result
+
+
+def latest_date(conn: sqlite3.Connection) -> str | None:
+    """登録済みの最新の日付を返す（未登録なら None）。"""
+    return conn.execute("SELECT MAX(date) FROM days").fetchone()[0]
+
+
+def _shift(date: str, days: int) -> str:
+    """日付文字列を days 日ずらす。"""
+    return (Date.fromisoformat(date) + timedelta(days=days)).isoformat()
+
+
+def _total_articles(conn: sqlite3.Connection, start: str, end: str) -> int:
+    """期間内の総記事数を返す。"""
+    return conn.execute("SELECT COALESCE(SUM(total), 0) FROM days WHERE date BETWEEN ? AND ?", (start, end)).fetchone()[0]
+
+
+def window(
+    conn: sqlite3.Connection, dimension: str, end: str | None = None, days: int = DEFAULT_DAYS, limit: int = DEFAULT_LIMIT
+) -> dict:
+    """
+    終了日までの days 日間の記事数を値ごとに合計する。
+
+    Args:
+        conn: データベースへの接続
+        dimension: 次元（DIMENSIONS のいずれか）
+        end: 期間の終了日（省略時は登録済みの最新の日付）
+        days: 期間の日数
+        limit: 返す値の上限
+
+    Returns:
+        start / end / articles（期間内の総記事数）/ counts（{value, count, share} の記事数の多い順）を持つ辞書
+    """
+    end = end or latest_date(conn)
+    if end is None:
+        return {"start": None, "end": None, "articles": 0, "counts": []}
+    start = _shift(end, -(days - 1))
+    total = _total_articles(conn, start, end)
+    rows = conn.execute(
+        "SELECT value, SUM(count) AS count FROM daily_counts WHERE dimension = ? AND date BETWEEN ? AND ? "
+        "GROUP BY value ORDER BY count DESC, value LIMIT ?",
+        (dimension, start, end, limit),
+    ).fetchall()
+    return {
+        "start": start,
+        "end": end,
+        "articles": total,
+        "counts": [
+            {"value": row["value"], "count": row["count"], "share": round(row["count"] / total, 4) if total else 0.0}
+            for row in rows
+        ],
+    }
+
+
+def series(
+    conn: sqlite3.Connection,
+    dimension: str,
+    value: str,
+    end: str | None = None,
+    days: int = DEFAULT_SERIES_DAYS,
+    window_days: int = DEFAULT_WINDOW,
+) -> list[dict]:
+    """
+    値の日別の記事数と、window_days 日間の移動合計を返す。
+
+    Args:
+        conn: データベースへの接続
+        dimension: 次元（DIMENSIONS のいずれか）
+        value: 値（keyword は小文字）
+        end: 終了日（省略時は登録済みの最新の日付）
+        days: 返す日数
+        window_days: 移動合計の日数
+
+    Returns:
+        {date, count, articles, rolling} の日付順のリスト（レポートのない日は count / articles が 0）
+    """
+    end = end or latest_date(conn)
+    if end is None:
+        return []
+    start = _shift(end, -(days - 1))
+    first = _shift(start, -(window_days - 1))
+    counts = dict(
+        conn.execute(
+            "SELECT date, count FROM daily_counts WHERE dimension = ? AND date BETWEEN ? AND ? AND value = ?",
+            (dimension, first, end, value),
+        ).fetchall()
+    )
+    totals = dict(conn.execute("SELECT date, total FROM days WHERE date BETWEEN ? AND ?", (first, end)).fetchall())
+
+    result = []
+    rolling = 0
+    dates = [_shift(first, i) for i in range(days + window_days - 1)]
+    for i, date in enumerate(dates):
+        rolling += counts.get(date, 0)
+        if i >= window_days:
+            rolling -= counts.get(dates[i - window_days], 0)
+        if date >= start:
+            result.append({"date": date, "count": counts.get(date, 0), "articles": totals.get(date, 0), "rolling": rolling})
+    return result
+
+
+def momentum(
+    conn: sqlite3.Connection,
+    dimension: str,
+    end: str | None = None,
+    days: int = DEFAULT_DAYS,
+    min_count: int = MIN_COUNT,
+    limit: int = DEFAULT_LIMIT,
+) -> dict:
+    """
+    直近 days 日間とその前の days 日間を比べ、増えている値・減っている値を返す。
+
+    Args:
+        conn: データベースへの接続
+        dimension: 次元（DIMENSIONS のいずれか）
+        end: 直近の期間の終了日（省略時は登録済みの最新の日付）
+        days: 期間の日数
+        min_count: 判定に必要な記事数
+        limit: rising / falling それぞれの上限
+
+    Returns:
+        current / previous（{start, end, articles}）と、rising / falling
+        （{value, current, previous, ratio} の変化の大きい順）を持つ辞書。
+        前の期間にレポートがなければ rising / falling は空
+    """
+    end = end or latest_date(conn)
+    if end is None:
+        return {"current": None, "previous": None, "rising": [], "falling": []}
+    current_start = _shift(end, -(days - 1))
+    previous_end = _shift(current_start, -1)
+    previous_start = _shift(previous_end, -(days - 1))
+    current_total = _total_articles(conn, current_start, end)
+    previous_total = _total_articles(conn, previous_start, previous_end)
+    result = {
+        "current": {"start": current_start, "end": end, "articles": current_total},
+        "previous": {"start": previous_start, "end": previous_end, "articles": previous_total},
+        "rising": [],
+        "falling": [],
+    }
+    if not current_total or not previous_total:
+        return result
+
+    # 2つの期間の件数を1回の範囲検索でまとめて集計する
+    rows = conn.execute(
+        "SELECT value, SUM(CASE WHEN date >= :current_start THEN count ELSE 0 END) AS current, "
+        "SUM(CASE WHEN date < :current_start THEN count ELSE 0 END) AS previous "
+        "FROM daily_counts WHERE dimension = :dimension AND date BETWEEN :previous_start AND :end GROUP BY value",
+        {"dimension": dimension, "current_start": current_start, "previous_start": previous_start, "end": end},
+    ).fetchall()
+    for row in rows:
+        ratio = ((row["current"] + 1) / (current_total + 1)) / ((row["previous"] + 1) / (previous_total + 1))
+        entry = {"value": row["value"], "current": row["current"], "previous": row["previous"], "ratio": round(ratio, 3)}
+        if ratio >= RISING_RATIO and row["current"] >= min_count:
+            result["rising"].append(entry)
+        elif ratio <= 1 / RISING_RATIO and row["previous"] >= min_count:
+            result["falling"].append(entry)
+    result["rising"].sort(key=lambda e: (-e["ratio"], -e["current"], e["value"]))
+    result["falling"].sort(key=lambda e: (e["ratio"], -e["previous"], e["value"]))
+    result["rising"] = result["rising"][:limit]
+    result["falling"] = result["falling"][:limit]
+    return result
+
+
+def _option(name: str) -> str | None:
+    """--name の値を返す（未指定なら None）。"""
+    if name in sys.argv[1:]:
+        value_index = sys.argv.index(name) + 1
+        if value_index < len(sys.argv):
+            return sys.argv[value_index]
+    return None
+
+
+def main():
+    """メイン処理: サブコマンドに応じて件数の更新・集計を行い、JSONで出力する。"""
+    option_names = ("--headlines", "--days", "--end", "--limit", "--window", "--min-count")
+    option_values = {_option(name) for name in option_names}
+    args = [a for a in sys.argv[1:] if not a.startswith("--") and a not in option_values]
+    command = args[0] if args else ""
+    required = {"update": 1, "window": 2, "series": 3, "momentum": 1}
+    dimensions = [a for a in args[1:2] if command != "update"]
+
+    if command not in required or len(args) < required[command] or any(d not in DIMENSIONS for d in dimensions):
+        print(
+            json.dumps(
+                {
+                    "error": "サブコマンドと次元を指定してください。",
+                    "usage": "python3 trend_timeseries.py update [--headlines DIR] [--rebuild] | "
+                    "window <次元> [--days N] [--end YYYY-MM-DD] [--limit N] | "
+                    "series <次元> <値> [--days N] [--window N] [--end YYYY-MM-DD] | "
+                    "momentum [次元] [--days N] [--end YYYY-MM-DD] [--min-count N] [--limit N]",
+                    "dimensions": list(DIMENSIONS),
+                },
+                ensure_ascii=False,
+            ),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    try:
+        end = _option("--end")
+        if end:
+            Date.fromisoformat(end)
+        days = int(_option("--days") or (DEFAULT_SERIES_DAYS if command == "series" else DEFAULT_DAYS))
+        window_days = int(_option("--window") or DEFAULT_WINDOW)
+        min_count = int(_option("--min-count") or MIN_COUNT)
+        limit = int(_option("--limit") or DEFAULT_LIMIT)
+        if days < 1 or window_days < 1:
+            raise ValueError("--days / --window には1以上を指定してください")
+    except ValueError as e:
+        print(json.dumps({"error": f"不正なオプションの値です: {e}"}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+    conn = connect()
+    try:
+        if command == "update":
+            result = update(conn, Path(_option("--headlines") or HEADLINES_DIR), rebuild="--rebuild" in sys.argv[1:])
+        elif command == "window":
+            result = {"dimension": args[1], **window(conn, args[1], end, days, limit)}
+        elif command == "series":
+            value = args[2].lower() if args[1] == "keyword" else args[2]
+            result = {
+                "dimension": args[1],
+                "value": value,
+                "window": window_days,
+                "series": series(conn, args[1], value, end, days, window_days),
+            }
+        else:
+            result = {
+                dimension: momentum(conn, dimension, end, days, min_count, limit)
+                for dimension in (dimensions or DIMENSIONS)
+            }
+    finally:
+        conn.close()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
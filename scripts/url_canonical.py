@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+記事URLの正規化
+
+同じ記事が取得元や取得経路によって少しずつ違うURLで届く
+（Yahoo ニュースの "?source=rss" の有無、Reddit の old.reddit.com / www.reddit.com、
+末尾のスラッシュの有無など）。記事IDの生成と重複除去のキーをすべてこのモジュールの
+正規化URLにそろえ、同じ記事が別のIDになったり重複除去をすり抜けたりしないようにする。
+
+正規化の内容:
+    - 前後の空白・フラグメントを取り除く
+    - スキームとホスト名を小文字にし、http は https に、既定のポート番号は省く
+    - ホストの別名をまとめる（old.reddit.com / reddit.com 等 → www.reddit.com）
+    - トラッキング用のクエリパラメータ（utm_* / fbclid 等、ホストごとの source 等）を取り除き、
+      残りのパラメータはキーの順に並べる
+    - ルート以外のパスの末尾のスラッシュを取り除く（Reddit はパスの大文字・小文字も区別しない）
+
+使い方:
+    from url_canonical import canonicalize, url_id
+
+    canonicalize("https://old.reddit.com/r/webdev/comments/abc/title/")
+    # => "https://www.reddit.com/r/webdev/comments/abc/title"
+    url_id("https://news.yahoo.co.jp/articles/xxx?source=rss")
+    # => "https://news.yahoo.co.jp/articles/xxx" の SHA-256 先頭8文字
+"""
+
+import hashlib
+import urllib.parse
+
+# ホストの別名 -> 正規のホスト名
+HOST_ALIASES = {
+    "reddit.com": "www.reddit.com",
+    "old.reddit.com": "www.reddit.com",
+    "new.reddit.com": "www.reddit.com",
+    "np.reddit.com": "www.reddit.com",
+    "m.reddit.com": "www.reddit.com",
+}
+
+# パスの大文字・小文字を区別しないホスト（正規化後のホスト名）
+CASE_INSENSITIVE_PATH_HOSTS = {"www.reddit.com"}
+
+# どのホストでも取り除くクエリパラメータ
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "msclkid", "mc_cid", "mc_eid", "igshid", "ref_src"}
+
+# 先頭がこれに一致するクエリパラメータは取り除く
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+# ホストごとに取り除くクエリパラメータ（正規化後のホスト名）
+HOST_TRACKING_PARAMS = {
+    "news.yahoo.co.jp": {"source"},
+    "www.reddit.com": {"share_id", "rdt", "context"},
+}
+
+# 省略できる既定のポート番号
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking_param(key: str, host: str) -> bool:
+    """クエリパラメータがトラッキング用なら True を返す。"""
+    name = key.lower()
+    return (
+        name in TRACKING_PARAMS
+        or name.startswith(TRACKING_PARAM_PREFIXES)
+        or name in HOST_TRACKING_PARAMS.get(host, ())
+    )
+
+
+def canonicalize(url: str) -> str:
+    """
+    記事URLを正規化する。
+
+    http / https 以外のURLや解釈できないURLは、前後の空白を除いただけで返す。
+
+    Args:
+        url: 記事URL
+
+    Returns:
+        正規化したURL
+    """
+    url = url.strip()
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    host = HOST_ALIASES.get(host, host)
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    if host in CASE_INSENSITIVE_PATH_HOSTS:
+        path = path.lower()
+
+    params = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    query = urllib.parse.urlencode(sorted((k, v) for k, v in params if not _is_tracking_param(k, host)))
+
+    return urllib.parse.urlunsplit(("https", netloc, path, query, ""))
+
+
+def url_id(url: str) -> str:
+    """
+    正規化URLから記事IDを生成する（SHA-256 の16進表記の先頭8文字）。
+
+    Args:
+        url: 記事URL
+
+    Returns:
+        記事ID
+    """
+    return hashlib.sha256(canonicalize(url).encode()).hexdigest()[:8]
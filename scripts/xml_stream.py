@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+RSSフィードのストリーミングXMLパース
+
+レスポンス本文をチャンク単位で受け取りながらパースし、
+指定した要素（RSSの item 等）が閉じた時点で1件ずつ返す。
+返し終えた要素はツリーから取り除くため、フィードが大きくても
+メモリ使用量はほぼ一定に保たれる。
+
+使い方:
+    from xml_stream import iter_elements
+
+    for item in iter_elements(chunks, "item", depth=3):
+        ...
+"""
+
+import xml.etree.ElementTree as ET
+
+import profiling
+
+
+def iter_elements(chunks, tag: str, depth: int):
+    """
+    XMLのチャンク列をパースし、指定タグ・指定深さの要素を完成した順に返す。
+
+    呼び出し側が要素を処理し終えて次の要素を要求した時点で、
+    その要素は中身を消去した上で親要素から取り除かれる。
+
+    Args:
+        chunks: XML本文のチャンク（bytes または str）のイテラブル
+        tag: 対象要素のタグ名（名前空間付きの場合は "{URI}name" 形式）
+        depth: 対象要素の深さ（ルート要素が1）
+
+    Yields:
+        完成した xml.etree.ElementTree.Element
+
+    Raises:
+        xml.etree.ElementTree.ParseError: XMLが不正な場合
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: list[ET.Element] = []
+
+    def drain():
+        for event, elem in parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag == tag and len(stack) == depth - 1:
+                yield elem
+                # 処理済みの要素を解放してメモリを一定に保つ
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+
+    for chunk in chunks:
+        with profiling.stage("parse"):
+            parser.feed(chunk)
+        yield from drain()
+    with profiling.stage("parse"):
+        parser.close()
+    yield from drain()